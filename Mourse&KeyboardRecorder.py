@@ -1,16 +1,77 @@
-import threading
 import time
+STARTUP_T0 = time.perf_counter()
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, Text
-from pynput import mouse, keyboard
-from pynput.mouse import Controller as MouseController, Button
-from pynput.keyboard import Controller as KeyboardController, Key
 import traceback
 import configparser
+import importlib
 import os
-import json
 import sys
-from datetime import datetime
+import bisect
+import hashlib
+import heapq
+import itertools
+import zlib
+import struct
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+IMPORT_TIMES = {}
+
+
+class LazyImport:
+    # Stands in for a module (or one of its attributes) and imports it on first use.
+    def __init__(self, module_name, attribute=None):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+        self._missing = False
+
+    def _resolve(self):
+        if self._target is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._module_name)
+            IMPORT_TIMES.setdefault(self._module_name, time.perf_counter() - start)
+            self._target = getattr(module, self._attribute) if self._attribute else module
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __instancecheck__(self, obj):
+        # Never imports: nothing can be an instance of a class whose module has not been imported yet.
+        if self._target is None and self._module_name not in sys.modules: return False
+        return isinstance(obj, self._resolve())
+
+    def _available(self):
+        # False when the module cannot be imported (pynput without a display); only tried once.
+        if self._target is None and not self._missing:
+            try:
+                self._resolve()
+            except ImportError:
+                self._missing = True
+        return self._target is not None
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+
+mouse = LazyImport('pynput.mouse')
+keyboard = LazyImport('pynput.keyboard')
+Button = LazyImport('pynput.mouse', 'Button')
+Key = LazyImport('pynput.keyboard', 'Key')
+json = LazyImport('json')
+asyncio = LazyImport('asyncio')
+lzma = LazyImport('lzma')
+mmap = LazyImport('mmap')
+csv = LazyImport('csv')
+urllib_parse = LazyImport('urllib.parse')
+filedialog = LazyImport('tkinter.filedialog')
+ThreadPoolExecutor = LazyImport('concurrent.futures', 'ThreadPoolExecutor')
+ProcessPoolExecutor = LazyImport('concurrent.futures', 'ProcessPoolExecutor')
+IMPORTS_DONE = time.perf_counter()
 
 # Define file paths
 if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
@@ -21,16 +82,43 @@ else:
 SETTINGS_FILE = os.path.join(SCRIPT_DIR, 'settings.ini')
 RECORDINGS_FILE = os.path.join(SCRIPT_DIR, 'recordings.json')
 BUGREPORT_FILE = os.path.join(SCRIPT_DIR, 'bugreport.txt')
+PLAYLISTS_FILE = os.path.join(SCRIPT_DIR, 'playlists.json')
+METRICS_FILE = os.path.join(SCRIPT_DIR, 'metrics.json')
+PROFILE_FILE = os.path.join(SCRIPT_DIR, 'profile_stacks.txt')
+RECORDINGS_STORE_DIR = os.path.join(SCRIPT_DIR, 'recordings_store')
+SCHEDULE_FILE = os.path.join(SCRIPT_DIR, 'schedule.json')
+FLIGHT_RECORDER_FILE = os.path.join(SCRIPT_DIR, 'flight_recorder.bin')
+FLIGHT_REPORT_FILE = os.path.join(SCRIPT_DIR, 'last_session_report.txt')
 
 keybinds = {
     'record': {'1'},
     'playback': {'2'},
     'exit': {'3'},
-    'auto_click': {'4'}
+    'auto_click': {'4'},
+    'snapshot': set()
 }
 
-mouse_controller = MouseController()
-keyboard_controller = KeyboardController()
+mouse_controller = None
+keyboard_controller = None
+controller_lock = threading.Lock()
+
+
+def get_mouse_controller():
+    global mouse_controller
+    if mouse_controller is None:
+        with controller_lock:
+            if mouse_controller is None:
+                mouse_controller = mouse.Controller()
+    return mouse_controller
+
+
+def get_keyboard_controller():
+    global keyboard_controller
+    if keyboard_controller is None:
+        with controller_lock:
+            if keyboard_controller is None:
+                keyboard_controller = keyboard.Controller()
+    return keyboard_controller
 
 # --- Dark Mode Styling Constants ---
 ROOT_BG = '#1E1E1E'
@@ -66,6 +154,2588 @@ def global_exception_handler(exc_type, exc_value, exc_traceback):
 sys.excepthook = global_exception_handler
 
 
+def cap_event_gaps(events, max_gap):
+    # Returns a copy of events whose timestamps are shifted so no gap exceeds max_gap.
+    capped = []
+    shift = 0.0
+    idle_gaps = 0
+    prev_ts = None
+    for event in events:
+        ts = event[-1]
+        if prev_ts is not None and ts - prev_ts > max_gap:
+            shift += (ts - prev_ts) - max_gap
+            idle_gaps += 1
+        prev_ts = ts
+        capped.append(tuple(event[:-1]) + (ts - shift,))
+    return capped, idle_gaps
+
+
+TEXT_RUN_SHIFT_KEYS = ('shift', 'shift_l', 'shift_r')
+
+
+def _key_name(key):
+    return key.name if isinstance(key, Key) else key
+
+
+def _text_char(key):
+    key = _key_name(key)
+    if key == 'space': return ' '
+    if isinstance(key, str) and len(key) == 1 and key.isprintable(): return key
+    return None
+
+
+def compact_text_runs(events, min_length=3):
+    # Folds runs of plain typing (printable key presses/releases, optionally with shift) into one
+    # ('type_text', text, gaps_ms, ts) event: gaps_ms holds the delay before each character after the first.
+    # A run only ends where no key of it is still held, so nothing is left pressed. Returns (events, runs folded).
+    compacted = []
+    run = []
+    clean_end = 0
+    held = set()
+
+    def flush():
+        nonlocal run, clean_end
+        chars, times = [], []
+        shift = False
+        for event in run[:clean_end]:
+            key = _key_name(event[1])
+            if key in TEXT_RUN_SHIFT_KEYS:
+                shift = event[0] == 'key_press'
+            elif event[0] == 'key_press':
+                char = _text_char(key)
+                chars.append(char.upper() if shift else char)
+                times.append(event[-1])
+        if len(chars) >= min_length:
+            gaps = [int(round((b - a) * 1000)) for a, b in zip(times, times[1:])]
+            compacted.append(('type_text', ''.join(chars), gaps, times[0]))
+        else:
+            compacted.extend(run[:clean_end])
+        compacted.extend(run[clean_end:])
+        run = []
+        clean_end = 0
+        held.clear()
+
+    for event in events:
+        if event[0] in ('key_press', 'key_release'):
+            key = _key_name(event[1])
+            if key in TEXT_RUN_SHIFT_KEYS or _text_char(key) is not None:
+                if event[0] == 'key_press':
+                    held.add(key)
+                elif key in held:
+                    held.discard(key)
+                else:
+                    # Release of a key pressed before the run started.
+                    if run: flush()
+                    compacted.append(event)
+                    continue
+                run.append(event)
+                if not held: clean_end = len(run)
+                continue
+        if run: flush()
+        compacted.append(event)
+    if run: flush()
+    folded = sum(1 for event in compacted if event[0] == 'type_text') - sum(1 for event in events if event[0] == 'type_text')
+    return compacted, folded
+
+
+def collapse_key_repeats(events, min_repeats=3, pair_gap=0.005):
+    # Replaces a held key's auto-repeat burst (extra presses, or release+press pairs closer than pair_gap as some
+    # systems report them) with one ('key_hold', key, duration, repeat_delay, repeats, ts) event at the first press.
+    # Events of other keys and the mouse in between are kept. Returns (events, holds collapsed).
+    replaced = {}
+    dropped = set()
+    holds = {}
+    collapsed = 0
+
+    def finish(key):
+        nonlocal collapsed
+        hold = holds.pop(key)
+        if hold['release'] is None or len(hold['repeats']) < min_repeats:
+            return
+        release_idx, release_ts = hold['release']
+        duration = release_ts - hold['ts']
+        repeat_delay = hold['repeats'][0][1] - hold['ts']
+        replaced[hold['idx']] = ('key_hold', key, round(duration, 6), round(repeat_delay, 6), len(hold['repeats']), hold['ts'])
+        dropped.update(idx for idx, _ in hold['repeats'])
+        dropped.update(hold['paired'])
+        dropped.add(release_idx)
+        collapsed += 1
+
+    for idx, event in enumerate(events):
+        if event[0] not in ('key_press', 'key_release'):
+            continue
+        key = _key_name(event[1])
+        hold = holds.get(key)
+        if event[0] == 'key_press':
+            if hold is None:
+                holds[key] = {'idx': idx, 'ts': event[-1], 'repeats': [], 'paired': [], 'release': None}
+            elif hold['release'] is None:
+                hold['repeats'].append((idx, event[-1]))
+            elif event[-1] - hold['release'][1] <= pair_gap:
+                hold['paired'].append(hold['release'][0])
+                hold['repeats'].append((idx, event[-1]))
+                hold['release'] = None
+            else:
+                finish(key)
+                holds[key] = {'idx': idx, 'ts': event[-1], 'repeats': [], 'paired': [], 'release': None}
+        elif hold is not None:
+            if hold['release'] is not None: finish(key)
+            else: hold['release'] = (idx, event[-1])
+    for key in list(holds):
+        finish(key)
+    if not collapsed:
+        return list(events), 0
+    return [replaced.get(idx, event) for idx, event in enumerate(events) if idx not in dropped], collapsed
+
+
+def estimate_playback_duration(events, speed=1.0, max_gap=None, loops=1, inter_loop_delay=0.0):
+    if speed == 0:
+        return None
+    total = 0.0
+    prev_ts = None
+    for event in events:
+        ts = event[-1]
+        if prev_ts is not None:
+            gap = ts - prev_ts
+            if max_gap is not None and gap > max_gap: gap = max_gap
+            if speed > 0: total += max(0.0001, gap / speed)
+            else: total += gap * (1 + abs(speed))
+        prev_ts = ts
+    return total * loops + inter_loop_delay * max(0, loops - 1)
+
+
+CoordinateTransform = namedtuple('CoordinateTransform', 'offset_x offset_y scale_x scale_y clamp monitor_map')
+IDENTITY_TRANSFORM = CoordinateTransform(offset_x=0, offset_y=0, scale_x=1.0, scale_y=1.0, clamp=False, monitor_map=())
+POSITIONAL_EVENTS = ('mouse_click', 'mouse_move', 'mouse_scroll', 'mouse_tap')
+_numpy = None
+
+
+def get_numpy():
+    # NumPy is optional; the array-module fallback gives the same results, just slower on big recordings.
+    global _numpy
+    if _numpy is None:
+        try:
+            _numpy = importlib.import_module('numpy')
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def parse_monitor_map(text):
+    # "left,top,width,height>left,top,width,height; ..." -> ((src_rect, dst_rect), ...)
+    rules = []
+    for part in text.replace('\n', ';').split(';'):
+        part = part.strip()
+        if not part: continue
+        src_text, sep, dst_text = part.partition('>')
+        src = tuple(int(float(v)) for v in src_text.split(','))
+        dst = tuple(int(float(v)) for v in dst_text.split(','))
+        if not sep or len(src) != 4 or len(dst) != 4 or src[2] <= 0 or src[3] <= 0:
+            raise ValueError(f"Invalid monitor rule '{part}'")
+        rules.append((src, dst))
+    return tuple(rules)
+
+
+def format_monitor_map(rules):
+    return "; ".join(f"{','.join(map(str, src))}>{','.join(map(str, dst))}" for src, dst in rules)
+
+
+def transform_bounds(transform, screen_bounds):
+    if transform.monitor_map:
+        dst_rects = [dst for _, dst in transform.monitor_map]
+        return (min(r[0] for r in dst_rects), min(r[1] for r in dst_rects),
+                max(r[0] + r[2] for r in dst_rects) - 1, max(r[1] + r[3] for r in dst_rects) - 1)
+    return screen_bounds
+
+
+def _transform_columns_numpy(np, xs, ys, transform, bounds):
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    if transform.monitor_map:
+        new_xs = xs.copy(); new_ys = ys.copy()
+        unmapped = np.ones(xs.shape, dtype=bool)
+        for (sl, st, sw, sh), (dl, dt, dw, dh) in transform.monitor_map:
+            inside = unmapped & (xs >= sl) & (xs < sl + sw) & (ys >= st) & (ys < st + sh)
+            new_xs[inside] = dl + (xs[inside] - sl) * (dw / sw)
+            new_ys[inside] = dt + (ys[inside] - st) * (dh / sh)
+            unmapped &= ~inside
+        xs, ys = new_xs, new_ys
+    xs = xs * transform.scale_x + transform.offset_x
+    ys = ys * transform.scale_y + transform.offset_y
+    if transform.clamp and bounds is not None:
+        xs = np.clip(xs, bounds[0], bounds[2])
+        ys = np.clip(ys, bounds[1], bounds[3])
+    return np.rint(xs).astype(np.int64).tolist(), np.rint(ys).astype(np.int64).tolist()
+
+
+def _transform_columns_array(xs, ys, transform, bounds):
+    from array import array
+    xs = array('d', xs)
+    ys = array('d', ys)
+    if transform.monitor_map:
+        def remap(x, y):
+            for (sl, st, sw, sh), (dl, dt, dw, dh) in transform.monitor_map:
+                if sl <= x < sl + sw and st <= y < st + sh:
+                    return dl + (x - sl) * (dw / sw), dt + (y - st) * (dh / sh)
+            return x, y
+        mapped = list(map(remap, xs, ys))
+        xs = array('d', [point[0] for point in mapped])
+        ys = array('d', [point[1] for point in mapped])
+    sx, ox, sy, oy = transform.scale_x, transform.offset_x, transform.scale_y, transform.offset_y
+    xs = [x * sx + ox for x in xs]
+    ys = [y * sy + oy for y in ys]
+    if transform.clamp and bounds is not None:
+        left, top, right, bottom = bounds
+        xs = [min(max(x, left), right) for x in xs]
+        ys = [min(max(y, top), bottom) for y in ys]
+    return [int(round(x)) for x in xs], [int(round(y)) for y in ys]
+
+
+def apply_coordinate_transform(events, transform, screen_bounds=None):
+    # Pulls the x/y columns out of positional events, transforms them in one batch and writes them back.
+    # Saved recordings are streamed views, so they are read into a list once up front.
+    events = list(events)
+    if not events or transform == IDENTITY_TRANSFORM:
+        return events
+    indices = [idx for idx, event in enumerate(events) if event[0] in POSITIONAL_EVENTS]
+    if not indices:
+        return events
+    xs = [events[idx][1] for idx in indices]
+    ys = [events[idx][2] for idx in indices]
+    bounds = transform_bounds(transform, screen_bounds)
+    np = get_numpy()
+    if np is not None:
+        new_xs, new_ys = _transform_columns_numpy(np, xs, ys, transform, bounds)
+    else:
+        new_xs, new_ys = _transform_columns_array(xs, ys, transform, bounds)
+    for idx, x, y in zip(indices, new_xs, new_ys):
+        event = events[idx]
+        events[idx] = (event[0], x, y) + tuple(event[3:])
+    return events
+
+
+PipelineOptions = namedtuple('PipelineOptions', 'exclude_types key_map jitter_px jitter_ms')
+DEFAULT_PIPELINE = PipelineOptions(exclude_types=(), key_map=(), jitter_px=0, jitter_ms=0.0)
+
+
+def parse_key_map(text):
+    # "a=b, ctrl=alt" -> (('a', 'b'), ('ctrl', 'alt'))
+    pairs = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part: continue
+        src, sep, dst = part.partition('=')
+        if not sep or not src.strip() or not dst.strip():
+            raise ValueError(f"Invalid key mapping '{part}'")
+        pairs.append((src.strip(), dst.strip()))
+    return tuple(pairs)
+
+
+# Playback pipeline: each stage is a generator over playback steps ('loop', i), ('event', idx, event) and
+# ('loop_delay', seconds). Event stages rewrite or drop 'event' steps and pass the rest through unchanged,
+# so stages chain lazily and nothing is copied. timing_stage turns the stream into the steps the runners execute.
+def source_stage(events, loop_iterations, inter_loop_delay=0.0):
+    for i in range(loop_iterations):
+        yield ('loop', i)
+        for event_idx, event in enumerate(events):
+            yield ('event', event_idx, event)
+        if inter_loop_delay > 0 and i < loop_iterations - 1:
+            yield ('loop_delay', inter_loop_delay)
+
+
+def key_hold_stage(steps, repeat_mode='os'):
+    # Expands each key_hold into a press, optional synthetic repeats and a release, merged in time order with the
+    # events that follow. 'os' presses once and leaves repeating to the system, 'recorded' replays the recorded
+    # number of repeats, a number repeats at that many presses per second.
+    pending = []
+    seq = 0
+    for step in steps:
+        if step[0] == 'event':
+            ts = step[2][-1]
+            while pending and pending[0][0] <= ts:
+                yield heapq.heappop(pending)[2]
+            event = step[2]
+            if event[0] != 'key_hold':
+                yield step
+                continue
+            _, key, duration, repeat_delay, repeats, ts = event
+            yield ('event', step[1], ('key_press', key, ts))
+            if repeat_mode == 'recorded':
+                interval = (duration - repeat_delay) / max(1, repeats)
+            elif repeat_mode != 'os':
+                interval = 1.0 / float(repeat_mode)
+            else:
+                interval = None
+            if interval is not None and interval > 0:
+                offset = repeat_delay
+                while offset < duration:
+                    heapq.heappush(pending, (ts + offset, seq, ('event', step[1], ('key_press', key, ts + offset))))
+                    seq += 1
+                    offset += interval
+            heapq.heappush(pending, (ts + duration, seq, ('event', step[1], ('key_release', key, ts + duration))))
+            seq += 1
+            continue
+        while pending:
+            yield heapq.heappop(pending)[2]
+        yield step
+    while pending:
+        yield heapq.heappop(pending)[2]
+
+
+def gap_cap_stage(steps, max_gap):
+    shift = 0.0
+    prev_ts = None
+    for step in steps:
+        if step[0] == 'loop':
+            shift = 0.0; prev_ts = None
+        elif step[0] == 'event':
+            event = step[2]
+            ts = event[-1]
+            if prev_ts is not None and ts - prev_ts > max_gap:
+                shift += (ts - prev_ts) - max_gap
+            prev_ts = ts
+            if shift:
+                step = ('event', step[1], tuple(event[:-1]) + (ts - shift,))
+        yield step
+
+
+def filter_stage(steps, keep):
+    # Dropped events don't lose their time: the next kept event waits out the whole gap.
+    for step in steps:
+        if step[0] != 'event' or keep(step[2]):
+            yield step
+
+
+def coordinate_stage(steps, transform, screen_bounds=None, chunk_size=1024):
+    # Buffers a chunk of steps so the coordinate columns are still transformed in batches.
+    chunk = []
+    for step in steps:
+        chunk.append(step)
+        if len(chunk) >= chunk_size:
+            yield from _transform_chunk(chunk, transform, screen_bounds)
+            chunk = []
+    if chunk:
+        yield from _transform_chunk(chunk, transform, screen_bounds)
+
+
+def _transform_chunk(chunk, transform, screen_bounds):
+    positions = [idx for idx, step in enumerate(chunk) if step[0] == 'event']
+    transformed = apply_coordinate_transform([chunk[idx][2] for idx in positions], transform, screen_bounds)
+    for idx, event in zip(positions, transformed):
+        chunk[idx] = ('event', chunk[idx][1], event)
+    return chunk
+
+
+def key_map_stage(steps, key_map):
+    mapping = dict(key_map)
+    for step in steps:
+        if step[0] == 'event' and step[2][0] in ('key_press', 'key_release'):
+            event = step[2]
+            key = event[1]
+            name = key.name if isinstance(key, Key) else str(key)
+            if name in mapping:
+                step = ('event', step[1], (event[0], resolve_key(mapping[name]), event[-1]))
+        elif step[0] == 'event' and step[2][0] == 'type_text':
+            event = step[2]
+            text = ''.join(mapping[char] if len(mapping.get(char, '')) == 1 else char for char in event[1])
+            step = ('event', step[1], (event[0], text) + tuple(event[2:]))
+        yield step
+
+
+def jitter_stage(steps, jitter_px=0, jitter_ms=0.0, rng=None):
+    # Random offsets on positions and timestamps; timestamps never move before the previous event's.
+    rng = rng or random.Random()
+    prev_ts = None
+    for step in steps:
+        if step[0] == 'loop':
+            prev_ts = None
+        elif step[0] == 'event':
+            event = list(step[2])
+            if jitter_px and event[0] in POSITIONAL_EVENTS:
+                event[1] += rng.randint(-jitter_px, jitter_px)
+                event[2] += rng.randint(-jitter_px, jitter_px)
+            if jitter_ms:
+                event[-1] += rng.uniform(-jitter_ms, jitter_ms) / 1000
+                if prev_ts is not None and event[-1] < prev_ts: event[-1] = prev_ts
+                prev_ts = event[-1]
+            step = ('event', step[1], tuple(event))
+        yield step
+
+
+def coalesce_moves_stage(steps):
+    # Of consecutive mouse moves only the last matters when dispatching as fast as possible.
+    pending = None
+    for step in steps:
+        if step[0] == 'event' and step[2][0] == 'mouse_move':
+            pending = step
+            continue
+        if pending is not None:
+            yield pending
+            pending = None
+        yield step
+    if pending is not None:
+        yield pending
+
+
+def timing_stage(steps, current_settings, speed=None, pacer=None):
+    # Precedes each event with the wait it needs; the playback speed and delay settings are read live.
+    prev_time = None
+    for step in steps:
+        if step[0] != 'event':
+            if step[0] == 'loop': prev_time = None
+            yield step
+            continue
+        event = step[2]
+        timestamp = event[-1]
+        if event[0] == 'wait_until':
+            # A checkpoint replaces the recorded pause before it: it waits for the screen instead.
+            prev_time = timestamp
+            yield ('checkpoint', step[1], event)
+            continue
+        settings = current_settings()
+        if settings.replay_with_original:
+            if prev_time is not None:
+                time_to_wait = timestamp - prev_time
+                current_speed = settings.playback_speed if speed is None else speed
+                if current_speed > 0: yield ('wait', max(0.0001, time_to_wait / current_speed))
+                elif current_speed < 0: yield ('wait', time_to_wait * (1 + abs(current_speed)))
+                else:
+                    yield ('pause',)
+                    prev_time = timestamp; continue
+            prev_time = timestamp
+        elif pacer is not None:
+            yield ('spin', pacer.delay_before(event))
+        else:
+            yield ('sleep', 0.001)
+        yield step
+        if event[0] == 'type_text' and prev_time is not None:
+            # The run types itself out; the next event is timed from its last character.
+            prev_time = timestamp + sum(event[2]) / 1000
+
+
+FINGERPRINT_SIZE = 8
+FINGERPRINT_TOLERANCE = 6
+FINGERPRINT_MEAN_TOLERANCE = 24
+
+
+def crop_rgb(width, height, rgb, region):
+    left, top, region_w, region_h = region
+    left = max(0, min(width, left)); top = max(0, min(height, top))
+    right = max(left, min(width, left + region_w)); bottom = max(top, min(height, top + region_h))
+    rows = [rgb[(y * width + left) * 3:(y * width + right) * 3] for y in range(top, bottom)]
+    return right - left, bottom - top, b''.join(rows)
+
+
+def downsample_gray(width, height, rgb, size=FINGERPRINT_SIZE, samples=4):
+    # Averages a few sample points per cell instead of every pixel, which is plenty for a fingerprint.
+    gray = []
+    for cell_y in range(size):
+        for cell_x in range(size):
+            total = count = 0
+            for sy in range(samples):
+                y = min(height - 1, (cell_y * samples + sy) * height // (size * samples))
+                for sx in range(samples):
+                    x = min(width - 1, (cell_x * samples + sx) * width // (size * samples))
+                    offset = (y * width + x) * 3
+                    total += (rgb[offset] * 299 + rgb[offset + 1] * 587 + rgb[offset + 2] * 114) // 1000
+                    count += 1
+            gray.append(total // count if count else 0)
+    return gray
+
+
+def gray_fingerprint(gray):
+    # Average hash: one bit per cell (brighter than the region mean or not) plus the mean itself,
+    # so a region that only changes colour evenly still stops matching.
+    mean = sum(gray) // len(gray) if gray else 0
+    bits = 0
+    for value in gray:
+        bits = (bits << 1) | (1 if value > mean else 0)
+    return f"{bits:0{len(gray) // 4}x}:{mean:02x}"
+
+
+def fingerprint_matches(current, expected, tolerance=FINGERPRINT_TOLERANCE):
+    try:
+        current_bits, current_mean = current.split(':')
+        expected_bits, expected_mean = expected.split(':')
+        differing = bin(int(current_bits, 16) ^ int(expected_bits, 16)).count('1')
+        return differing <= tolerance and abs(int(current_mean, 16) - int(expected_mean, 16)) <= FINGERPRINT_MEAN_TOLERANCE
+    except (ValueError, AttributeError):
+        return False
+
+
+class ScreenSource:
+    # Where checkpoints read pixels from. Subclasses implement grab(region) -> (width, height, rgb_bytes)
+    # and may override grab_gray with something faster.
+    name = 'screen'
+
+    def grab(self, region):
+        raise NotImplementedError
+
+    def grab_gray(self, region, size=FINGERPRINT_SIZE):
+        width, height, rgb = self.grab(region)
+        if width == 0 or height == 0: return [0] * (size * size)
+        return downsample_gray(width, height, rgb, size)
+
+    def fingerprint(self, region):
+        return gray_fingerprint(self.grab_gray(region))
+
+
+class PILScreenSource(ScreenSource):
+    name = 'pil'
+
+    def __init__(self):
+        self.image_grab = importlib.import_module('PIL.ImageGrab')
+        self.image = importlib.import_module('PIL.Image')
+
+    def grab(self, region):
+        left, top, width, height = region
+        image = self.image_grab.grab(bbox=(left, top, left + width, top + height), all_screens=True).convert('RGB')
+        return image.width, image.height, image.tobytes()
+
+    def grab_gray(self, region, size=FINGERPRINT_SIZE):
+        left, top, width, height = region
+        image = self.image_grab.grab(bbox=(left, top, left + width, top + height), all_screens=True)
+        return list(image.convert('L').resize((size, size), self.image.BOX).getdata())
+
+
+class FileScreenSource(ScreenSource):
+    # Reads the "screen" from a binary PPM (P6) or PGM (P5) file, re-read whenever it changes on disk.
+    # Lets checkpoints run headless: a test or script swaps the file to simulate the app's screen.
+    name = 'file'
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._frame = (0, 0, b'')
+
+    def _load(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime: return self._frame
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        fields = []
+        pos = 0
+        while len(fields) < 4:
+            while data[pos:pos + 1].isspace(): pos += 1
+            if data[pos:pos + 1] == b'#':
+                pos = data.index(b'\n', pos)
+                continue
+            end = pos
+            while not data[end:end + 1].isspace(): end += 1
+            fields.append(data[pos:end]); pos = end
+        magic, width, height = fields[0], int(fields[1]), int(fields[2])
+        pixels = data[pos + 1:]
+        if magic == b'P5':
+            pixels = bytes(value for value in pixels[:width * height] for _ in range(3))
+        elif magic != b'P6':
+            raise ValueError(f"Unsupported screen file format {magic!r} (use binary PPM or PGM)")
+        self._mtime = mtime
+        self._frame = (width, height, pixels[:width * height * 3])
+        return self._frame
+
+    def grab(self, region):
+        width, height, rgb = self._load()
+        return crop_rgb(width, height, rgb, region)
+
+
+class FakeScreenSource(ScreenSource):
+    # In-memory screen for tests: paint regions with fill() and checkpoints see the change.
+    name = 'fake'
+
+    def __init__(self, width=640, height=480, color=(0, 0, 0)):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(bytes(color) * (width * height))
+
+    def fill(self, region, color):
+        left, top, width, height = region
+        for y in range(max(0, top), min(self.height, top + height)):
+            start = (y * self.width + max(0, left)) * 3
+            end = (y * self.width + min(self.width, left + width)) * 3
+            self.pixels[start:end] = bytes(color) * ((end - start) // 3)
+
+    def grab(self, region):
+        return crop_rgb(self.width, self.height, bytes(self.pixels), region)
+
+
+def create_screen_source(kind='auto', file_path=''):
+    if kind == 'file':
+        return FileScreenSource(file_path)
+    try:
+        return PILScreenSource()
+    except ImportError:
+        if kind == 'pil': raise
+        return None
+
+
+class FingerprintWaiter:
+    # Polls a region until its fingerprint matches. Polls quickly while the region is changing (the app is
+    # drawing) and backs off while it sits still, so a long wait costs almost no CPU.
+    MIN_INTERVAL = 0.01
+    MAX_INTERVAL = 0.25
+
+    def __init__(self, source, region, fingerprint, tolerance=FINGERPRINT_TOLERANCE):
+        self.source = source
+        self.region = tuple(region)
+        self.fingerprint = fingerprint
+        self.tolerance = tolerance
+        self.interval = self.MIN_INTERVAL
+        self.last = None
+        self.polls = 0
+
+    def poll(self):
+        self.polls += 1
+        current = self.source.fingerprint(self.region)
+        if fingerprint_matches(current, self.fingerprint, self.tolerance):
+            return True
+        self.interval = self.MIN_INTERVAL if current != self.last else min(self.MAX_INTERVAL, self.interval * 1.5)
+        self.last = current
+        return False
+
+
+def resolve_button(btn_data):
+    if isinstance(btn_data, Button): return btn_data
+    if isinstance(btn_data, dict) and '__button__' in btn_data: return getattr(Button, btn_data['__button__'], None)
+    if isinstance(btn_data, str): return getattr(Button, btn_data, None)
+    return None
+
+
+def resolve_key(key_data):
+    if isinstance(key_data, Key): return key_data
+    if isinstance(key_data, str):
+        if hasattr(Key, key_data): return getattr(Key, key_data)
+        if len(key_data) > 0: return key_data
+    return None
+
+
+# Field count of each event type, including the type tag and the timestamp.
+EVENT_ARITY = {'mouse_click': 6, 'mouse_move': 4, 'mouse_scroll': 6, 'key_press': 3, 'key_release': 3,
+               'type_text': 4, 'key_hold': 6, 'wait_until': 5, 'text_slot': 3, 'click_slot': 5}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+
+
+def is_known_button(button):
+    # Without pynput button names cannot be checked, only their form.
+    if not Button._available(): return isinstance(button, str) or (isinstance(button, dict) and '__button__' in button)
+    return resolve_button(button) is not None
+
+
+def is_known_key(key):
+    return isinstance(key, Key) or (isinstance(key, str) and (len(key) == 1 or not Key._available() or hasattr(Key, key)))
+
+
+class EventValidator:
+    # Checks events one at a time, so a stored recording can be validated chunk by chunk. Errors are events
+    # playback cannot run (wrong shape, no usable timestamp); warnings are events it would skip or may misplace.
+    MAX_PROBLEMS = 50
+
+    def __init__(self, screen_bounds=None):
+        self.screen_bounds = screen_bounds
+        self.prev_ts = None
+        self.count = 0
+        self.errors = 0
+        self.warnings = 0
+        self.problems = []
+
+    def _problem(self, severity, idx, message):
+        if severity == 'error': self.errors += 1
+        else: self.warnings += 1
+        if len(self.problems) < self.MAX_PROBLEMS:
+            self.problems.append((severity, idx, message))
+
+    def check(self, event):
+        idx = self.count
+        self.count += 1
+        if not isinstance(event, (tuple, list)) or not event or event[0] not in EVENT_ARITY:
+            self._problem('error', idx, f"unknown event {str(event)[:60]}")
+            return
+        event_type = event[0]
+        if len(event) != EVENT_ARITY[event_type]:
+            self._problem('error', idx, f"{event_type} has {len(event) - 1} fields, expected {EVENT_ARITY[event_type] - 1}")
+            return
+        timestamp = event[-1]
+        if not _is_number(timestamp):
+            self._problem('error', idx, f"{event_type} timestamp {timestamp!r} is not a number")
+            return
+        if self.prev_ts is not None and timestamp < self.prev_ts:
+            self._problem('warning', idx, f"timestamp goes back {self.prev_ts - timestamp:.3f}s")
+        self.prev_ts = timestamp
+        if event_type in POSITIONAL_EVENTS:
+            x, y = event[1], event[2]
+            if not _is_number(x) or not _is_number(y):
+                self._problem('error', idx, f"{event_type} position ({x!r}, {y!r}) is not numeric")
+                return
+            bounds = self.screen_bounds
+            if bounds is not None and not (bounds[0] <= x <= bounds[2] and bounds[1] <= y <= bounds[3]):
+                self._problem('warning', idx, f"{event_type} at ({x}, {y}) is outside the screen")
+        if event_type == 'mouse_click' and not is_known_button(event[3]):
+            self._problem('warning', idx, f"unknown mouse button {event[3]!r}")
+        elif event_type in ('key_press', 'key_release', 'key_hold') and not is_known_key(event[1]):
+            self._problem('warning', idx, f"unknown key {event[1]!r}")
+        elif event_type == 'type_text' and (not isinstance(event[1], str) or not isinstance(event[2], (list, tuple))
+                                            or len(event[2]) != max(0, len(event[1]) - 1)):
+            self._problem('error', idx, "type_text text and gaps do not match")
+        elif event_type == 'key_hold' and not all(_is_number(value) and value >= 0 for value in event[2:5]):
+            self._problem('error', idx, "key_hold duration, delay or repeats is invalid")
+        elif event_type == 'mouse_scroll' and not (_is_number(event[3]) and _is_number(event[4])):
+            self._problem('error', idx, "mouse_scroll amounts are not numeric")
+
+    def check_all(self, events):
+        for event in events:
+            self.check(event)
+        return self
+
+    def describe(self, limit=3):
+        shown = '; '.join(f"event {idx + 1}: {message}" for _, idx, message in self.problems[:limit])
+        more = self.errors + self.warnings - min(limit, len(self.problems))
+        return shown + (f"; and {more} more" if more > 0 else "")
+
+
+def verify_stored_recording(root_dir, name, manifest, chunk_info, screen_bounds=None):
+    # Runs in a worker process for the library verify: reads every chunk of one recording, checks its checksum
+    # (plain chunks) or codec integrity, and validates the events. Only plain data goes in and out.
+    store = ChunkStore(root_dir)
+    store.chunk_sizes = chunk_info
+    validator = EventValidator(screen_bounds)
+    summary = RecordingSummary()
+    corrupt = None
+    for chunk_idx, (digest, start_ts) in enumerate(manifest):
+        try:
+            events = store.read_chunk(digest, start_ts, verify=True)
+        except Exception as e:
+            corrupt = f"chunk {chunk_idx + 1} unreadable: {type(e).__name__}: {e}"
+            break
+        validator.check_all(events)
+        summary.add_events(events)
+    if corrupt is None and validator.errors:
+        corrupt = f"{validator.errors} invalid events: {validator.describe()}"
+    return {'name': name, 'events': validator.count, 'errors': validator.errors, 'warnings': validator.warnings,
+            'problems': validator.problems, 'corrupt': corrupt,
+            'metadata': {'events': summary.events, 'types': summary.types,
+                         'duration': round(summary.last_ts - summary.first_ts, 3) if summary.events else 0.0}}
+
+
+def compile_events(events, warnings=None):
+    # Resolves button and key names once so playback does no per-event lookups.
+    compiled = []
+    for idx, event in enumerate(events):
+        event_type = event[0]
+        if event_type == 'mouse_click':
+            btn = resolve_button(event[3])
+            if btn is None:
+                if warnings is not None: warnings.append(f"Unknown button data '{event[3]}' for event {idx+1}.")
+                continue
+            compiled.append(event[:3] + (btn,) + tuple(event[4:]))
+        elif event_type in ('key_press', 'key_release'):
+            key = resolve_key(event[1])
+            if key is None:
+                if warnings is not None: warnings.append(f"Unknown key data '{event[1]}' for event {idx+1}.")
+                continue
+            compiled.append((event_type, key, event[-1]))
+        else:
+            compiled.append(tuple(event))
+    return compiled
+
+
+DATA_SLOT_EVENTS = ('text_slot', 'click_slot')
+
+
+def iter_data_rows(path):
+    # Streams rows as dicts from a CSV file (first row = column names) or a JSON Lines file (.jsonl/.ndjson),
+    # one row at a time, so the size of the input does not matter.
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line: yield json.loads(line)
+    else:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+
+
+def slot_columns(events):
+    columns = []
+    for event in events:
+        if event[0] == 'text_slot': names = (event[1],)
+        elif event[0] == 'click_slot': names = (event[1], event[2])
+        else: continue
+        columns.extend(name for name in names if name not in columns)
+    return columns
+
+
+def bind_data_row(compiled, slot_positions, row):
+    # Copies the compiled recording and fills its slots from one data row: ('text_slot', column, ts) becomes
+    # typed text, ('click_slot', x_column, y_column, button, ts) a click at the row's coordinates.
+    bound = list(compiled)
+    for idx in slot_positions:
+        event = compiled[idx]
+        if event[0] == 'text_slot':
+            text = str(row[event[1]])
+            bound[idx] = ('type_text', text, [0] * max(0, len(text) - 1), event[-1])
+        else:
+            x, y = int(float(row[event[1]])), int(float(row[event[2]]))
+            bound[idx] = ('mouse_tap', x, y, resolve_button(event[3]) or event[3], event[-1])
+    return bound
+
+
+def precise_wait(seconds):
+    end = time.perf_counter() + seconds
+    if seconds > 0.002:
+        time.sleep(seconds - 0.002)
+    while time.perf_counter() < end:
+        pass
+
+
+class ThroughputPacer:
+    # Minimum gap (s) before dispatching each event type in max-throughput mode.
+    MIN_GAPS = {'mouse_move': 0.0, 'mouse_click': 0.001, 'mouse_scroll': 0.001, 'key_press': 0.0, 'key_release': 0.0}
+    KEY_PAIR_GAP = 0.003
+    MAX_BACKOFF = 0.05
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.latency_ewma = None
+        self.baseline_latency = None
+        self.backoff = 0.0
+        self.last_dispatch = None
+        self.pressed_at = {}
+        self.dispatched = 0
+        self.started = None
+
+    def delay_before(self, event):
+        now = self.clock()
+        if self.started is None:
+            self.started = now
+        gap = self.MIN_GAPS.get(event[0], 0.001) + self.backoff
+        target = now if self.last_dispatch is None else self.last_dispatch + gap
+        if event[0] in ('key_release', 'mouse_click'):
+            key = event[1] if event[0] == 'key_release' else ('mouse', event[3])
+            if event[0] == 'key_release' or not event[4]:
+                pressed_at = self.pressed_at.pop(key, None)
+                if pressed_at is not None:
+                    target = max(target, pressed_at + self.KEY_PAIR_GAP)
+        return max(0.0, target - now)
+
+    def record(self, event, call_latency):
+        now = self.clock()
+        self.last_dispatch = now
+        self.dispatched += 1
+        if event[0] == 'key_press':
+            self.pressed_at[event[1]] = now
+        elif event[0] == 'mouse_click' and event[4]:
+            self.pressed_at[('mouse', event[3])] = now
+        if self.latency_ewma is None:
+            self.latency_ewma = call_latency
+        else:
+            self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * call_latency
+        if self.baseline_latency is None or call_latency < self.baseline_latency:
+            self.baseline_latency = call_latency
+        # Back off while controller calls are slower than usual, recover once they settle.
+        if self.latency_ewma > 2 * self.baseline_latency + 0.0005:
+            self.backoff = min(self.MAX_BACKOFF, max(0.0005, self.backoff * 1.5))
+        else:
+            self.backoff *= 0.9
+
+    def events_per_second(self):
+        if self.started is None or self.last_dispatch is None or self.last_dispatch <= self.started:
+            return 0.0
+        return self.dispatched / (self.last_dispatch - self.started)
+
+
+DRY_RUN_TRACE_LIMIT = 100000
+DryRunReport = namedtuple('DryRunReport', 'total loops counts trace checkpoints paused')
+
+
+class VirtualClock:
+    # Stands in for the wall clock in a dry run: waiting only moves the time forward.
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        if seconds > 0: self.now += seconds
+
+
+def simulate_playback(steps, clock, typing_seconds=None, pacer=None, trace_limit=DRY_RUN_TRACE_LIMIT):
+    # Runs the playback steps the way the playback runner does, against a virtual clock and without sending any
+    # input. Checkpoints are assumed to match at once. Stops at a 0x speed pause, since that would never end.
+    loops = []
+    counts = {}
+    trace = []
+    checkpoints = 0
+    loop_idx = 0
+    for step in steps:
+        kind = step[0]
+        if kind == 'loop':
+            loop_idx = step[1]
+            loops.append([clock.now, clock.now])
+        elif kind in ('wait', 'sleep', 'spin', 'loop_delay'):
+            clock.advance(step[1])
+        elif kind == 'pause':
+            return DryRunReport(clock.now, loops, counts, trace, checkpoints, True)
+        elif kind in ('event', 'checkpoint'):
+            _, event_idx, event = step
+            if kind == 'checkpoint': checkpoints += 1
+            counts[event[0]] = counts.get(event[0], 0) + 1
+            if len(trace) < trace_limit: trace.append((clock.now, loop_idx, event_idx, event[0]))
+            if kind == 'event' and pacer is not None: pacer.record(event, 0.0)
+            if event[0] == 'type_text' and typing_seconds is not None: clock.advance(typing_seconds(event[2]))
+            if loops: loops[-1][1] = clock.now
+    return DryRunReport(clock.now, loops, counts, trace, checkpoints, False)
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "n/a (paused)"
+    seconds = int(round(seconds))
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    if hours: return f"{hours}h {minutes:02d}m {secs:02d}s"
+    if minutes: return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+
+class Histogram:
+    BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms):
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max: self.max = value_ms
+
+    def percentile(self, fraction):
+        if not self.count: return 0.0
+        target = fraction * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.BUCKETS_MS[idx] if idx < len(self.BUCKETS_MS) else self.max
+        return self.max
+
+    def summary(self):
+        return {'count': self.count, 'mean_ms': round(self.total / self.count, 4) if self.count else 0.0,
+                'p50_ms': self.percentile(0.5), 'p99_ms': self.percentile(0.99), 'max_ms': round(self.max, 4),
+                'buckets': {f"le_{bound}": c for bound, c in zip(self.BUCKETS_MS + ('inf',), self.counts) if c}}
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.started = time.time()
+        self._last_rate_counters = {}
+        self._last_rate_time = time.time()
+
+    def inc(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, value_ms):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value_ms)
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def snapshot(self):
+        now = time.time()
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {name: h.summary() for name, h in self.histograms.items()}
+        elapsed = max(1e-6, now - self._last_rate_time)
+        rates = {name: round((value - self._last_rate_counters.get(name, 0)) / elapsed, 2)
+                 for name, value in counters.items() if name.startswith('capture.') or name.startswith('playback.')}
+        self._last_rate_counters = counters
+        self._last_rate_time = now
+        gauges = dict(self.gauges)
+        gauges['rss_bytes'] = get_rss_bytes()
+        return {'time': now, 'uptime_s': round(now - self.started, 1), 'counters': counters,
+                'rates_per_s': rates, 'gauges': gauges, 'histograms': histograms}
+
+
+def get_rss_bytes():
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+            return counters.WorkingSetSize
+        if os.path.exists('/proc/self/statm'):
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+    except Exception:
+        return None
+
+
+class SamplingProfiler:
+    # Samples the stacks of selected threads and writes them in folded ("flame graph") format.
+    def __init__(self, threads_to_sample, interval=0.005):
+        self.threads_to_sample = threads_to_sample
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+    def _run(self):
+        while self.running:
+            targets = self.threads_to_sample()
+            if targets:
+                frames = sys._current_frames()
+                for ident, label in targets.items():
+                    frame = frames.get(ident)
+                    if frame is None: continue
+                    parts = []
+                    while frame is not None:
+                        code = frame.f_code
+                        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                        frame = frame.f_back
+                    folded = label + ";" + ";".join(reversed(parts))
+                    self.stacks[folded] = self.stacks.get(folded, 0) + 1
+                    self.samples += 1
+            time.sleep(self.interval)
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+metrics = Metrics()
+
+
+def encode_event_value(value):
+    if isinstance(value, Button): return {'__button__': value.name}
+    if isinstance(value, Key): return {'__key__': value.name}
+    return value
+
+
+def decode_event_value(value):
+    # Without pynput (a headless machine) buttons and keys decode to their names, which playback resolves the same way.
+    if isinstance(value, dict):
+        if '__button__' in value:
+            return getattr(Button, value['__button__'], value['__button__']) if Button._available() else value['__button__']
+        if '__key__' in value:
+            return getattr(Key, value['__key__'], value['__key__']) if Key._available() else value['__key__']
+    return value
+
+
+def encode_chunk_columns(rows):
+    # Splits chunk rows into columns: type tags become small ints, positions and times become deltas,
+    # so zlib/lzma see long runs of small repeated numbers instead of repeated JSON keys and absolute values.
+    type_names = []
+    types, xs, ys, times, rest = [], [], [], [], []
+    prev_x = prev_y = prev_us = 0
+    for row in rows:
+        event_type = row[0]
+        if event_type not in type_names: type_names.append(event_type)
+        types.append(type_names.index(event_type))
+        us = int(round(row[-1] * 1000000))
+        times.append(us - prev_us); prev_us = us
+        if event_type in POSITIONAL_EVENTS:
+            xs.append(row[1] - prev_x); prev_x = row[1]
+            ys.append(row[2] - prev_y); prev_y = row[2]
+            rest.append(row[3:-1])
+        else:
+            rest.append(row[1:-1])
+    columns = {'names': type_names, 'types': types, 'x': xs, 'y': ys, 'ts': times, 'rest': rest}
+    return json.dumps(columns, separators=(',', ':')).encode('utf-8')
+
+
+def decode_chunk_columns(data):
+    columns = json.loads(data)
+    type_names = columns['names']
+    xs, ys, times, rest = iter(columns['x']), iter(columns['y']), iter(columns['ts']), iter(columns['rest'])
+    rows = []
+    x = y = us = 0
+    for type_idx in columns['types']:
+        event_type = type_names[type_idx]
+        us += next(times)
+        if event_type in POSITIONAL_EVENTS:
+            x += next(xs); y += next(ys)
+            rows.append([event_type, x, y] + next(rest) + [us / 1000000])
+        else:
+            rows.append([event_type] + next(rest) + [us / 1000000])
+    return rows
+
+
+# name -> (compress, decompress, file extension). 'none' keeps the plain JSON rows.
+CHUNK_CODECS = {
+    'none': (None, None, '.json'),
+    'zlib': (lambda data: zlib.compress(encode_chunk_columns(json.loads(data)), 9),
+             lambda data: decode_chunk_columns(zlib.decompress(data)), '.zlib'),
+    'lzma': (lambda data: lzma.compress(encode_chunk_columns(json.loads(data)), preset=6),
+             lambda data: decode_chunk_columns(lzma.decompress(data)), '.xz'),
+}
+
+
+class FlightRecorder:
+    # Keeps the last log lines and engine events in a fixed-size memory-mapped ring file. A write is a copy into
+    # mapped memory with no system call, and the OS writes the pages back even when the process ends with
+    # os._exit, so the next start can still read how this session ended.
+    MAGIC = b'MKFR\x01'
+    # magic, slot size, slot count, session start, clean exit flag, playback loop/loops/event/events, position time
+    HEADER = struct.Struct('<5sHIdBiiiid')
+    HEADER_SIZE = 64
+    CLEAN_OFFSET = struct.calcsize('<5sHId')
+    POSITION = struct.Struct('<iiiid')
+    # sequence number + 1 (0 = empty), time, kind, text length
+    SLOT = struct.Struct('<QdBH')
+    KINDS = ('log', 'error', 'action', 'playback')
+
+    def __init__(self, path, slots=4096, slot_size=512):
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.max_text = slot_size - self.SLOT.size
+        self.sequence = itertools.count()
+        self.file = None
+        self.map = None
+
+    def open(self):
+        size = self.HEADER_SIZE + self.slots * self.slot_size
+        self.file = open(self.path, 'w+b')
+        self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.HEADER.pack_into(self.map, 0, self.MAGIC, self.slot_size, self.slots, time.time(), 0, 0, 0, 0, 0, 0.0)
+
+    @classmethod
+    def kind_of(cls, message):
+        if message.startswith(('ERROR', 'CRITICAL', 'EMERGENCY')): return 1
+        if message.startswith(('TRIGGER', 'ACTION')): return 2
+        if message.startswith('PLAYBACK'): return 3
+        return 0
+
+    def record(self, kind, text):
+        # The sequence number is written after the text, so a slot caught half-written reads as the older entry or empty.
+        sequence = next(self.sequence)
+        data = text.encode('utf-8', 'replace')[:self.max_text]
+        offset = self.HEADER_SIZE + (sequence % self.slots) * self.slot_size
+        self.map[offset + self.SLOT.size:offset + self.SLOT.size + len(data)] = data
+        self.SLOT.pack_into(self.map, offset, sequence + 1, time.time(), kind, len(data))
+
+    def set_position(self, loop, loops, event, events):
+        # Fixed header field rather than a ring entry, so per-event updates do not push the log out of the ring.
+        self.POSITION.pack_into(self.map, self.CLEAN_OFFSET + 1, loop, loops, event, events, time.time())
+
+    def close(self, clean=True):
+        if self.map is None: return
+        self.map[self.CLEAN_OFFSET] = 1 if clean else 0
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+        self.map = self.file = None
+
+    @classmethod
+    def read(cls, path):
+        # Returns the previous session's header and entries in order, or None when there is no usable ring file.
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < cls.HEADER_SIZE or not data.startswith(cls.MAGIC): return None
+        _, slot_size, slots, session_start, clean, loop, loops, event, events, position_ts = cls.HEADER.unpack_from(data, 0)
+        entries = []
+        for idx in range(slots):
+            offset = cls.HEADER_SIZE + idx * slot_size
+            if offset + slot_size > len(data): break
+            sequence, timestamp, kind, length = cls.SLOT.unpack_from(data, offset)
+            if sequence == 0: continue
+            text = data[offset + cls.SLOT.size:offset + cls.SLOT.size + min(length, slot_size - cls.SLOT.size)].decode('utf-8', 'replace')
+            entries.append((sequence - 1, timestamp, cls.KINDS[kind] if kind < len(cls.KINDS) else '?', text))
+        entries.sort()
+        return {'session_start': session_start, 'clean': bool(clean), 'entries': entries,
+                'position': (loop, loops, event, events, position_ts) if position_ts else None}
+
+
+def format_flight_report(session):
+    started = datetime.fromtimestamp(session['session_start']).strftime('%Y-%m-%d %H:%M:%S')
+    entries = session['entries']
+    lines = [f"Previous session started {started}, "
+             + ("exited normally." if session['clean'] else "did NOT exit normally (crash, kill or emergency exit)."),
+             f"Last {len(entries)} entries (sequence {entries[0][0] if entries else 0} to {entries[-1][0] if entries else 0})."]
+    if session['position'] is not None:
+        loop, loops, event, events, position_ts = session['position']
+        lines.append(f"Last playback position: loop {loop}/{loops}, event {event}/{events} at "
+                     f"{datetime.fromtimestamp(position_ts).strftime('%H:%M:%S.%f')[:-3]}.")
+    lines.append("=" * 70)
+    for _, timestamp, kind, text in entries:
+        lines.append(f"{datetime.fromtimestamp(timestamp).strftime('%H:%M:%S.%f')[:-3]} {kind:<8} {text}")
+    return '\n'.join(lines) + '\n'
+
+
+DECODED_CACHE_MB = 64.0
+
+
+class DecodedChunkCache:
+    # LRU of decoded chunks keyed by content hash, so recordings that share chunks share the decoded rows too.
+    # Sizes are estimated per chunk. Once the byte budget is exceeded the least recently used chunks are dropped
+    # and decoded again when next read. Pinned chunks (the loaded recording's) are held apart and never evicted.
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.bytes = 0
+        self.pinned_entries = {}
+        self.pinned_bytes = 0
+        self.pins = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def estimate_size(rows):
+        # Sampled: rows of a chunk have near-identical shapes, and sizing every value would cost as much as decoding.
+        if not rows: return 64
+        sample = rows[:8]
+        per_row = sum(sys.getsizeof(fields) + sum(sys.getsizeof(value) for value in fields) + 88 for fields, _ in sample) / len(sample)
+        return int(per_row * len(rows)) + sys.getsizeof(rows)
+
+    def get(self, digest):
+        with self.lock:
+            entry = self.pinned_entries.get(digest)
+            if entry is None:
+                entry = self.entries.pop(digest, None)
+                if entry is not None: self.entries[digest] = entry
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def put(self, digest, rows):
+        size = self.estimate_size(rows)
+        with self.lock:
+            if digest in self.pinned_entries or digest in self.entries: return
+            if any(digest in digests for digests in self.pins.values()):
+                self.pinned_entries[digest] = (rows, size)
+                self.pinned_bytes += size
+                return
+            self.entries[digest] = (rows, size)
+            self.bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self.bytes > self.budget_bytes and self.entries:
+            digest = next(iter(self.entries))
+            self.bytes -= self.entries.pop(digest)[1]
+            self.evictions += 1
+
+    def pin(self, owner, digests):
+        # Replaces owner's pins; chunks no longer pinned by anyone go back to the LRU as most recently used.
+        with self.lock:
+            self.pins[owner] = set(digests)
+            self._rebalance()
+
+    def unpin(self, owner):
+        with self.lock:
+            if self.pins.pop(owner, None) is not None:
+                self._rebalance()
+
+    def _rebalance(self):
+        pinned = set().union(*self.pins.values()) if self.pins else set()
+        for digest in [digest for digest in self.pinned_entries if digest not in pinned]:
+            entry = self.pinned_entries.pop(digest)
+            self.pinned_bytes -= entry[1]
+            self.entries[digest] = entry
+            self.bytes += entry[1]
+        for digest in [digest for digest in self.entries if digest in pinned]:
+            entry = self.entries.pop(digest)
+            self.bytes -= entry[1]
+            self.pinned_entries[digest] = entry
+            self.pinned_bytes += entry[1]
+        self._evict()
+
+    def discard(self, digest):
+        # Pinned chunks are still in use and are only dropped once unpinned.
+        with self.lock:
+            entry = self.entries.pop(digest, None)
+            if entry is not None: self.bytes -= entry[1]
+
+    def set_budget(self, budget_bytes):
+        with self.lock:
+            self.budget_bytes = budget_bytes
+            self._evict()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'chunks': len(self.entries), 'bytes': self.bytes, 'budget_bytes': self.budget_bytes,
+                    'pinned_chunks': len(self.pinned_entries), 'pinned_bytes': self.pinned_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0}
+
+
+class ChunkStore:
+    # Recordings are stored as lists of content-hashed event chunks. Chunk boundaries are content-defined,
+    # so a variant of a recording (events added, removed or edited) shares every chunk outside the change.
+    # Timestamps inside a chunk are relative to its first event; the manifest keeps each chunk's start time.
+    MIN_CHUNK = 16
+    MAX_CHUNK = 512
+    BOUNDARY_MASK = 0x3F
+
+    def __init__(self, root_dir, codec='none', cache_bytes=int(DECODED_CACHE_MB * 1024 * 1024)):
+        self.root_dir = root_dir
+        self.codec = codec
+        self.cache = DecodedChunkCache(cache_bytes)
+        self.chunks_dir = os.path.join(root_dir, 'chunks')
+        self.index_path = os.path.join(root_dir, 'index.json')
+        self.lock = threading.RLock()
+        self.recordings = {}
+        self.refcounts = {}
+        self.chunk_sizes = {}
+        self.metadata = {}
+        self.holds = {}
+        self.orphans = set()
+        self.damaged = None
+
+    def exists(self):
+        return os.path.exists(self.index_path)
+
+    def load_index(self):
+        # An index that cannot be parsed is copied aside and the store turns read-only: writing a new index,
+        # or removing chunks it does not list, would throw the whole library away.
+        with self.lock:
+            try:
+                with open(self.index_path, 'r') as f:
+                    index = json.load(f)
+                if not isinstance(index, dict): raise ValueError("index is not a JSON object")
+            except ValueError as e:
+                self.damaged = str(e)
+                with open(self.index_path, 'rb') as src, open(self.index_path + '.corrupt', 'wb') as dst:
+                    dst.write(src.read())
+                raise
+            self.recordings = index.get('recordings', {})
+            self.refcounts = index.get('refcounts', {})
+            self.chunk_sizes = index.get('chunk_sizes', {})
+            self.metadata = index.get('metadata', {})
+
+    def _check_writable(self):
+        if self.damaged is not None:
+            raise RuntimeError(f"the library index is damaged ({self.damaged}); nothing is saved until it is repaired")
+
+    def _save_index(self):
+        self._check_writable()
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': 1, 'recordings': self.recordings, 'refcounts': self.refcounts,
+                       'chunk_sizes': self.chunk_sizes, 'metadata': self.metadata}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _chunk_codec(self, digest):
+        info = self.chunk_sizes.get(digest)
+        return info[3] if info is not None and len(info) > 3 else 'none'
+
+    def _chunk_path(self, digest, codec=None):
+        extension = CHUNK_CODECS[codec or self._chunk_codec(digest)][2]
+        return os.path.join(self.chunks_dir, digest[:2], digest + extension)
+
+    def names(self):
+        return list(self.recordings.keys())
+
+    def split(self, events):
+        # Gear-style rolling hash over event contents (timestamps excluded); old events shift out after 32 steps.
+        # Yields each chunk as soon as it is complete.
+        current = []
+        rolling = 0
+        for event in events:
+            encoded = [encode_event_value(v) for v in event[:-1]]
+            current.append((encoded, event[-1]))
+            rolling = ((rolling << 1) + zlib.crc32(repr(encoded).encode())) & 0xFFFFFFFF
+            if len(current) >= self.MAX_CHUNK or (len(current) >= self.MIN_CHUNK and rolling & self.BOUNDARY_MASK == 0):
+                yield current
+                current = []
+                rolling = 0
+        if current:
+            yield current
+
+    def _serialize_chunk(self, chunk):
+        start_ts = chunk[0][1]
+        rows = [encoded + [round(ts - start_ts, 6)] for encoded, ts in chunk]
+        data = json.dumps(rows, separators=(',', ':')).encode('utf-8')
+        return hashlib.sha256(data).hexdigest(), data, start_ts
+
+    def put(self, name, events):
+        # Writes only chunks not already in the store; returns (new_chunks, new_bytes). events may be any
+        # iterable: chunks are written as they fill up, so the input never has to fit in memory.
+        self._check_writable()
+        manifest = []
+        new_chunks = 0
+        new_bytes = 0
+        summary = RecordingSummary()
+        try:
+            for chunk in self.split(events):
+                summary.add_chunk(chunk)
+                digest, data, start_ts = self._serialize_chunk(chunk)
+                with self.lock:
+                    # Counting the reference right away keeps a concurrent delete from removing the chunk.
+                    manifest.append([digest, start_ts])
+                    self.refcounts[digest] = self.refcounts.get(digest, 0) + 1
+                    if digest in self.chunk_sizes and os.path.exists(self._chunk_path(digest)):
+                        continue
+                    codec = self.codec if self.codec in CHUNK_CODECS else 'none'
+                compress = CHUNK_CODECS[codec][0]
+                stored = compress(data) if compress else data
+                path = self._chunk_path(digest, codec)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(stored)
+                with self.lock:
+                    self.chunk_sizes[digest] = [len(chunk), len(data), len(stored), codec]
+                new_chunks += 1
+                new_bytes += len(stored)
+        except BaseException:
+            with self.lock:
+                self._release(manifest)
+            raise
+        with self.lock:
+            old_manifest = self.recordings.get(name, [])
+            self.recordings[name] = manifest
+            self._release(old_manifest)
+            self.metadata[name] = summary.metadata(self.metadata.get(name))
+            self._save_index()
+        return new_chunks, new_bytes
+
+    def link(self, name, view):
+        # Saves a stored recording under another name by referencing its chunks: nothing is decoded or written
+        # except the index. The view may be of a recording deleted since, as long as its chunks are still held.
+        with self.lock:
+            manifest = [[digest, start_ts] for digest, start_ts in view.manifest]
+            missing = [digest for digest, _ in manifest if digest not in self.chunk_sizes]
+            if missing: raise KeyError(f"chunk {missing[0][:12]} is no longer stored")
+            for digest, _ in manifest:
+                self.refcounts[digest] = self.refcounts.get(digest, 0) + 1
+            if self.recordings.get(view.name) == manifest and view.name in self.metadata:
+                source = self.metadata[view.name]
+                info = {'events': source['events'], 'types': dict(source['types']), 'duration': source['duration']}
+            else:
+                summary = RecordingSummary()
+                summary.add_events(view)
+                info = summary.metadata()
+            old_manifest = self.recordings.get(name, [])
+            self.recordings[name] = manifest
+            self._release(old_manifest)
+            info.update(modified=time.time(), tags=self.metadata.get(name, {}).get('tags', []),
+                        last_played=self.metadata.get(name, {}).get('last_played'))
+            self.metadata[name] = info
+            self._save_index()
+
+    def delete(self, name):
+        self._check_writable()
+        with self.lock:
+            manifest = self.recordings.pop(name, None)
+            if manifest is None: return 0
+            self.metadata.pop(name, None)
+            freed = self._release(manifest)
+            self._save_index()
+            return freed
+
+    def _release(self, manifest):
+        freed = 0
+        for digest, _ in manifest:
+            count = self.refcounts.get(digest, 0) - 1
+            if count > 0:
+                self.refcounts[digest] = count
+                continue
+            self.refcounts.pop(digest, None)
+            if any(digest in digests for digests in self.holds.values()):
+                self.orphans.add(digest)
+                continue
+            freed += self._remove_chunk(digest)
+        return freed
+
+    def _remove_chunk(self, digest):
+        path = self._chunk_path(digest)
+        self.chunk_sizes.pop(digest, None)
+        self.cache.discard(digest)
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    def hold(self, owner, manifest):
+        # Keeps a recording that is in use (the loaded one) readable and cached after it is deleted or saved over.
+        # Its released chunks stay on disk until nothing holds them any more.
+        digests = {digest for digest, _ in manifest}
+        with self.lock:
+            self.holds[owner] = digests
+            self.cache.pin(owner, digests)
+            self._collect_orphans()
+
+    def unhold(self, owner):
+        with self.lock:
+            if self.holds.pop(owner, None) is None: return
+            self.cache.unpin(owner)
+            self._collect_orphans()
+
+    def _collect_orphans(self):
+        if self.damaged is not None: return 0
+        held = set().union(*self.holds.values()) if self.holds else set()
+        freed = 0
+        for digest in [digest for digest in self.orphans if digest not in held]:
+            self.orphans.discard(digest)
+            # Stored again by a later put.
+            if digest in self.refcounts: continue
+            freed += self._remove_chunk(digest)
+        if freed: self._save_index()
+        return freed
+
+    def remove_unreferenced_chunks(self):
+        # Chunks that were still held when the previous session ended.
+        with self.lock:
+            self.orphans.update(digest for digest in self.chunk_sizes if digest not in self.refcounts)
+            return self._collect_orphans()
+
+    def read_chunk(self, digest, start_ts, verify=False):
+        # Verified reads always go to disk; the cache only ever holds chunks as they were first decoded.
+        cached = None if verify else self.cache.get(digest)
+        if cached is not None:
+            return [fields + (start_ts + offset,) for fields, offset in cached]
+        with self.lock:
+            path = self._chunk_path(digest)
+            decompress = CHUNK_CODECS[self._chunk_codec(digest)][1]
+            expected_count = self.chunk_sizes.get(digest, (None,))[0]
+        with open(path, 'rb') as f:
+            data = f.read()
+        # Plain chunks are named by their hash; zlib and lzma check their own data when decompressing.
+        if verify and decompress is None and hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError("checksum mismatch")
+        rows = decompress(data) if decompress else json.loads(data)
+        if verify and expected_count is not None and len(rows) != expected_count:
+            raise ValueError(f"{len(rows)} events, index says {expected_count}")
+        decoded = [(tuple(decode_event_value(v) for v in row[:-1]), row[-1]) for row in rows]
+        if not verify: self.cache.put(digest, decoded)
+        return [fields + (start_ts + offset,) for fields, offset in decoded]
+
+    def view(self, name):
+        with self.lock:
+            manifest = [tuple(entry) for entry in self.recordings[name]]
+            count = sum(self.chunk_sizes.get(digest, (0,))[0] for digest, _ in manifest)
+        return StoredRecording(self, name, manifest, count)
+
+    def get(self, name):
+        return list(self.view(name))
+
+    def backfill_metadata(self):
+        # Stores written before the metadata index existed get it computed once, then it is kept up to date by put().
+        # A recording whose chunks cannot be read is marked corrupt instead of failing the whole library load.
+        missing = [name for name in self.names() if name not in self.metadata]
+        for name in missing:
+            summary = RecordingSummary()
+            try:
+                view = self.view(name)
+                for digest, start_ts in view.manifest:
+                    summary.add_events(self.read_chunk(digest, start_ts))
+                info = summary.metadata()
+            except Exception as e:
+                info = dict(summary.metadata(), corrupt=f"unreadable: {type(e).__name__}: {e}")
+            with self.lock:
+                if name in self.recordings: self.metadata[name] = info
+        if missing:
+            with self.lock:
+                self._save_index()
+        return len(missing)
+
+    def update_metadata(self, name, **fields):
+        with self.lock:
+            if name not in self.recordings: return
+            info = self.metadata.setdefault(name, {})
+            for field, value in fields.items():
+                if value is None: info.pop(field, None)
+                else: info[field] = value
+            self._save_index()
+
+    def stats(self):
+        with self.lock:
+            logical_events = logical_bytes = 0
+            for manifest in self.recordings.values():
+                for digest, _ in manifest:
+                    chunk_events, chunk_bytes = self.chunk_sizes.get(digest, (0, 0))[:2]
+                    logical_events += chunk_events
+                    logical_bytes += chunk_bytes
+            stored_events = sum(size[0] for size in self.chunk_sizes.values())
+            cache = self.cache.stats()
+            stored_bytes = sum(size[1] for size in self.chunk_sizes.values())
+            disk_bytes = sum(size[2] if len(size) > 2 else size[1] for size in self.chunk_sizes.values())
+            return {'recordings': len(self.recordings), 'unique_chunks': len(self.chunk_sizes),
+                    'logical_events': logical_events, 'stored_events': stored_events,
+                    'logical_bytes': logical_bytes, 'stored_bytes': stored_bytes, 'disk_bytes': disk_bytes,
+                    'dedup_ratio': round(logical_bytes / stored_bytes, 2) if stored_bytes else 1.0,
+                    'compression_ratio': round(stored_bytes / disk_bytes, 2) if disk_bytes else 1.0, 'cache': cache}
+
+
+# Interchange formats for import/export: one file per recording, written and read one event at a time.
+# Keys and buttons are written as {"__key__": name} / {"__button__": name}, the same as in the chunk store.
+EXCHANGE_FORMATS = {'jsonl': '.jsonl', 'csv': '.csv', 'binary': '.mkrb'}
+EXCHANGE_BINARY_MAGIC = b'MKRB\x01'
+EXCHANGE_CSV_COLUMNS = ['type', 'x', 'y', 'fields', 'ts']
+
+
+_exchange_encoder = None
+
+
+def _encode_exchange_value(value):
+    encoded = encode_event_value(value)
+    if encoded is value: raise TypeError(f"cannot export value {value!r}")
+    return encoded
+
+
+def _encode_fields(values):
+    # One shared encoder; only keys and buttons fall back to the per-value hook.
+    global _exchange_encoder
+    if _exchange_encoder is None:
+        _exchange_encoder = json.JSONEncoder(separators=(',', ':'), default=_encode_exchange_value)
+    return _exchange_encoder.encode(values)
+
+
+def _decode_fields(text):
+    return tuple(decode_event_value(v) for v in json.loads(text))
+
+
+def write_events_jsonl(events, f):
+    count = 0
+    for event in events:
+        f.write(_encode_fields(event))
+        f.write('\n')
+        count += 1
+    return count
+
+
+def read_events_jsonl(f):
+    for line in f:
+        if line.strip(): yield _decode_fields(line)
+
+
+def write_events_csv(events, f):
+    # Positions get their own columns so coordinates can be edited or generated in a spreadsheet.
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(EXCHANGE_CSV_COLUMNS)
+    count = 0
+    for event in events:
+        if event[0] in POSITIONAL_EVENTS:
+            writer.writerow([event[0], event[1], event[2], _encode_fields(event[3:-1]), repr(event[-1])])
+        else:
+            writer.writerow([event[0], '', '', _encode_fields(event[1:-1]), repr(event[-1])])
+        count += 1
+    return count
+
+
+def read_events_csv(f):
+    for row in csv.DictReader(f):
+        fields = _decode_fields(row['fields'] or '[]')
+        timestamp = float(row['ts'])
+        if row['x'] != '' or row['y'] != '':
+            yield (row['type'], json.loads(row['x']), json.loads(row['y'])) + fields + (timestamp,)
+        else:
+            yield (row['type'],) + fields + (timestamp,)
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(f):
+    value = shift = 0
+    while True:
+        byte = f.read(1)
+        if not byte: raise ValueError("truncated varint")
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80: return value
+        shift += 7
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def write_events_binary(events, f):
+    # Per event: a tag byte (type index << 2 | raw-timestamp flag << 1 | positional flag), the timestamp as a
+    # microsecond delta (or a raw double when the delta would not restore it bit for bit), zigzag x/y deltas
+    # for positional events, then the other fields as length-prefixed JSON. New type names are defined inline.
+    f.write(EXCHANGE_BINARY_MAGIC)
+    types = {}
+    prev_ts = 0.0
+    prev_x = prev_y = 0
+    count = 0
+    for event in events:
+        out = bytearray()
+        event_type = event[0]
+        if event_type not in types:
+            name = event_type.encode('utf-8')
+            types[event_type] = len(types)
+            out.append(0xFF); _write_varint(out, len(name)); out += name
+        timestamp = event[-1]
+        delta_us = int(round((timestamp - prev_ts) * 1000000))
+        raw_ts = delta_us < 0 or prev_ts + delta_us / 1000000 != timestamp
+        positional = (event_type in POSITIONAL_EVENTS and isinstance(event[1], int) and isinstance(event[2], int)
+                      and not isinstance(event[1], bool) and not isinstance(event[2], bool))
+        out.append(types[event_type] << 2 | raw_ts << 1 | positional)
+        if raw_ts: out += struct.pack('<d', timestamp)
+        else: _write_varint(out, delta_us)
+        prev_ts = timestamp
+        if positional:
+            _write_varint(out, _zigzag(event[1] - prev_x)); _write_varint(out, _zigzag(event[2] - prev_y))
+            prev_x, prev_y = event[1], event[2]
+            rest = event[3:-1]
+        else:
+            rest = event[1:-1]
+        payload = _encode_fields(rest).encode('utf-8') if rest else b''
+        _write_varint(out, len(payload)); out += payload
+        f.write(out)
+        count += 1
+    return count
+
+
+def read_events_binary(f):
+    if f.read(len(EXCHANGE_BINARY_MAGIC)) != EXCHANGE_BINARY_MAGIC:
+        raise ValueError("not a recording dump (bad header)")
+    types = []
+    prev_ts = 0.0
+    prev_x = prev_y = 0
+    while True:
+        tag = f.read(1)
+        if not tag: return
+        tag = tag[0]
+        while tag == 0xFF:
+            types.append(f.read(_read_varint(f)).decode('utf-8'))
+            tag = f.read(1)
+            if not tag: raise ValueError("truncated type definition")
+            tag = tag[0]
+        event_type = types[tag >> 2]
+        if tag & 2: timestamp = struct.unpack('<d', f.read(8))[0]
+        else: timestamp = prev_ts + _read_varint(f) / 1000000
+        prev_ts = timestamp
+        head = (event_type,)
+        if tag & 1:
+            prev_x += _unzigzag(_read_varint(f)); prev_y += _unzigzag(_read_varint(f))
+            head = (event_type, prev_x, prev_y)
+        size = _read_varint(f)
+        payload = f.read(size)
+        if len(payload) != size: raise ValueError("truncated event")
+        yield head + (_decode_fields(payload.decode('utf-8')) if size else ()) + (timestamp,)
+
+
+# format -> (writer, reader, binary file)
+EXCHANGE_CODECS = {
+    'jsonl': (write_events_jsonl, read_events_jsonl, False),
+    'csv': (write_events_csv, read_events_csv, False),
+    'binary': (write_events_binary, read_events_binary, True),
+}
+
+
+def exchange_file_name(name, fmt):
+    # Percent-encodes what file systems reject, so the recording name comes back exactly on import.
+    return urllib_parse.quote(name, safe=" -_.,()[]'+=!@#$&") + EXCHANGE_FORMATS[fmt]
+
+
+def exchange_format_of(path):
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, fmt_extension in EXCHANGE_FORMATS.items():
+        if extension == fmt_extension: return fmt
+    return None
+
+
+def recording_name_from_path(path):
+    return urllib_parse.unquote(os.path.splitext(os.path.basename(path))[0])
+
+
+def export_events(events, path, fmt):
+    writer, _, binary = EXCHANGE_CODECS[fmt]
+    tmp_path = path + '.tmp'
+    with (open(tmp_path, 'wb') if binary else open(tmp_path, 'w', encoding='utf-8', newline='')) as f:
+        count = writer(events, f)
+    os.replace(tmp_path, path)
+    return count
+
+
+def iter_exchange_file(path):
+    fmt = exchange_format_of(path)
+    if fmt is None: raise ValueError(f"unknown file type '{os.path.splitext(path)[1]}'")
+    _, reader, binary = EXCHANGE_CODECS[fmt]
+    with (open(path, 'rb') if binary else open(path, 'r', encoding='utf-8', newline='')) as f:
+        yield from reader(f)
+
+
+def _shifted(events, offset):
+    for event in events:
+        yield tuple(event[:-1]) + (event[-1] + offset,)
+
+
+def concat_recordings(recordings, gap=0.5):
+    # Plays each recording after the previous one, gap seconds after its last event.
+    next_start = None
+    for events in recordings:
+        offset = None
+        last_ts = None
+        for event in events:
+            if offset is None:
+                offset = 0.0 if next_start is None else next_start - event[-1]
+            last_ts = event[-1] + offset
+            yield tuple(event[:-1]) + (last_ts,)
+        if last_ts is not None:
+            next_start = last_ts + gap
+
+
+def splice_recording(base, insert, at_seconds, gap=0.5):
+    # Inserts a recording at_seconds into base; the rest of base is pushed back by the inserted length plus gap.
+    base_iter = iter(base)
+    first = next(base_iter, None)
+    if first is None:
+        yield from insert
+        return
+    cut_ts = first[-1] + at_seconds
+    event = first
+    while event is not None and event[-1] < cut_ts:
+        yield tuple(event)
+        event = next(base_iter, None)
+    inserted_end = None
+    offset = None
+    for inserted in insert:
+        if offset is None: offset = cut_ts - inserted[-1]
+        inserted_end = inserted[-1] + offset
+        yield tuple(inserted[:-1]) + (inserted_end,)
+    if event is None: return
+    shift = 0.0 if inserted_end is None else inserted_end + gap - event[-1]
+    yield tuple(event[:-1]) + (event[-1] + shift,)
+    yield from _shifted(base_iter, shift)
+
+
+def interleave_recordings(recordings):
+    # Timestamp-ordered heap merge; every recording is aligned to start at the same moment as the first one.
+    streams = []
+    start = None
+    for events in recordings:
+        events_iter = iter(events)
+        first = next(events_iter, None)
+        if first is None: continue
+        if start is None: start = first[-1]
+        offset = start - first[-1]
+        streams.append(_shifted(_chain_first(first, events_iter), offset))
+    yield from heapq.merge(*streams, key=lambda event: event[-1])
+
+
+def _chain_first(first, rest):
+    yield first
+    yield from rest
+
+
+class StoredRecording:
+    # Read-only view of a saved recording. Iterating decodes one chunk at a time just ahead of the
+    # consumer, so playing a large recording never holds more than a chunk of it in memory.
+    def __init__(self, store, name, manifest, count):
+        self.store = store
+        self.name = name
+        self.manifest = manifest
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        for digest, start_ts in self.manifest:
+            yield from self.store.read_chunk(digest, start_ts)
+
+
+class RecordingSummary:
+    # Accumulates the library metadata for a recording while it is written, so listing the library never decodes events.
+    def __init__(self):
+        self.events = 0
+        self.types = {}
+        self.first_ts = None
+        self.last_ts = None
+
+    def add_chunk(self, chunk):
+        for encoded, timestamp in chunk:
+            self._add(encoded[0], timestamp)
+
+    def add_events(self, events):
+        for event in events:
+            self._add(event[0], event[-1])
+
+    def _add(self, event_type, timestamp):
+        self.events += 1
+        self.types[event_type] = self.types.get(event_type, 0) + 1
+        if self.first_ts is None: self.first_ts = timestamp
+        self.last_ts = timestamp
+
+    def metadata(self, previous=None):
+        previous = previous or {}
+        return {'events': self.events, 'types': self.types,
+                'duration': round(self.last_ts - self.first_ts, 3) if self.events else 0.0,
+                'modified': time.time(), 'tags': previous.get('tags', []), 'last_played': previous.get('last_played')}
+
+
+class LibrarySearch:
+    # Filters recording names (and tags) by every whitespace-separated term of the query. Typing more of a query
+    # only narrows the previous results, so incremental search touches fewer entries with each key stroke.
+    def __init__(self):
+        self.entries = []
+        self._last_query = None
+        self._last_results = []
+
+    def rebuild(self, metadata):
+        entries = []
+        for name, info in metadata.items():
+            tags = ' '.join(info.get('tags', ()))
+            entries.append((name.lower(), name, f"{name} {tags}".lower()))
+        entries.sort()
+        self.entries = entries
+        self._last_query = None
+        self._last_results = []
+
+    def names(self):
+        return [entry[1] for entry in self.entries]
+
+    def search(self, query):
+        query = query.strip().lower()
+        if not query:
+            return self.names()
+        if self._last_query and query.startswith(self._last_query):
+            candidates = self._last_results
+        else:
+            candidates = self.entries
+        terms = query.split()
+        matches = [entry for entry in candidates if all(term in entry[2] for term in terms)]
+        self._last_query = query
+        self._last_results = matches
+        # Names starting with the first term come first; otherwise keep alphabetical order.
+        return [entry[1] for entry in sorted(matches, key=lambda entry: not entry[0].startswith(terms[0]))]
+
+
+def format_type_counts(types):
+    return ' '.join(f"{event_type.replace('mouse_', '')}:{count}"
+                    for event_type, count in sorted(types.items(), key=lambda item: -item[1]))
+
+
+class VirtualListView:
+    # Canvas-backed list that only draws the rows currently in view: a fixed pool of row items is re-labelled
+    # as it scrolls, so the cost of a redraw does not depend on how many rows there are.
+    ROW_HEIGHT = 18
+
+    def __init__(self, parent, format_row, visible_rows=15, width=720, on_select=None, on_activate=None):
+        self.format_row = format_row
+        self.on_select = on_select
+        self.on_activate = on_activate
+        self.count = 0
+        self.top = 0
+        self.selected = None
+        self.visible_rows = visible_rows
+        self.frame = ttk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, width=width, height=visible_rows * self.ROW_HEIGHT, bg=TEXT_INPUT_BG,
+                                highlightthickness=1, highlightbackground=BORDER_COLOR, borderwidth=0)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.rows = []
+        for idx in range(visible_rows):
+            y = idx * self.ROW_HEIGHT
+            background = self.canvas.create_rectangle(0, y, width * 4, y + self.ROW_HEIGHT, fill=TEXT_INPUT_BG, width=0)
+            text = self.canvas.create_text(4, y + self.ROW_HEIGHT // 2, anchor='w', fill=FOREGROUND_TEXT, font=('Consolas', 9))
+            self.rows.append((background, text))
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Double-Button-1>", self._on_double_click)
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll(-1))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll(1))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_count(self, count):
+        self.count = count
+        self.selected = None
+        self.top = max(0, min(self.top, count - self.visible_rows))
+        self.render()
+
+    def scroll(self, rows):
+        self.top = max(0, min(self.top + rows, self.count - self.visible_rows))
+        self.render()
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * self.count)
+            self.scroll(0)
+        elif args[0] == 'scroll':
+            self.scroll(int(args[1]) * (self.visible_rows if args[2] == 'pages' else 1))
+
+    def render(self):
+        for offset, (background, text) in enumerate(self.rows):
+            idx = self.top + offset
+            if idx < self.count:
+                selected = idx == self.selected
+                self.canvas.itemconfig(text, text=self.format_row(idx), fill=HIGHLIGHT_FG if selected else FOREGROUND_TEXT)
+                self.canvas.itemconfig(background, fill=HIGHLIGHT_BG if selected else TEXT_INPUT_BG)
+            else:
+                self.canvas.itemconfig(text, text="")
+                self.canvas.itemconfig(background, fill=TEXT_INPUT_BG)
+        if self.count:
+            self.scrollbar.set(self.top / self.count, min(1.0, (self.top + self.visible_rows) / self.count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _row_at(self, event):
+        idx = self.top + int(event.y // self.ROW_HEIGHT)
+        return idx if 0 <= idx < self.count else None
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        idx = self._row_at(event)
+        if idx is None: return
+        self.selected = idx
+        self.render()
+        if self.on_select: self.on_select(idx)
+
+    def _on_double_click(self, event):
+        idx = self._row_at(event)
+        if idx is not None and self.on_activate: self.on_activate(idx)
+
+
+class CaptureRingBuffer:
+    # The most recent input events in a fixed, preallocated ring, so memory stays bounded however long it runs.
+    # Appending is a counter step and a slot store without a lock: next() on itertools.count is atomic under the
+    # GIL, so the mouse and keyboard listener threads can both append. Snapshots sort by timestamp.
+    def __init__(self, max_events, window_seconds):
+        self.capacity = max(1, int(max_events))
+        self.window_seconds = window_seconds
+        self.slots = [None] * self.capacity
+        self._sequence = itertools.count()
+
+    def append(self, event):
+        self.slots[next(self._sequence) % self.capacity] = event
+
+    def snapshot(self, start_ago=None, end_ago=0.0, now=None):
+        # Events from start_ago to end_ago seconds before now, limited to the buffer's window.
+        now = time.time() if now is None else now
+        oldest = now - (self.window_seconds if start_ago is None else min(start_ago, self.window_seconds))
+        newest = now - end_ago
+        events = [event for event in self.slots if event is not None and oldest <= event[-1] <= newest]
+        events.sort(key=lambda event: event[-1])
+        return events
+
+    def span(self, now=None):
+        # (events held, seconds covered) within the window.
+        events = self.snapshot(now=now)
+        if not events: return 0, 0.0
+        return len(events), (time.time() if now is None else now) - events[0][-1]
+
+
+class IntervalTrigger:
+    # Fires every `seconds`, aligned to multiples of the interval (every 15m runs at :00, :15, :30, :45).
+    def __init__(self, seconds):
+        if seconds <= 0: raise ValueError("Interval must be positive.")
+        self.seconds = seconds
+
+    def next_after(self, timestamp):
+        return (int(timestamp // self.seconds) + 1) * self.seconds
+
+
+class CronTrigger:
+    # Standard five-field cron expression: minute hour day-of-month month day-of-week (0 or 7 = Sunday).
+    # Each field accepts *, numbers, ranges, lists and /steps.
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5: raise ValueError(f"Cron expression needs 5 fields, got {len(parts)}: '{expression}'")
+        fields = [self._parse_field(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    @staticmethod
+    def _parse_field(text, low, high):
+        values = set()
+        for item in text.split(','):
+            step = 1
+            if '/' in item:
+                item, step_text = item.split('/', 1)
+                step = int(step_text)
+                if step <= 0: raise ValueError(f"Bad step in '{text}'")
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start, end = (int(value) for value in item.split('-', 1))
+            else:
+                start = int(item)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end: raise ValueError(f"'{text}' is outside {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if not self.any_day and not self.any_weekday: return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, timestamp):
+        # Skips whole months, days and hours that cannot match instead of testing every minute.
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(10000):
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError("Cron expression never matches.")
+
+
+def parse_trigger(text):
+    # "every 15m" / "every 30s" / "every 2h", "daily 02:00", or a five-field cron expression.
+    text = text.strip().lower()
+    if text.startswith('every '):
+        amount = text[6:].strip()
+        units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+        if amount and amount[-1] in units:
+            return IntervalTrigger(float(amount[:-1]) * units[amount[-1]])
+        return IntervalTrigger(float(amount) * 60)
+    if text.startswith('daily '):
+        hour, minute = text[6:].strip().split(':')
+        return CronTrigger(f"{int(minute)} {int(hour)} * * *")
+    return CronTrigger(text)
+
+
+JOB_POLICIES = ('skip', 'queue', 'preempt')
+
+
+class JobScheduler:
+    # Holds the next run time of every job in a heap and sleeps until the earliest is due, so hundreds of idle
+    # jobs cost one sleeping thread. Waits are capped at a minute so clock changes and sleep/resume are noticed.
+    MAX_WAIT = 60.0
+
+    def __init__(self, on_due):
+        self.on_due = on_due
+        self.heap = []
+        self.triggers = {}
+        self.next_runs = {}
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self._sequence = itertools.count()
+
+    def set_jobs(self, jobs, now=None):
+        # jobs: {name: trigger}. Rebuilds the heap; invalid triggers are the caller's to report.
+        now = time.time() if now is None else now
+        with self.condition:
+            self.triggers = dict(jobs)
+            self.next_runs = {name: trigger.next_after(now) for name, trigger in self.triggers.items()}
+            self.heap = [(due, next(self._sequence), name) for name, due in self.next_runs.items()]
+            heapq.heapify(self.heap)
+            self.condition.notify()
+
+    def next_run(self, name):
+        return self.next_runs.get(name)
+
+    def pop_due(self, now):
+        # Returns the names due at `now` and schedules their next runs. Missed runs are not replayed.
+        due_names = []
+        while self.heap and self.heap[0][0] <= now:
+            due, _, name = heapq.heappop(self.heap)
+            if self.next_runs.get(name) != due: continue
+            due_names.append(name)
+            next_due = self.triggers[name].next_after(now)
+            self.next_runs[name] = next_due
+            heapq.heappush(self.heap, (next_due, next(self._sequence), name))
+        return due_names
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="job-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if not self.running: return
+                now = time.time()
+                due_names = self.pop_due(now)
+                if not due_names:
+                    timeout = self.MAX_WAIT if not self.heap else min(self.MAX_WAIT, self.heap[0][0] - now)
+                    self.condition.wait(timeout=max(0.0, timeout))
+                    continue
+            for name in due_names:
+                self.on_due(name)
+
+
+GENERAL_SETTINGS = ('replay_with_original', 'loop', 'loop_count', 'record_movement', 'auto_click_interval', 'playback_speed',
+                    'inter_playback_delay', 'inter_playback_delay_seconds', 'show_edit_clicks', 'cap_gaps', 'max_gap_seconds',
+                    'max_throughput', 'async_engine', 'coord_transform', 'recording_compression', 'typing_cps',
+                    'key_hold_repeat', 'capture_buffer')
+Settings = namedtuple('Settings', GENERAL_SETTINGS + ('control_server', 'control_server_port', 'control_server_socket',
+                                                      'metrics_snapshot', 'metrics_snapshot_interval', 'transform', 'pipeline',
+                                                      'screen_source', 'screen_file', 'checkpoint_timeout',
+                                                      'capture_minutes', 'capture_max_events', 'decoded_cache_mb', 'keybinds'))
+DEFAULT_SETTINGS = Settings(replay_with_original=True, loop=False, loop_count=1, record_movement=False, auto_click_interval=1.0,
+                            playback_speed=1.0, inter_playback_delay=False, inter_playback_delay_seconds=1.0, show_edit_clicks=True,
+                            cap_gaps=False, max_gap_seconds=2.0, max_throughput=False, async_engine=False, coord_transform=False,
+                            recording_compression='none', typing_cps=0.0, key_hold_repeat='os', capture_buffer=False,
+                            control_server=False, control_server_port=8765, control_server_socket="",
+                            metrics_snapshot=False, metrics_snapshot_interval=10.0, transform=IDENTITY_TRANSFORM,
+                            pipeline=DEFAULT_PIPELINE, screen_source='auto', screen_file='', checkpoint_timeout=10.0,
+                            capture_minutes=5.0, capture_max_events=200000, decoded_cache_mb=DECODED_CACHE_MB, keybinds=())
+
+
+def freeze_keybinds():
+    return tuple((action, tuple(sorted(combo))) for action, combo in keybinds.items())
+
+
+class SettingsService:
+    # Holds an immutable Settings snapshot for worker threads and writes it to disk on a debounced timer.
+    def __init__(self, initial, writer, debounce=1.0):
+        self.current = initial
+        self.writer = writer
+        self.debounce = debounce
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.save_due = None
+        self.thread = threading.Thread(target=self._run, name="settings-writer", daemon=True)
+        self.thread.start()
+
+    def update(self, **changes):
+        with self.condition:
+            snapshot = self.current._replace(**changes)
+            if snapshot == self.current:
+                return False
+            self.current = snapshot
+            if self.save_due is not None:
+                metrics.inc('settings.coalesced_saves')
+            self.save_due = time.monotonic() + self.debounce
+            self.condition.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.save_due is None:
+                    self.condition.wait()
+                remaining = self.save_due - time.monotonic()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+            self.flush()
+
+    def flush(self, timeout=-1):
+        if not self.write_lock.acquire(timeout=timeout):
+            return False
+        try:
+            with self.condition:
+                pending = self.save_due is not None
+                self.save_due = None
+                snapshot = self.current
+            if pending:
+                self.writer(snapshot)
+                metrics.inc('settings.writes')
+            return True
+        finally:
+            self.write_lock.release()
+
+
+class AsyncEngine:
+    # One asyncio loop that runs playback, auto-click and scheduled tasks; controller calls go to a single executor thread.
+    SPIN_THRESHOLD = 0.002
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.controller_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="controller")
+        self.tasks = {}
+        self.thread = threading.Thread(target=self._run, name="async-engine", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def spawn(self, name, coro):
+        future = asyncio.run_coroutine_threadsafe(self._track(name, coro), self.loop)
+        return future
+
+    async def _track(self, name, coro):
+        task = asyncio.ensure_future(coro)
+        self.tasks[name] = task
+        try:
+            return await task
+        finally:
+            if self.tasks.get(name) is task:
+                del self.tasks[name]
+
+    def cancel(self, name):
+        def cancel_task():
+            task = self.tasks.get(name)
+            if task is not None: task.cancel()
+        self.loop.call_soon_threadsafe(cancel_task)
+
+    async def sleep(self, seconds):
+        # Coarse asyncio sleep, then yield-spin for the last couple of milliseconds for precise deadlines.
+        deadline = self.loop.time() + seconds
+        if seconds > self.SPIN_THRESHOLD:
+            await asyncio.sleep(seconds - self.SPIN_THRESHOLD)
+        while self.loop.time() < deadline:
+            await asyncio.sleep(0)
+
+    async def call(self, func, *args):
+        return await self.loop.run_in_executor(self.controller_executor, func, *args)
+
+    def shutdown(self):
+        for name in list(self.tasks.keys()): self.cancel(name)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.controller_executor.shutdown(wait=False)
+
+
+class ControlServer:
+    # JSON-lines control protocol. Requests: {"cmd": "play"|"stop"|"status"|"list"|"load"|"subscribe", "id": ..., "name": ...}
+    UI_TIMEOUT = 10.0
+
+    def __init__(self, app, host='127.0.0.1', port=8765, unix_path=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.subscribers = set()
+        self.writers = set()
+        self.client_count = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="control-server", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+
+    def address(self):
+        return self.unix_path if self.unix_path else f"{self.host}:{self.port}"
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            self.app.log_to_bug_report(f"ERROR - Control server stopped: {e}\n{traceback.format_exc()}")
+            self.app.log_message(f"Control server error: {e}")
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        if self.unix_path and hasattr(asyncio, 'start_unix_server'):
+            if os.path.exists(self.unix_path): os.remove(self.unix_path)
+            self.server = await asyncio.start_unix_server(self._handle_client, path=self.unix_path)
+        else:
+            self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.app.log_to_bug_report(f"INFO - Control server listening on {self.address()}.")
+        async with self.server:
+            try:
+                await self.server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+        self.app.log_to_bug_report("INFO - Control server stopped.")
+
+    async def _shutdown(self):
+        # Closing the listener leaves accepted connections open, so every client is disconnected here too.
+        if self.server is not None:
+            self.server.close()
+        for queue in list(self.subscribers):
+            queue.put_nowait(None)
+        for writer in list(self.writers):
+            writer.close()
+        if self.server is not None:
+            await self.server.wait_closed()
+
+    def has_subscribers(self):
+        return bool(self.subscribers)
+
+    def publish(self, message):
+        # Called from any thread; fans the message out to subscribed clients on the server loop.
+        if self.loop is None or not self.subscribers: return
+        message = dict(message, time=time.time())
+        self.loop.call_soon_threadsafe(self._fan_out, message)
+
+    def _fan_out(self, message):
+        depth = 0
+        for queue in list(self.subscribers):
+            if queue.qsize() < 1000:
+                queue.put_nowait(message)
+            else:
+                metrics.inc('control_server.dropped_events')
+            depth = max(depth, queue.qsize())
+        metrics.set_gauge('control_server.max_queue_depth', depth)
+
+    async def _run_on_ui(self, func):
+        future = self.loop.create_future()
+        def wrapper():
+            try: result = func()
+            except Exception as e: self.loop.call_soon_threadsafe(lambda e=e: future.done() or future.set_exception(e))
+            else: self.loop.call_soon_threadsafe(lambda: future.done() or future.set_result(result))
+        self.app.root.after(0, wrapper)
+        # A blocked or closing UI must not leave the client waiting forever.
+        try:
+            return await asyncio.wait_for(future, self.UI_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"the UI did not respond within {self.UI_TIMEOUT:g}s") from None
+
+    async def _handle_client(self, reader, writer):
+        peer = writer.get_extra_info('peername') or self.address()
+        source = f"Control client {peer}"
+        self.client_count += 1
+        self.writers.add(writer)
+        queue = None
+        write_lock = asyncio.Lock()
+        sender = None
+
+        async def send(obj):
+            async with write_lock:
+                writer.write((json.dumps(obj) + "\n").encode('utf-8'))
+                await writer.drain()
+
+        async def pump_events(event_queue):
+            while True:
+                message = await event_queue.get()
+                if message is None: break
+                await send(message)
+
+        self.app.log_to_bug_report(f"INFO - {source} connected.")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict): raise ValueError("request must be a JSON object")
+                except ValueError as e:
+                    await send({'ok': False, 'error': f"invalid request: {e}"})
+                    continue
+                cmd = request.get('cmd')
+                response = {'id': request.get('id'), 'cmd': cmd}
+                try:
+                    if cmd == 'subscribe':
+                        if queue is None:
+                            queue = asyncio.Queue()
+                            self.subscribers.add(queue)
+                            sender = asyncio.ensure_future(pump_events(queue))
+                        response.update(ok=True)
+                    else:
+                        response.update(await self._execute(cmd, request, source))
+                except Exception as e:
+                    self.app.log_to_bug_report(f"ERROR - {source} command '{cmd}' failed: {e}\n{traceback.format_exc()}")
+                    response.update(ok=False, error=str(e))
+                await send(response)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if queue is not None:
+                self.subscribers.discard(queue)
+                queue.put_nowait(None)
+            if sender is not None:
+                sender.cancel()
+            self.client_count -= 1
+            self.writers.discard(writer)
+            writer.close()
+            self.app.log_to_bug_report(f"INFO - {source} disconnected.")
+
+    async def _execute(self, cmd, request, source):
+        app = self.app
+        if cmd == 'status':
+            return dict(ok=True, **app.get_control_status())
+        if cmd == 'list':
+            # saved_recordings belongs to the UI thread; it is read there like everything else the commands touch.
+            return {'ok': True, 'recordings': await self._run_on_ui(lambda: sorted(app.saved_recordings.keys()))}
+        if cmd == 'metrics':
+            return {'ok': True, 'metrics': app.collect_metrics()}
+        if cmd == 'load':
+            name = request.get('name')
+            if name not in app.saved_recordings: return {'ok': False, 'error': f"recording '{name}' not found"}
+            def load():
+                app.selected_recording_var.set(name)
+                app.handle_action("load_selected_recording", source)
+                return app.loaded_recording_name == name
+            return {'ok': await self._run_on_ui(load), 'name': name}
+        if cmd == 'play':
+            name = request.get('name')
+            if name is not None and name not in app.saved_recordings: return {'ok': False, 'error': f"recording '{name}' not found"}
+            received = time.perf_counter()
+            def play():
+                if app.playing_back: return False, "already playing"
+                if name is not None:
+                    app.selected_recording_var.set(name)
+                    app.handle_action("load_selected_recording", source)
+                app.pending_command_time = received
+                app.handle_action("toggle_playback", source)
+                if not app.playing_back:
+                    app.pending_command_time = None
+                    return False, "playback could not start"
+                return True, None
+            started, error = await self._run_on_ui(play)
+            return {'ok': True} if started else {'ok': False, 'error': error}
+        if cmd == 'stop':
+            def stop():
+                if not app.playing_back: return False
+                app.handle_action("toggle_playback", source)
+                return True
+            return {'ok': True, 'stopped': await self._run_on_ui(stop)}
+        return {'ok': False, 'error': f"unknown command '{cmd}'"}
+
+
 class RecorderApp:
     WINDOW_WIDTH = 455
     KEYBIND_FRAME_REMOVED_HEIGHT = 30
@@ -75,19 +2745,49 @@ class RecorderApp:
     _original_MACROS_SECTION_HEIGHT = 55 # Kept for consistent BASE_WINDOW_HEIGHT calculation if needed, though macros are out
     BASE_WINDOW_HEIGHT = MAX_CONTENT_HEIGHT - _original_MACROS_SECTION_HEIGHT - EDIT_CLICKS_SECTION_HEIGHT
 
+    SETTINGS_VARS = (('replay_with_original', 'replay_with_original', bool), ('loop', 'loop_var', bool),
+                     ('loop_count', 'loop_count_var', int), ('record_movement', 'move_var', bool),
+                     ('auto_click_interval', 'auto_click_interval_var', float), ('playback_speed', 'playback_speed_var', float),
+                     ('inter_playback_delay', 'inter_playback_delay_var', bool),
+                     ('inter_playback_delay_seconds', 'inter_playback_delay_seconds_var', float),
+                     ('show_edit_clicks', 'show_edit_clicks_var', bool), ('cap_gaps', 'cap_gaps_var', bool),
+                     ('max_gap_seconds', 'max_gap_seconds_var', float), ('max_throughput', 'max_throughput_var', bool),
+                     ('async_engine', 'async_engine_var', bool), ('control_server', 'control_server_var', bool),
+                     ('metrics_snapshot', 'metrics_snapshot_var', bool), ('coord_transform', 'coord_transform_var', bool),
+                     ('recording_compression', 'recording_compression_var', str), ('typing_cps', 'typing_cps_var', float),
+                     ('key_hold_repeat', 'key_hold_repeat_var', str), ('capture_buffer', 'capture_buffer_var', bool),
+                     ('decoded_cache_mb', 'decoded_cache_var', float))
+
 
     def __init__(self, root):
         self.root = root
         self.bug_report_file_path = BUGREPORT_FILE
+        self.bug_report_lock = threading.Lock()
+        self.bug_report_handle = None
+        self.startup_marks = {'imports': IMPORTS_DONE - STARTUP_T0}
+        self.flight_recorder = None
+        self.previous_session_summary = self._recover_previous_session()
 
         try:
+            if os.path.exists(self.bug_report_file_path):
+                os.replace(self.bug_report_file_path, os.path.splitext(self.bug_report_file_path)[0] + '.prev.txt')
             with open(self.bug_report_file_path, 'w', encoding='utf-8') as f:
                 f.write(f"Bug report log session started at {datetime.now().strftime('%Y-%m-%d %I:%M:%S%p')}\n")
                 f.write("=" * 70 + "\n")
+            # Kept open in append mode (line buffered) so each log line is one write instead of an open/close.
+            self.bug_report_handle = open(self.bug_report_file_path, 'a', encoding='utf-8', buffering=1)
         except Exception as e:
             print(f"CRITICAL: Could not initialize bug report file '{self.bug_report_file_path}': {e}")
+        try:
+            recorder = FlightRecorder(FLIGHT_RECORDER_FILE)
+            recorder.open()
+            self.flight_recorder = recorder
+        except Exception as e:
+            print(f"WARNING: Flight recorder unavailable: {e}")
 
         self.log_to_bug_report("INFO - Application initializing...")
+        if self.previous_session_summary:
+            self.log_to_bug_report(f"INFO - {self.previous_session_summary}")
 
 
         self.replay_with_original = tk.IntVar(value=1)
@@ -98,6 +2798,34 @@ class RecorderApp:
         self.move_var = tk.IntVar(value=0)
         self.inter_playback_delay_var = tk.IntVar(value=0)
         self.inter_playback_delay_seconds_var = tk.StringVar(value="1.0")
+        self.cap_gaps_var = tk.IntVar(value=0)
+        self.max_gap_seconds_var = tk.StringVar(value="2.0")
+        self.max_throughput_var = tk.IntVar(value=0)
+        self.control_server_var = tk.IntVar(value=0)
+        self.control_server_port = 8765
+        self.control_server_socket = ""
+        self.metrics_snapshot_var = tk.IntVar(value=0)
+        self.metrics_snapshot_interval = 10.0
+        self.profiler_var = tk.IntVar(value=0)
+        self.profiler = None
+        self.async_engine_var = tk.IntVar(value=0)
+        self.coord_transform_var = tk.IntVar(value=0)
+        self.recording_compression_var = tk.StringVar(value='none')
+        self.typing_cps_var = tk.StringVar(value='0.0')
+        self.key_hold_repeat_var = tk.StringVar(value='os')
+        self.capture_buffer_var = tk.IntVar(value=0)
+        self.capture_minutes = 5.0
+        self.capture_max_events = 200000
+        self.capture_ring = None
+        self.decoded_cache_var = tk.StringVar(value=str(DECODED_CACHE_MB))
+        self.coord_transform = IDENTITY_TRANSFORM
+        self.pipeline_options = DEFAULT_PIPELINE
+        self.screen_source_kind = 'auto'
+        self.screen_file = ''
+        self.checkpoint_timeout = 10.0
+        self.screen_source = None
+        self.checkpoint_corners = None
+        self.screen_bounds = (0, 0, self.root.winfo_screenwidth() - 1, self.root.winfo_screenheight() - 1)
 
         self.listening_for_keybind = None
         self.recording = False
@@ -107,6 +2835,15 @@ class RecorderApp:
         self.listener_mouse = None
         self.listener_keyboard = None
         self.playback_thread = None
+        self.last_playback_events_per_second = None
+        self.control_server = None
+        self.pending_command_time = None
+        self.last_command_latency_ms = None
+        self.playback_progress = None
+        self.loaded_recording_name = None
+        self._last_metrics_snapshot = 0.0
+        self._last_progress_publish = 0.0
+        self.engine = None
         self.auto_click_thread = None
         self.current_keys = set()
         self.last_log_message = None
@@ -124,7 +2861,10 @@ class RecorderApp:
         self.show_edit_clicks_var = tk.BooleanVar(value=True)
 
         self._load_settings()
-        self._start_robust_exit_listener()
+        self.settings_service = SettingsService(self._read_settings_from_ui(DEFAULT_SETTINGS), self._write_settings)
+        for _, var_name, _ in self.SETTINGS_VARS:
+            getattr(self, var_name).trace_add("write", self._on_setting_var_changed)
+        self.edit_clicks_ui_built = False
 
 
         root.title("Mouse & Keyboard Recorder")
@@ -143,15 +2883,95 @@ class RecorderApp:
 
         options_menu = tk.Menu(menubar, tearoff=0)
         keybind_menu = tk.Menu(options_menu, tearoff=0)
-        keybind_actions = ['record', 'playback', 'exit', 'auto_click']
+        keybind_actions = ['record', 'playback', 'exit', 'auto_click', 'snapshot']
         for action in keybind_actions:
             keybind_menu.add_command(label=action.capitalize(),
                                      command=lambda act=action: self.handle_action("start_listen_keybind",
                                                                                     f"Menu 'Options > Change Keybinds > {act.capitalize()}'",
                                                                                     act))
+        options_menu.add_checkbutton(label="Enable Control Server",
+                                     variable=self.control_server_var,
+                                     command=lambda: self.handle_action("toggle_control_server", "Menu 'Options > Enable Control Server'"))
+        options_menu.add_checkbutton(label="Write Metrics Snapshot",
+                                     variable=self.metrics_snapshot_var,
+                                     command=self._save_settings_on_interaction)
         options_menu.add_cascade(label="Change Keybinds", menu=keybind_menu)
+        options_menu.add_checkbutton(label="Max Throughput (when 'Replay w/ delay' is off)",
+                                     variable=self.max_throughput_var,
+                                     command=self._save_settings_on_interaction)
+        options_menu.add_checkbutton(label="Async Engine",
+                                     variable=self.async_engine_var,
+                                     command=self._save_settings_on_interaction)
+        options_menu.add_checkbutton(label="Apply Coordinate Transform at Playback",
+                                     variable=self.coord_transform_var,
+                                     command=self._save_settings_on_interaction)
+        compression_menu = tk.Menu(options_menu, tearoff=0)
+        for codec, label in (('none', "None (plain JSON)"), ('zlib', "zlib"), ('lzma', "lzma (smallest)")):
+            compression_menu.add_radiobutton(label=label, value=codec, variable=self.recording_compression_var,
+                                             command=self._save_settings_on_interaction)
+        options_menu.add_cascade(label="Recording Compression", menu=compression_menu)
+        typing_menu = tk.Menu(options_menu, tearoff=0)
+        for cps, label in ((0.0, "Recorded timing"), (10.0, "10 chars/s"), (25.0, "25 chars/s"), (50.0, "50 chars/s"), (200.0, "200 chars/s")):
+            typing_menu.add_radiobutton(label=label, value=str(cps), variable=self.typing_cps_var,
+                                        command=self._save_settings_on_interaction)
+        options_menu.add_cascade(label="Typed Text Speed", menu=typing_menu)
+        hold_menu = tk.Menu(options_menu, tearoff=0)
+        for mode, label in (('os', "Hold only (system repeats)"), ('recorded', "Repeat at recorded rate"),
+                            ('15', "Repeat 15/s"), ('30', "Repeat 30/s")):
+            hold_menu.add_radiobutton(label=label, value=mode, variable=self.key_hold_repeat_var,
+                                      command=self._save_settings_on_interaction)
+        options_menu.add_cascade(label="Held Keys at Playback", menu=hold_menu)
+        cache_menu = tk.Menu(options_menu, tearoff=0)
+        for size_mb in (16.0, 64.0, 256.0, 1024.0):
+            cache_menu.add_radiobutton(label=f"{size_mb:g} MB", value=str(size_mb), variable=self.decoded_cache_var,
+                                       command=self._save_settings_on_interaction)
+        options_menu.add_cascade(label="Decoded Cache Size", menu=cache_menu)
+        options_menu.add_checkbutton(label="Background Capture (last minutes of input)",
+                                     variable=self.capture_buffer_var,
+                                     command=lambda: self.handle_action("toggle_capture_buffer", "Menu 'Options > Background Capture'"))
         menubar.add_cascade(label="Options", menu=options_menu)
 
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        tools_menu.add_command(label="Compress Idle Gaps in Recording",
+                               command=lambda: self.handle_action("compress_recording_idle_gaps", "Menu 'Tools > Compress Idle Gaps in Recording'"))
+        tools_menu.add_command(label="Compact Typed Text in Recording",
+                               command=lambda: self.handle_action("compact_recording_text", "Menu 'Tools > Compact Typed Text in Recording'"))
+        tools_menu.add_command(label="Collapse Held Keys in Recording",
+                               command=lambda: self.handle_action("collapse_recording_key_repeats", "Menu 'Tools > Collapse Held Keys in Recording'"))
+        tools_menu.add_command(label="Insert Data Slot...",
+                               command=lambda: self.handle_action("open_data_slot_dialog", "Menu 'Tools > Insert Data Slot'"))
+        tools_menu.add_command(label="Batch Run From Data File...",
+                               command=lambda: self.handle_action("open_batch_run_dialog", "Menu 'Tools > Batch Run From Data File'"))
+        tools_menu.add_command(label="Dry Run (Preview Timing)...",
+                               command=lambda: self.handle_action("dry_run_playback", "Menu 'Tools > Dry Run'"))
+        tools_menu.add_command(label="Verify Library...",
+                               command=lambda: self.handle_action("verify_library", "Menu 'Tools > Verify Library'"))
+        tools_menu.add_command(label="Coordinate Transform...",
+                               command=lambda: self.handle_action("open_transform_dialog", "Menu 'Tools > Coordinate Transform'"))
+        tools_menu.add_command(label="Recording Library...",
+                               command=lambda: self.handle_action("open_library_browser", "Menu 'Tools > Recording Library'"))
+        tools_menu.add_command(label="Save From Capture Buffer...",
+                               command=lambda: self.handle_action("open_capture_snapshot_dialog", "Menu 'Tools > Save From Capture Buffer'"))
+        tools_menu.add_command(label="Export Recordings...",
+                               command=lambda: self.handle_action("open_export_dialog", "Menu 'Tools > Export Recordings'"))
+        tools_menu.add_command(label="Import Recordings...",
+                               command=lambda: self.handle_action("import_recordings_from_files", "Menu 'Tools > Import Recordings'"))
+        tools_menu.add_command(label="Recording Storage Stats",
+                               command=lambda: self.handle_action("show_storage_stats", "Menu 'Tools > Recording Storage Stats'"))
+        tools_menu.add_command(label="Combine Recordings...",
+                               command=lambda: self.handle_action("open_combine_dialog", "Menu 'Tools > Combine Recordings'"))
+        tools_menu.add_command(label="Playlists...",
+                               command=lambda: self.handle_action("open_playlist_editor", "Menu 'Tools > Playlists'"))
+        tools_menu.add_command(label="Scheduled Jobs...",
+                               command=lambda: self.handle_action("open_job_scheduler", "Menu 'Tools > Scheduled Jobs'"))
+        tools_menu.add_separator()
+        tools_menu.add_command(label="Show Metrics",
+                               command=lambda: self.handle_action("show_metrics", "Menu 'Tools > Show Metrics'"))
+        tools_menu.add_checkbutton(label="Sampling Profiler",
+                                   variable=self.profiler_var,
+                                   command=lambda: self.handle_action("toggle_profiler", "Menu 'Tools > Sampling Profiler'"))
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+
         help_menu = tk.Menu(menubar, tearoff=0)
         help_menu.add_command(label="How to use", command=self.show_help)
         menubar.add_cascade(label="Help", menu=help_menu)
@@ -244,9 +3064,18 @@ class RecorderApp:
         self.status_label = ttk.Label(root, text="", foreground=ACCENT_RED, font=("Segoe UI", 9, 'bold'))
         self.move_mouse = bool(self.move_var.get())
         self.saved_recordings = {}
+        self.quarantined_recordings = {}
+        self.recording_store = ChunkStore(RECORDINGS_STORE_DIR,
+                                          cache_bytes=int(self.settings_service.current.decoded_cache_mb * 1024 * 1024))
+        self.library_search = LibrarySearch()
+        self.jobs = []
+        self.job_queue = []
+        self.job_queue_polling = False
+        self.job_scheduler = JobScheduler(lambda name: self.root.after(0, self.run_scheduled_job, name))
         self.recording_name_var = tk.StringVar(value="")
         self.selected_recording_var = tk.StringVar()
-        self._load_recordings()
+        self.playlists = {}
+        self.recordings_loaded = threading.Event()
 
         self.top_frame = ttk.Frame(root)
         left_btn_frame = ttk.Frame(self.top_frame)
@@ -288,6 +3117,8 @@ class RecorderApp:
         self.inter_playback_delay_check = ttk.Checkbutton(self.inter_playback_delay_frame, text="Delay Between Loops", variable=self.inter_playback_delay_var, command=self._save_settings_on_interaction)
         inter_playback_delay_text_label = ttk.Label(self.inter_playback_delay_frame, text="Delay (s):", style='Dim.TLabel')
         self.inter_playback_delay_entry = ttk.Entry(self.inter_playback_delay_frame, textvariable=self.inter_playback_delay_seconds_var, width=6, justify='center')
+        self.cap_gaps_check = ttk.Checkbutton(self.inter_playback_delay_frame, text="Cap Gaps (s):", variable=self.cap_gaps_var, command=self._save_settings_on_interaction)
+        self.max_gap_entry = ttk.Entry(self.inter_playback_delay_frame, textvariable=self.max_gap_seconds_var, width=5, justify='center')
 
         self.edit_add_click_control_frame = ttk.Frame(root)
 
@@ -333,10 +3164,13 @@ class RecorderApp:
         self.inter_playback_delay_entry.pack(side=tk.LEFT, padx=(2,0))
         self.inter_playback_delay_entry.bind("<FocusOut>", self.validate_inter_playback_delay_and_save)
         self.inter_playback_delay_entry.bind("<Return>", self.validate_inter_playback_delay_and_save)
+        self.max_gap_entry.pack(side=tk.RIGHT, padx=(2,0))
+        self.cap_gaps_check.pack(side=tk.RIGHT)
+        self.max_gap_entry.bind("<FocusOut>", self.validate_max_gap_and_save)
+        self.max_gap_entry.bind("<Return>", self.validate_max_gap_and_save)
 
-        self._setup_initial_add_click_ui()
         self._toggle_ui_sections_visibility()
-        self._update_recording_combobox()
+        self.startup_marks['ui_built'] = time.perf_counter() - STARTUP_T0
         self.log_to_bug_report("INFO - Application UI constructed.")
         self.update_playback_speed_label()
 
@@ -358,6 +3192,7 @@ class RecorderApp:
         log_actions = []
 
         if self.show_edit_clicks_var.get():
+            if triggered_by_menu and not self.edit_clicks_ui_built: self._setup_initial_add_click_ui()
             self.edit_add_click_control_frame.pack(fill=tk.X, pady=(1,1), padx=5)
             current_height += self.EDIT_CLICKS_SECTION_HEIGHT
             log_actions.append("Edit Clicks shown")
@@ -371,14 +3206,51 @@ class RecorderApp:
                  self.log_to_bug_report(f"UI_ACTION - View toggled: {', '.join(log_actions)}. New height: {current_height}px.")
         self.root.update_idletasks()
 
+    def _recover_previous_session(self):
+        # Runs before the ring file is reopened (and cleared) for this session.
+        try:
+            if not os.path.exists(FLIGHT_RECORDER_FILE): return None
+            session = FlightRecorder.read(FLIGHT_RECORDER_FILE)
+            if session is None: return None
+            with open(FLIGHT_REPORT_FILE, 'w', encoding='utf-8') as f:
+                f.write(format_flight_report(session))
+            if session['clean']:
+                return f"Previous session's flight record written to '{os.path.basename(FLIGHT_REPORT_FILE)}'."
+            return (f"Previous session did not exit normally; its last {len(session['entries'])} events are in "
+                    f"'{os.path.basename(FLIGHT_REPORT_FILE)}'.")
+        except Exception as e:
+            print(f"WARNING: Could not read previous flight record: {e}")
+            return None
+
+    def close_flight_recorder(self, clean=True):
+        recorder, self.flight_recorder = self.flight_recorder, None
+        if recorder is not None:
+            try:
+                recorder.close(clean)
+            except Exception as e:
+                print(f"WARNING: Closing flight recorder failed: {e}")
+
     def log_to_bug_report(self, message):
+        recorder = self.flight_recorder
+        if recorder is not None:
+            try:
+                recorder.record(FlightRecorder.kind_of(message), message)
+            except Exception:
+                pass
         try:
             now = datetime.now()
             time_str = now.strftime("%I:%M:%S%p")
             clock_emoji = "\U0001F553"
 
-            with open(self.bug_report_file_path, 'a', encoding='utf-8') as f:
-                f.write(f"{clock_emoji}{time_str} {message}\n")
+            write_start = time.perf_counter()
+            line = f"{clock_emoji}{time_str} {message}\n"
+            if self.bug_report_handle is not None:
+                with self.bug_report_lock:
+                    self.bug_report_handle.write(line)
+            else:
+                with open(self.bug_report_file_path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            metrics.observe('bugreport.write_ms', (time.perf_counter() - write_start) * 1000)
         except Exception as e:
             print(f"CRITICAL: Failed to write to bug report file: {e}")
             print(f"Original bug report message: {message}")
@@ -402,6 +3274,16 @@ class RecorderApp:
 
     def _force_exit_app_immediately(self):
         print("ROBUST EXIT TRIGGERED: Forcing application termination.")
+        try:
+            # Nothing to flush: the mapped pages outlive the process, and the exit stays marked as not clean.
+            if getattr(self, 'flight_recorder', None) is not None:
+                self.flight_recorder.record(1, "EMERGENCY - Robust exit triggered. Forcing termination.")
+        except:
+            pass
+        try:
+            if hasattr(self, 'settings_service'): self.settings_service.flush(timeout=0.5)
+        except:
+            pass
         try:
             if hasattr(self, 'bug_report_file_path'):
                 with open(self.bug_report_file_path, 'a', encoding='utf-8') as f:
@@ -455,6 +3337,7 @@ class RecorderApp:
 
 
     def _setup_initial_add_click_ui(self):
+        self.edit_clicks_ui_built = True
         for widget in self.edit_add_click_control_frame.winfo_children():
             widget.destroy()
 
@@ -463,6 +3346,9 @@ class RecorderApp:
                                                         command=lambda: self.handle_action("initiate_add_click_mode", "UI Button 'Edit: Add Clicks'"),
                                                         width=15)
         self.initial_edit_add_click_button.pack(side=tk.LEFT, padx=2)
+        ttk.Button(self.edit_add_click_control_frame, text="Add Checkpoint",
+                   command=lambda: self.handle_action("initiate_checkpoint_mode", "UI Button 'Add Checkpoint'"),
+                   width=15).pack(side=tk.LEFT, padx=2)
 
         self.edit_click_pos_label = ttk.Label(self.edit_add_click_control_frame, text="")
         self.edit_click_count_entry = ttk.Entry(self.edit_add_click_control_frame,
@@ -501,6 +3387,47 @@ class RecorderApp:
         cancel_btn.pack(side=tk.LEFT, padx=2)
 
 
+    def initiate_checkpoint_mode(self):
+        if not self.recorded_events and not self.recording:
+            messagebox.showwarning("Edit Recording", "Please record or load a recording before adding a checkpoint.", parent=self.root)
+            return
+        if self.is_editing_add_click_mode or self.waiting_for_edit_click_position:
+            return
+        if self._get_screen_source() is None:
+            messagebox.showerror("Add Checkpoint", "Checkpoints need a screen source: install Pillow, or set 'source = file' "
+                                 "and 'file' in the [Screen] section of settings.ini.", parent=self.root)
+            return
+
+        self.is_editing_add_click_mode = True
+        self.waiting_for_edit_click_position = True
+        self.checkpoint_corners = []
+        self.log_message("CHECKPOINT: Click the top-left, then the bottom-right corner of the screen area to wait for.")
+        for widget in self.edit_add_click_control_frame.winfo_children():
+            widget.destroy()
+        ttk.Label(self.edit_add_click_control_frame, text="Click two corners...").pack(side=tk.LEFT, padx=2)
+        ttk.Button(self.edit_add_click_control_frame, text="Cancel",
+                   command=lambda: self.handle_action("cancel_add_click_mode", "UI Button 'Cancel' in checkpoint selection"),
+                   width=8).pack(side=tk.LEFT, padx=2)
+
+    def _add_checkpoint(self):
+        (x1, y1), (x2, y2) = self.checkpoint_corners
+        region = (min(x1, x2), min(y1, y2), max(1, abs(x2 - x1)), max(1, abs(y2 - y1)))
+        try:
+            fingerprint = self._get_screen_source().fingerprint(region)
+        except Exception as e:
+            self.log_message(f"Could not read the screen for the checkpoint: {e}")
+            self.log_to_bug_report(f"ERROR - Checkpoint capture failed: {e}\n{traceback.format_exc()}")
+            self.cancel_add_click_mode()
+            return
+        if not isinstance(self.recorded_events, list): self.recorded_events = list(self.recorded_events)
+        timestamp = self.recorded_events[-1][-1] + 0.1 if self.recorded_events else time.time()
+        timeout = self.settings_service.current.checkpoint_timeout
+        self.recorded_events.append(('wait_until', region, fingerprint, timeout, timestamp))
+        msg = f"Checkpoint added: wait up to {timeout:g}s for area {region[2]}x{region[3]} at ({region[0]},{region[1]}) to look like it does now."
+        self.log_message(msg)
+        self.log_to_bug_report(f"ACTION_DETAIL - {msg} Fingerprint {fingerprint}.")
+        self.cancel_add_click_mode()
+
     def _update_ui_for_add_click_confirmation(self):
         if not self.is_editing_add_click_mode: return
 
@@ -546,6 +3473,7 @@ class RecorderApp:
             messagebox.showerror("Add Clicks", "Invalid number for clicks. Please enter an integer.", parent=self.root)
             return
 
+        if not isinstance(self.recorded_events, list): self.recorded_events = list(self.recorded_events)
         button_to_add = Button.left.name
         current_timestamp_base = time.time()
         if self.recorded_events:
@@ -577,6 +3505,7 @@ class RecorderApp:
 
         self.is_editing_add_click_mode = False
         self.waiting_for_edit_click_position = False
+        self.checkpoint_corners = None
         self.edit_captured_click_x = None
         self.edit_captured_click_y = None
         self.edit_add_click_count_var.set("1")
@@ -627,89 +3556,285 @@ class RecorderApp:
                 self.inter_playback_delay_var.set(config.getboolean('General', 'inter_playback_delay', fallback=self.inter_playback_delay_var.get()))
                 self.inter_playback_delay_seconds_var.set(config.get('General', 'inter_playback_delay_seconds', fallback=self.inter_playback_delay_seconds_var.get()))
                 self.show_edit_clicks_var.set(config.getboolean('General', 'show_edit_clicks', fallback=True))
+                self.cap_gaps_var.set(config.getboolean('General', 'cap_gaps', fallback=self.cap_gaps_var.get()))
+                self.max_gap_seconds_var.set(config.get('General', 'max_gap_seconds', fallback=self.max_gap_seconds_var.get()))
+                self.max_throughput_var.set(config.getboolean('General', 'max_throughput', fallback=self.max_throughput_var.get()))
+                self.async_engine_var.set(config.getboolean('General', 'async_engine', fallback=self.async_engine_var.get()))
+                self.coord_transform_var.set(config.getboolean('General', 'coord_transform', fallback=self.coord_transform_var.get()))
+                compression = config.get('General', 'recording_compression', fallback='none')
+                self.recording_compression_var.set(compression if compression in CHUNK_CODECS else 'none')
+                self.typing_cps_var.set(str(max(0.0, config.getfloat('General', 'typing_cps', fallback=0.0))))
+                key_hold_repeat = config.get('General', 'key_hold_repeat', fallback='os')
+                try:
+                    if key_hold_repeat not in ('os', 'recorded') and float(key_hold_repeat) <= 0: key_hold_repeat = 'os'
+                except ValueError:
+                    key_hold_repeat = 'os'
+                self.key_hold_repeat_var.set(key_hold_repeat)
+                self.capture_buffer_var.set(config.getboolean('General', 'capture_buffer', fallback=False))
+
+            if 'Metrics' in config:
+                self.metrics_snapshot_var.set(config.getboolean('Metrics', 'write_snapshot', fallback=False))
+                self.metrics_snapshot_interval = config.getfloat('Metrics', 'snapshot_interval_seconds', fallback=self.metrics_snapshot_interval)
+
+            if 'ControlServer' in config:
+                self.control_server_var.set(config.getboolean('ControlServer', 'enabled', fallback=False))
+                self.control_server_port = config.getint('ControlServer', 'port', fallback=self.control_server_port)
+                self.control_server_socket = config.get('ControlServer', 'unix_socket', fallback=self.control_server_socket)
+
+            if 'Transform' in config:
+                try:
+                    self.coord_transform = CoordinateTransform(
+                        offset_x=config.getfloat('Transform', 'offset_x', fallback=0), offset_y=config.getfloat('Transform', 'offset_y', fallback=0),
+                        scale_x=config.getfloat('Transform', 'scale_x', fallback=1.0), scale_y=config.getfloat('Transform', 'scale_y', fallback=1.0),
+                        clamp=config.getboolean('Transform', 'clamp', fallback=False),
+                        monitor_map=parse_monitor_map(config.get('Transform', 'monitor_map', fallback='')))
+                except ValueError as e:
+                    self.log_to_bug_report(f"WARNING - Ignoring invalid [Transform] settings: {e}")
+
+            if 'Capture' in config:
+                self.capture_minutes = max(0.1, config.getfloat('Capture', 'minutes', fallback=self.capture_minutes))
+                self.capture_max_events = max(1000, config.getint('Capture', 'max_events', fallback=self.capture_max_events))
+
+            if 'Cache' in config:
+                self.decoded_cache_var.set(str(max(0.0, config.getfloat('Cache', 'decoded_mb', fallback=DECODED_CACHE_MB))))
+
+            if 'Screen' in config:
+                self.screen_source_kind = config.get('Screen', 'source', fallback='auto')
+                self.screen_file = config.get('Screen', 'file', fallback='')
+                self.checkpoint_timeout = max(0.1, config.getfloat('Screen', 'checkpoint_timeout', fallback=10.0))
+
+            if 'Pipeline' in config:
+                try:
+                    exclude_types = config.get('Pipeline', 'exclude_types', fallback='')
+                    self.pipeline_options = PipelineOptions(
+                        exclude_types=tuple(t.strip() for t in exclude_types.split(',') if t.strip()),
+                        key_map=parse_key_map(config.get('Pipeline', 'key_map', fallback='')),
+                        jitter_px=max(0, config.getint('Pipeline', 'jitter_px', fallback=0)),
+                        jitter_ms=max(0.0, config.getfloat('Pipeline', 'jitter_ms', fallback=0.0)))
+                except ValueError as e:
+                    self.log_to_bug_report(f"WARNING - Ignoring invalid [Pipeline] settings: {e}")
 
             self.log_to_bug_report("INFO - Settings (including UI visibility) loaded successfully from INI.")
         except Exception as e:
             self.log_to_bug_report(f"ERROR - Failed to load settings from INI: {e}\n{traceback.format_exc()}")
 
 
+    def _read_settings_from_ui(self, previous):
+        values = {}
+        for field, var_name, kind in self.SETTINGS_VARS:
+            try:
+                raw = getattr(self, var_name).get()
+                values[field] = bool(int(raw)) if kind is bool else kind(raw)
+            except (ValueError, tk.TclError):
+                values[field] = getattr(previous, field)
+        return previous._replace(keybinds=freeze_keybinds(), control_server_port=self.control_server_port,
+                                 control_server_socket=self.control_server_socket,
+                                 metrics_snapshot_interval=self.metrics_snapshot_interval, transform=self.coord_transform,
+                                 pipeline=self.pipeline_options, screen_source=self.screen_source_kind,
+                                 screen_file=self.screen_file, checkpoint_timeout=self.checkpoint_timeout,
+                                 capture_minutes=self.capture_minutes, capture_max_events=self.capture_max_events, **values)
+
+    def _on_setting_var_changed(self, *args):
+        self._save_settings()
+
     def _save_settings(self):
+        # Publishes the UI state as a new snapshot; the settings service writes it to disk after a short debounce.
+        snapshot = self._read_settings_from_ui(self.settings_service.current)
+        if self.settings_service.update(**snapshot._asdict()) and hasattr(self, 'recording_store'):
+            self.recording_store.cache.set_budget(int(snapshot.decoded_cache_mb * 1024 * 1024))
+
+    def _write_settings(self, snapshot):
         self.log_to_bug_report("INFO - Attempting to save settings to INI...")
         try:
             config = configparser.ConfigParser()
             config['Keybinds'] = {}
-            for action, combo_set in keybinds.items():
-                config['Keybinds'][action] = ",".join(sorted(list(combo_set)))
+            for action, combo in snapshot.keybinds:
+                config['Keybinds'][action] = ",".join(combo)
 
             config['General'] = {}
-            config['General']['replay_with_original'] = str(self.replay_with_original.get())
-            config['General']['loop'] = str(self.loop_var.get())
-            config['General']['loop_count'] = self.loop_count_var.get()
-            config['General']['record_movement'] = str(self.move_var.get())
-            config['General']['auto_click_interval'] = self.auto_click_interval_var.get()
-            config['General']['playback_speed'] = str(self.playback_speed_var.get())
-            config['General']['inter_playback_delay'] = str(self.inter_playback_delay_var.get())
-            config['General']['inter_playback_delay_seconds'] = self.inter_playback_delay_seconds_var.get()
-            config['General']['show_edit_clicks'] = str(self.show_edit_clicks_var.get())
-
+            for name in GENERAL_SETTINGS:
+                value = getattr(snapshot, name)
+                config['General'][name] = str(int(value)) if isinstance(value, bool) else str(value)
+
+            config['Metrics'] = {}
+            config['Metrics']['write_snapshot'] = str(int(snapshot.metrics_snapshot))
+            config['Metrics']['snapshot_interval_seconds'] = str(snapshot.metrics_snapshot_interval)
+
+            config['ControlServer'] = {}
+            config['ControlServer']['enabled'] = str(int(snapshot.control_server))
+            config['ControlServer']['port'] = str(snapshot.control_server_port)
+            config['ControlServer']['unix_socket'] = snapshot.control_server_socket
+
+            transform = snapshot.transform
+            config['Transform'] = {}
+            config['Transform']['offset_x'] = str(transform.offset_x)
+            config['Transform']['offset_y'] = str(transform.offset_y)
+            config['Transform']['scale_x'] = str(transform.scale_x)
+            config['Transform']['scale_y'] = str(transform.scale_y)
+            config['Transform']['clamp'] = str(int(transform.clamp))
+            config['Transform']['monitor_map'] = format_monitor_map(transform.monitor_map)
+
+            config['Capture'] = {}
+            config['Capture']['minutes'] = str(snapshot.capture_minutes)
+            config['Capture']['max_events'] = str(snapshot.capture_max_events)
+
+            config['Cache'] = {}
+            config['Cache']['decoded_mb'] = str(snapshot.decoded_cache_mb)
+
+            config['Screen'] = {}
+            config['Screen']['source'] = snapshot.screen_source
+            config['Screen']['file'] = snapshot.screen_file
+            config['Screen']['checkpoint_timeout'] = str(snapshot.checkpoint_timeout)
+
+            pipeline = snapshot.pipeline
+            config['Pipeline'] = {}
+            config['Pipeline']['exclude_types'] = ",".join(pipeline.exclude_types)
+            config['Pipeline']['key_map'] = ", ".join(f"{src}={dst}" for src, dst in pipeline.key_map)
+            config['Pipeline']['jitter_px'] = str(pipeline.jitter_px)
+            config['Pipeline']['jitter_ms'] = str(pipeline.jitter_ms)
+
+            save_start = time.perf_counter()
             with open(SETTINGS_FILE, 'w') as configfile:
                 config.write(configfile)
+            metrics.observe('settings.save_ms', (time.perf_counter() - save_start) * 1000)
             self.log_to_bug_report("INFO - Settings (including UI visibility) saved successfully to INI.")
         except Exception as e:
-            self.log_message(f"Error saving settings: {e}")
             self.log_to_bug_report(f"ERROR - Failed to save settings to INI: {e}\n{traceback.format_exc()}")
 
+    def _load_legacy_recordings(self):
+        with open(RECORDINGS_FILE, 'r') as f:
+            def object_hook(dct):
+                if '__tuple__' in dct: return tuple(dct['__tuple__'])
+                elif '__button__' in dct:
+                    try: return getattr(Button, dct['__button__'])
+                    except AttributeError: return dct['__button__']
+                elif '__key__' in dct:
+                    try: return getattr(Key, dct['__key__'])
+                    except AttributeError: return dct['__key__']
+                return dct
+            return json.load(f, object_hook=object_hook)
+
     def _load_recordings(self):
-        if os.path.exists(RECORDINGS_FILE):
-            try:
-                with open(RECORDINGS_FILE, 'r') as f:
-                    def object_hook(dct):
-                        if '__tuple__' in dct: return tuple(dct['__tuple__'])
-                        elif '__button__' in dct:
-                            try: return getattr(Button, dct['__button__'])
-                            except AttributeError: return dct['__button__']
-                        elif '__key__' in dct:
-                            try: return getattr(Key, dct['__key__'])
-                            except AttributeError: return dct['__key__']
-                        return dct
-                    self.saved_recordings = json.load(f, object_hook=object_hook)
-            except json.JSONDecodeError as e:
-                self.log_message(f"Error decoding recordings file: {e}. Creating new.")
-                self.log_to_bug_report(f"ERROR - Decoding recordings file: {e}. Creating new.\n{traceback.format_exc()}")
-                self.saved_recordings = {}
-            except Exception as e:
-                self.log_message(f"Error loading recordings: {e}")
-                self.log_to_bug_report(f"ERROR - Loading recordings: {e}.\n{traceback.format_exc()}")
-                self.saved_recordings = {}
-        else:
+        self.saved_recordings = {}
+        self.quarantined_recordings = {}
+        try:
+            load_start = time.perf_counter()
+            if self.recording_store.exists():
+                try:
+                    self.recording_store.load_index()
+                except ValueError as e:
+                    msg = (f"The recording library index is damaged ({e}). A copy was kept as 'index.json.corrupt'; "
+                           f"recordings are not listed or saved until it is repaired.")
+                    self.log_message(msg)
+                    self.log_to_bug_report(f"ERROR - {msg}\n{traceback.format_exc()}")
+                    return
+                removed = self.recording_store.remove_unreferenced_chunks()
+                if removed:
+                    self.log_to_bug_report(f"INFO - Removed {removed} chunks left over from deleted recordings.")
+                backfilled = self.recording_store.backfill_metadata()
+                if backfilled:
+                    self.log_to_bug_report(f"INFO - Built library metadata for {backfilled} recordings.")
+                for name in self.recording_store.names():
+                    corrupt = self.recording_store.metadata.get(name, {}).get('corrupt')
+                    if corrupt:
+                        self._quarantine_recording(name, corrupt)
+                        continue
+                    try:
+                        self.saved_recordings[name] = self.recording_store.view(name)
+                    except Exception as e:
+                        # Kept in the store: a recording missing from both dicts would be deleted by the next save.
+                        self.log_to_bug_report(f"ERROR - Reading recording '{name}' from chunk store: {e}.\n{traceback.format_exc()}")
+                        self._quarantine_recording(name, str(e))
+            elif os.path.exists(RECORDINGS_FILE):
+                legacy = self._load_legacy_recordings()
+                for name, events in legacy.items():
+                    # One malformed recording must not stop the others from being migrated.
+                    try:
+                        self.recording_store.put(name, events)
+                        self.saved_recordings[name] = self.recording_store.view(name)
+                    except Exception as e:
+                        self.log_message(f"Recording '{name}' could not be migrated: {e}")
+                        self.log_to_bug_report(f"ERROR - Migrating recording '{name}': {e}.\n{traceback.format_exc()}")
+                os.replace(RECORDINGS_FILE, RECORDINGS_FILE + '.bak')
+                self.log_to_bug_report(f"INFO - Migrated {len(self.saved_recordings)} recordings from '{RECORDINGS_FILE}' into the chunk store "
+                                       f"(old file kept as .bak). {self.recording_store.stats()}")
+            metrics.observe('recordings.load_ms', (time.perf_counter() - load_start) * 1000)
+        except json.JSONDecodeError as e:
+            # Keep the unreadable file aside; starting a new library would otherwise hide it for good.
+            kept = ''
+            if not self.recording_store.exists() and os.path.exists(RECORDINGS_FILE):
+                os.replace(RECORDINGS_FILE, RECORDINGS_FILE + '.corrupt')
+                kept = f" Old file kept as '{os.path.basename(RECORDINGS_FILE)}.corrupt'."
+            self.log_message(f"Error decoding recordings file: {e}. Creating new.{kept}")
+            self.log_to_bug_report(f"ERROR - Decoding recordings file: {e}. Creating new.{kept}\n{traceback.format_exc()}")
+            self.saved_recordings = {}
+        except Exception as e:
+            self.log_message(f"Error loading recordings: {e}")
+            self.log_to_bug_report(f"ERROR - Loading recordings: {e}.\n{traceback.format_exc()}")
             self.saved_recordings = {}
 
-    def _save_recordings(self):
+    def _save_recordings(self, *changed_names):
+        # Syncs the chunk store with saved_recordings; only the named recordings are re-chunked (all if none given).
+        self._wait_for_recordings()
         try:
-            class CustomEncoder(json.JSONEncoder):
-                def default(self, obj):
-                    if isinstance(obj, tuple): return {'__tuple__': list(obj)}
-                    elif isinstance(obj, Button): return {'__button__': obj.name}
-                    elif isinstance(obj, Key): return {'__key__': obj.name}
-                    return json.JSONEncoder.default(self, obj)
-            with open(RECORDINGS_FILE, 'w') as f:
-                json.dump(self.saved_recordings, f, indent=4, cls=CustomEncoder)
-            self.log_to_bug_report(f"INFO - Saved {len(self.saved_recordings)} recordings successfully.")
+            save_start = time.perf_counter()
+            store = self.recording_store
+            for name in store.names():
+                if name not in self.saved_recordings and name not in self.quarantined_recordings:
+                    freed = store.delete(name)
+                    self.log_to_bug_report(f"INFO - Recording '{name}' removed from chunk store, {freed} unused chunks freed.")
+            store.codec = self.settings_service.current.recording_compression
+            new_chunks = new_bytes = 0
+            for name in (changed_names or list(self.saved_recordings.keys())):
+                events = self.saved_recordings.get(name)
+                if events is None or (isinstance(events, StoredRecording) and name in store.recordings and events.manifest == store.view(name).manifest):
+                    continue
+                if isinstance(events, StoredRecording):
+                    store.link(name, events)
+                    chunks = written = 0
+                else:
+                    chunks, written = store.put(name, events)
+                self.saved_recordings[name] = store.view(name)
+                new_chunks += chunks; new_bytes += written
+            metrics.observe('recordings.save_ms', (time.perf_counter() - save_start) * 1000)
+            stats = store.stats()
+            metrics.set_gauge('recordings.dedup_ratio', stats['dedup_ratio'])
+            self.log_to_bug_report(f"INFO - Saved {len(self.saved_recordings)} recordings successfully ({new_chunks} new chunks, "
+                                   f"{new_bytes} bytes written, dedup ratio {stats['dedup_ratio']}x).")
+            return stats
         except Exception as e:
             self.log_message(f"Error saving recordings: {e}")
             self.log_to_bug_report(f"ERROR - Saving recordings: {e}.\n{traceback.format_exc()}")
 
 
+    def _quarantine_recording(self, name, reason):
+        self.saved_recordings.pop(name, None)
+        self.quarantined_recordings[name] = reason
+        self.log_message(f"Recording '{name}' quarantined: {reason}")
+        self.log_to_bug_report(f"WARNING - Recording '{name}' quarantined (kept in store, not listed): {reason}")
+
     def _update_recording_combobox(self):
         try:
-            self.recording_combobox['values'] = sorted(list(self.saved_recordings.keys()))
+            metadata = self.recording_store.metadata
+            self.library_search.rebuild({name: metadata.get(name, {}) for name in self.saved_recordings})
+            self.recording_combobox['values'] = self.library_search.names()
             if self.selected_recording_var.get() not in self.saved_recordings:
                 self.selected_recording_var.set("")
+            if getattr(self, 'library_window', None) is not None and self.library_window.winfo_exists():
+                self.library_refresh()
         except Exception as e:
             self.log_to_bug_report(f"ERROR - Updating recording combobox: {e}\n{traceback.format_exc()}")
 
+    def _mark_played(self, name):
+        if name is None or name not in self.saved_recordings: return
+        try:
+            self.recording_store.update_metadata(name, last_played=time.time())
+        except Exception as e:
+            self.log_to_bug_report(f"ERROR - Updating last played time of '{name}': {e}\n{traceback.format_exc()}")
+
 
     def save_current_recording(self):
+        self._wait_for_recordings()
         name = self.recording_name_var.get().strip()
         if not name:
             self.log_message("Please enter a name for the recording.")
@@ -718,10 +3843,15 @@ class RecorderApp:
             self.log_message("No events recorded to save!")
             return
 
-        self.saved_recordings[name] = list(self.recorded_events)
-        self._save_recordings()
+        if self.playing_back and name in self.saved_recordings:
+            self.log_message(f"Cannot overwrite '{name}' during playback.")
+            return
+
+        # A loaded stored recording is saved by sharing its chunks rather than copying its events.
+        self.saved_recordings[name] = self.recorded_events if isinstance(self.recorded_events, StoredRecording) else list(self.recorded_events)
+        stats = self._save_recordings(name)
         self._update_recording_combobox()
-        self.log_message(f"Recording '{name}' saved.")
+        self.log_message(f"Recording '{name}' saved." + (f" Library dedup ratio: {stats['dedup_ratio']}x." if stats else ""))
         self.log_to_bug_report(f"ACTION_DETAIL - Recording '{name}' saved with {len(self.recorded_events)} events. (Source: {self.last_action_source})")
         self.recording_name_var.set("")
 
@@ -738,7 +3868,15 @@ class RecorderApp:
             self.log_message("Cannot load while active.")
             return
 
-        self.recorded_events = list(self.saved_recordings[name])
+        # Saved recordings are chunk-store views; playback streams them and editing copies them into a list first.
+        self.recorded_events = self.saved_recordings[name]
+        self.loaded_recording_name = name
+        # The loaded recording is the one played next (and looped); its chunks stay cached, and stay readable
+        # if the saved recording is deleted or saved over while it is loaded.
+        if isinstance(self.recorded_events, StoredRecording):
+            self.recording_store.hold('loaded', self.recorded_events.manifest)
+        else:
+            self.recording_store.unhold('loaded')
         self.log_message(f"Recording '{name}' loaded. {len(self.recorded_events)} events.")
         self.log_to_bug_report(f"ACTION_DETAIL - Recording '{name}' loaded with {len(self.recorded_events)} events. (Source: {self.last_action_source})")
 
@@ -752,6 +3890,10 @@ class RecorderApp:
             self.log_message(f"Recording '{name}' not found.")
             return
 
+        if self.playing_back:
+            self.log_message("Cannot delete a recording during playback.")
+            return
+
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{name}'?", parent=self.root):
             self.log_to_bug_report(f"INFO - User confirmed deletion of recording '{name}'. (Source: {self.last_action_source})")
             del self.saved_recordings[name]
@@ -801,7 +3943,10 @@ class RecorderApp:
             "----------------------------------------\n"
             "☑ Replay w/ delay:\n"
             "  - Checked: Playback uses the original pauses and timings from your recording.\n"
-            "  - Unchecked: Actions play back as quickly as possible.\n\n"
+            "  - Unchecked: Actions play back as quickly as possible.\n"
+            "  - 'Options > Max Throughput' (with this unchecked): dispatches at the fastest rate the system keeps up with, "
+            "keeping key press/release pairs apart, skipping intermediate mouse moves and slowing down automatically if input calls start lagging. "
+            "The achieved events/sec is logged when playback ends.\n\n"
 
             "☑ Loop & Count [  ]:\n"
             "  - Check 'Loop' and enter a number (e.g., 5) in the small box to make the playback repeat that many times.\n\n"
@@ -809,6 +3954,34 @@ class RecorderApp:
             "☑ Delay Between Loops & Delay (s) [  ]:\n"
             "  - If 'Loop' is active, check this and set a pause (in seconds) that will occur after each full playback cycle before the next one begins.\n\n"
 
+            "☑ Cap Gaps (s) [  ]:\n"
+            "  - With 'Replay w/ delay' checked, any pause longer than this many seconds is shortened to it. Timings below the cap are kept.\n"
+            "  - 'Tools > Compress Idle Gaps in Recording' applies the cap permanently to the selected saved recording (or the loaded one if none is selected).\n\n"
+
+            "Tools > Compact Typed Text in Recording:\n"
+            "  - Folds runs of plain typing (letters, digits, symbols, space, shift) in the selected or loaded recording into single text events "
+            "that keep each character's timing. Shortcuts such as Ctrl+C are left as they are.\n"
+            "  - 'Options > Typed Text Speed' replays those runs at the recorded timing or at a fixed number of characters per second.\n\n"
+
+            "Tools > Collapse Held Keys in Recording:\n"
+            "  - Replaces the stream of auto-repeat presses recorded while a key was held down with one timed hold.\n"
+            "  - 'Options > Held Keys at Playback' chooses whether playback just holds the key (the system repeats it, where it does so "
+            "for simulated keys), repeats it as often as recorded, or repeats it at a fixed rate.\n\n"
+
+            "Options > Async Engine:\n"
+            "  - Runs playback and AutoClick as tasks on one precise timer instead of separate threads, "
+            "so an AutoClick can keep running while a recording plays back.\n\n"
+
+            "Tools > Coordinate Transform...:\n"
+            "  - Replays a recording made on another resolution or monitor layout: set an offset, a scale ('Scale to' fills it from the "
+            "recorded resolution), optional clamping to the screen, and monitor remap rules (left,top,width,height>left,top,width,height).\n"
+            "  - 'Use at Playback' applies it to every playback while 'Options > Apply Coordinate Transform at Playback' is checked. "
+            "'Write into Recording' rewrites the selected saved recording (or the loaded one) permanently.\n\n"
+
+            "Playback pipeline ([Pipeline] section of settings.ini):\n"
+            "  - exclude_types: event types to leave out, e.g. mouse_move,mouse_scroll. key_map: swap keys, e.g. a=b, ctrl=alt.\n"
+            "  - jitter_px / jitter_ms: random offsets added to mouse positions and timings.\n\n"
+
             "Playback Speed (Slider):\n"
             "  - Drag the slider to change the speed of playback.\n"
             "    - Right (>1x): Faster. | Left (<1x): Slower. | 0x: Paused.\n\n"
@@ -830,6 +4003,19 @@ class RecorderApp:
             "  5. Click 'Add These Clicks'. The specified number of left-button clicks will be appended to your recording.\n"
             "  6. You can cancel the process at various stages using the 'Cancel' buttons or by pressing ESC.\n\n"
 
+            "Add Checkpoint (Edit Clicks section):\n"
+            "  Appends a 'wait until' step: click two opposite corners of a screen area and playback will later pause at that point "
+            "until the area looks like it does now (e.g. a dialog has opened), instead of relying on the recorded delay.\n"
+            "  - If it doesn't match within the timeout ('checkpoint_timeout' in the [Screen] section, default 10s) playback stops.\n"
+            "  - Screen capture uses Pillow. Without a display, 'source = file' and 'file = <path>' read the screen from a PPM/PGM image.\n\n"
+
+            "Options > Background Capture:\n"
+            "  - Keeps the last few minutes of your input (5 by default, 'minutes' in the [Capture] section of settings.ini) in a "
+            "fixed-size buffer, so something you just did can still become a recording after the fact.\n"
+            "  - Press the Snapshot keybind (none by default; set it under 'Options > Change Keybinds') to save the whole "
+            "buffer as a new recording, or use "
+            "'Tools > Save From Capture Buffer...' to pick a time window. Input made by playback or AutoClick is not captured.\n\n"
+
             "----------------------------------------\n"
             "  Managing Your Recordings\n"
             "----------------------------------------\n"
@@ -844,6 +4030,70 @@ class RecorderApp:
             "  - Load: Loads the selected recording. It's now ready to be played back or edited.\n"
             "  - Delete: Permanently removes the selected recording from your saved list (you'll be asked to confirm).\n\n"
 
+            "Storage:\n"
+            "  - Recordings are kept in the 'recordings_store' folder as shared chunks: runs of events that several recordings have in common "
+            "(e.g. the same login sequence in a saved variant) are stored once. Deleting a recording frees the chunks nothing else uses.\n"
+            "  - 'Tools > Recording Library...' lists every recording with its event counts, duration, tags and when it was last played, "
+            "read from the store's index without loading the recordings. Type in the search box to filter by name or tag; double-click loads.\n"
+            "  - 'Tools > Recording Storage Stats' shows how much space sharing saves. An old recordings.json is migrated automatically (kept as .bak).\n"
+            "  - 'Options > Recording Compression' stores newly written chunks compressed with zlib or lzma. Playback decompresses one chunk "
+            "at a time as it goes. Run the script with --storage-benchmark to compare the encodings on your recordings.\n\n"
+
+            "Combine Recordings (Tools > Combine Recordings...):\n"
+            "  - Concatenate: plays the listed recordings one after another, 'Gap' seconds apart.\n"
+            "  - Splice: inserts the 2nd recording into the 1st at 'Splice at' seconds; the rest of the 1st follows after the gap.\n"
+            "  - Interleave: merges the recordings by time as if they started together (e.g. a keyboard-only and a mouse-only recording).\n"
+            "  - The result is written chunk by chunk as a new recording, so even very long recordings are never loaded whole.\n\n"
+
+            "Crash Flight Recorder:\n"
+            "  - The last 4096 log lines and the current playback position are kept in 'flight_recorder.bin', which survives "
+            "crashes and the emergency exit. On the next start they are written to 'last_session_report.txt', and the "
+            "previous bug report is kept as 'bugreport.prev.txt'.\n\n"
+
+            "Decoded recording cache:\n"
+            "  - Saved recordings stay compressed on disk and are decoded as they are played. Recently used parts are kept "
+            "decoded in memory up to a budget ('Options > Decoded Cache Size', 64 MB by default; any size can be set as "
+            "[Cache] decoded_mb in the settings file); the loaded "
+            "recording is always kept. 'Tools > Recording Storage Stats' shows the cache size and hit rate.\n\n"
+
+            "Tools > Export Recordings... / Import Recordings...:\n"
+            "  - Export writes one file per recording to a folder, as JSONL (one event per line), CSV (one event per row, "
+            "with x/y columns) or a compact binary dump. Files are named after the recordings and import back exactly, "
+            "so they can be kept in git, diffed, or generated by other tools.\n"
+            "  - Import reads any mix of .jsonl, .csv and .mkrb files; each becomes a recording named after its file. "
+            "Files are streamed, so size does not matter. Files with invalid events are not imported.\n\n"
+
+            "Checks and Tools > Verify Library...:\n"
+            "  - Before playback starts, the recording is checked (event shapes, timestamps, keys, buttons, positions on screen). "
+            "Broken events cancel the playback; things playback would only skip are listed as warnings.\n"
+            "  - 'Verify Library' reads and checks every saved recording in worker processes. Recordings that cannot be read or "
+            "have broken events are quarantined: they stay on disk but are hidden until a later verify finds them healthy or "
+            "you delete them. The other recordings are not affected.\n\n"
+
+            "Tools > Dry Run (Preview Timing)...:\n"
+            "  - Runs the loaded recording with the current playback options (speed, loops, inter-loop delay, gap cap, held keys, "
+            "pipeline) on a simulated clock without moving the mouse or pressing keys, and shows the total run time, each loop's "
+            "timing, event counts and a timing trace that can be saved as CSV. Screen checkpoints are counted as matching at once.\n\n"
+
+            "Data Slots and Batch Runs (Tools menu):\n"
+            "  - 'Insert Data Slot...' adds a placeholder to the loaded recording: type the value of a column, or click at the "
+            "coordinates in two columns. To turn sample text you typed while recording into a slot, compact the typing first "
+            "and enter that text under 'Replace typed text'.\n"
+            "  - 'Batch Run From Data File...' plays the recording once per row of a CSV (with a header row) or JSONL file, "
+            "filling the slots from that row. Rows are read one at a time, and each row's result and time go to "
+            "<file>.results.csv. The Inter-loop delay (if enabled) is waited between rows.\n\n"
+
+            "Scheduled Jobs (Tools > Scheduled Jobs...):\n"
+            "  - Runs a saved recording automatically: 'every 15m', 'every 30s', 'daily 02:00' or a cron expression "
+            "(minute hour day month weekday, e.g. '*/10 8-18 * * 1-5').\n"
+            "  - If something is already running when a job is due, its policy decides: 'skip' the run, 'queue' it until the "
+            "current action ends, or 'preempt' (stop the current playback and run the job). Jobs are kept in schedule.json.\n\n"
+
+            "Playlists (Tools > Playlists...):\n"
+            "  - Chain saved recordings: pick a recording, set its loop count, speed (empty = use the slider) and the wait before the next item, then 'Add'.\n"
+            "  - Save the playlist under a name and press '▶ Play'. The main '■ STOP' button or the Playback keybind stops it.\n"
+            "  - The next recording is prepared in the background while the current one plays, so items follow each other without a pause.\n\n"
+
             "----------------------------------------\n"
             "  Changing Global Keybinds (Options Menu)\n"
             "----------------------------------------\n"
@@ -859,16 +4109,74 @@ class RecorderApp:
             "  - Show Edit Clicks Section: Toggles the visibility of the 'Edit: Add Clicks' button area.\n"
             "  (Hiding these sections will also reduce the main window's height.)\n\n"
 
+            "----------------------------------------\n"
+            "  Control Server (Options Menu)\n"
+            "----------------------------------------\n"
+            "'Enable Control Server' lets local scripts drive the recorder over TCP (127.0.0.1, port from settings.ini, default 8765) "
+            "or a Unix socket ('unix_socket' in the [ControlServer] section).\n"
+            "  Send one JSON object per line, e.g. {\"cmd\": \"play\", \"name\": \"My Macro\"}. Commands: play, stop, status, list, load, subscribe.\n"
+            "  'subscribe' streams playback progress events, including the command-to-first-event latency. 'metrics' returns the metrics below.\n\n"
+
+            "----------------------------------------\n"
+            "  Metrics & Profiling\n"
+            "----------------------------------------\n"
+            "Tools > Show Metrics: capture events per type, input hook callback times, playback lateness and input call times, "
+            "log/save/load durations, UI responsiveness and memory use.\n"
+            "Options > Write Metrics Snapshot: writes the same data to metrics.json every few seconds.\n"
+            "Tools > Sampling Profiler: while checked, samples the capture and playback threads. Unchecking writes profile_stacks.txt "
+            "in folded format (usable with flamegraph.pl or speedscope).\n\n"
+            "Startup timing: run the script with --startup-benchmark to launch it a few times and print how long each startup phase "
+            "and the slowest imports take.\n\n"
+
             "Enjoy using the recorder!"
         )
         messagebox.showinfo("Help - How to Use", help_text, parent=self.root)
 
 
+    def on_window_shown(self):
+        # Runs once the window has been drawn: everything not needed for the first frame happens from here.
+        self.startup_marks['window_shown'] = time.perf_counter() - STARTUP_T0
+        self.log_to_bug_report(f"INFO - Window shown {self.startup_marks['window_shown'] * 1000:.0f}ms after start.")
+        threading.Thread(target=self._load_library_in_background, name="library-loader", daemon=True).start()
+        if self.show_edit_clicks_var.get() and not self.edit_clicks_ui_built:
+            self._setup_initial_add_click_ui()
+        self._start_robust_exit_listener()
+        self.start_listeners()
+        self.startup_marks['listeners_started'] = time.perf_counter() - STARTUP_T0
+        if self.control_server_var.get() == 1: self._start_control_server()
+        if self.capture_buffer_var.get() == 1: self._start_capture_buffer()
+        self.root.after(1000, self._probe_tk_latency, time.perf_counter())
+
+    def _load_library_in_background(self):
+        try:
+            self._load_recordings()
+            self._load_playlists()
+        finally:
+            self.recordings_loaded.set()
+            self.startup_marks['recordings_loaded'] = time.perf_counter() - STARTUP_T0
+            self.root.after(0, self._on_library_loaded)
+
+    def _on_library_loaded(self):
+        self._update_recording_combobox()
+        self._load_jobs()
+        self._reschedule_jobs()
+        self.job_scheduler.start()
+        self.log_to_bug_report(f"INFO - Loaded {len(self.saved_recordings)} recordings in the background "
+                               f"({self.startup_marks['recordings_loaded'] * 1000:.0f}ms after start).")
+
+    def _wait_for_recordings(self):
+        if not self.recordings_loaded.is_set():
+            self.log_to_bug_report("INFO - Waiting for background recordings load to finish...")
+            self.recordings_loaded.wait(timeout=30)
+
     def start_listeners(self):
         self.log_to_bug_report("INFO - Attempting to start main input listeners...")
         try:
-            self.listener_mouse = mouse.Listener(on_click=self.on_mouse_click, on_move=self.on_mouse_move, on_scroll=self.on_mouse_scroll)
-            self.listener_keyboard = keyboard.Listener(on_press=self.on_key_press, on_release=self.on_key_release)
+            self.listener_mouse = mouse.Listener(on_click=self._timed_hook(self.on_mouse_click, 'mouse_click'),
+                                                 on_move=self._timed_hook(self.on_mouse_move, 'mouse_move'),
+                                                 on_scroll=self._timed_hook(self.on_mouse_scroll, 'mouse_scroll'))
+            self.listener_keyboard = keyboard.Listener(on_press=self._timed_hook(self.on_key_press, 'key_press'),
+                                                       on_release=self._timed_hook(self.on_key_release, 'key_release'))
             self.listener_mouse.start()
             self.listener_keyboard.start()
             self.log_to_bug_report("INFO - Main input listeners started successfully.")
@@ -877,7 +4185,34 @@ class RecorderApp:
             self.log_to_bug_report(f"ERROR - Starting main listeners: {e}. Check permissions!\n{traceback.format_exc()}")
             if hasattr(self, 'status_label'): self.status_label.config(text=f"ERROR: {e}")
 
+    def _timed_hook(self, callback, event_type):
+        hook_metric = f"hook.{event_type}_ms"
+        capture_metric = f"capture.{event_type}"
+        def timed(*args):
+            start = time.perf_counter()
+            captured_before = len(self.recorded_events)
+            try:
+                return callback(*args)
+            finally:
+                metrics.observe(hook_metric, (time.perf_counter() - start) * 1000)
+                if len(self.recorded_events) > captured_before:
+                    metrics.inc(capture_metric)
+        return timed
+
     def on_mouse_click(self, x, y, button, pressed):
+        if self.checkpoint_corners is not None and self.waiting_for_edit_click_position and pressed:
+            if button != Button.left:
+                self.log_message("CHECKPOINT: Cancelled (non-left click).")
+                self.cancel_add_click_mode()
+                return
+            self.checkpoint_corners.append((x, y))
+            if len(self.checkpoint_corners) == 2:
+                self.waiting_for_edit_click_position = False
+                self.root.after(0, self._add_checkpoint)
+            else:
+                self.log_message(f"CHECKPOINT: First corner ({x}, {y}). Now click the opposite corner.")
+            return
+
         if self.waiting_for_edit_click_position and pressed:
             if button == Button.left:
                 self.edit_captured_click_x = x
@@ -893,20 +4228,25 @@ class RecorderApp:
                 self.cancel_add_click_mode()
                 return
 
-        if self.recording:
+        if self.recording or self.capture_ring is not None:
             button_name = button.name if hasattr(button, 'name') else str(button)
-            event = ('mouse_click', x, y, button_name, pressed, time.time())
-            self.recorded_events.append(event)
+            self._capture(('mouse_click', x, y, button_name, pressed, time.time()))
 
     def on_mouse_move(self, x, y):
-        if self.recording and self.move_mouse:
-            event = ('mouse_move', x, y, time.time())
-            self.recorded_events.append(event)
+        if self.move_mouse and (self.recording or self.capture_ring is not None):
+            self._capture(('mouse_move', x, y, time.time()))
 
     def on_mouse_scroll(self, x, y, dx, dy):
+        if self.recording or self.capture_ring is not None:
+            self._capture(('mouse_scroll', x, y, dx, dy, time.time()))
+
+    def _capture(self, event):
         if self.recording:
-            event = ('mouse_scroll', x, y, dx, dy, time.time())
             self.recorded_events.append(event)
+        ring = self.capture_ring
+        # Playback and AutoClick input is seen by the listeners too; it is not the user's.
+        if ring is not None and not self.playing_back and not self.auto_clicking:
+            ring.append(event)
 
     def on_key_press(self, key):
         key_str = self._get_key_display_name(key)
@@ -936,9 +4276,8 @@ class RecorderApp:
         if key_str not in self.current_keys:
             self.current_keys.add(key_str)
 
-        if self.recording:
-            event = ('key_press', key_str, time.time())
-            self.recorded_events.append(event)
+        if self.recording or self.capture_ring is not None:
+            self._capture(('key_press', key_str, time.time()))
 
 
     def on_key_release(self, key):
@@ -963,7 +4302,7 @@ class RecorderApp:
             self.listening_for_keybind = None
             self.current_keys.clear()
             self.last_log_message = None
-            self._save_settings()
+            self.settings_service.update(keybinds=freeze_keybinds())
             return
 
         if self.listening_for_keybind and key_str in self.current_keys:
@@ -989,10 +4328,13 @@ class RecorderApp:
                     elif action == 'record' and not self.playing_back: self.handle_action("toggle_recording", source); return
                     elif action == 'playback' and not self.recording: self.handle_action("toggle_playback", source); return
                     elif action == 'auto_click': self.handle_action("toggle_auto_click", source); return
+                    elif action == 'snapshot' and self.capture_ring is not None:
+                        # Its press was captured, so the release is too; the snapshot leaves both out.
+                        self._capture(('key_release', key_str, time.time()))
+                        self.handle_action("snapshot_capture_buffer", source); return
 
-        if self.recording:
-            event = ('key_release', key_str, time.time())
-            self.recorded_events.append(event)
+        if self.recording or self.capture_ring is not None:
+            self._capture(('key_release', key_str, time.time()))
 
     def log_message(self, msg):
         if hasattr(self, 'text_display') and self.text_display is not None:
@@ -1019,7 +4361,7 @@ class RecorderApp:
                 self.log_message(msg)
                 self.log_to_bug_report(f"WARNING - {msg} (Attempted by {self.last_action_source})")
                 return
-            self.recorded_events.clear()
+            self.recorded_events = []
             self.recording = True; self.record_btn.config(text="■ STOP")
             msg = "Recording started."
             self.log_message(msg)
@@ -1029,6 +4371,7 @@ class RecorderApp:
         if self.is_editing_add_click_mode: self.cancel_add_click_mode()
         if self.playing_back:
             self.playing_back = False;
+            if self.engine is not None: self.engine.cancel('playback')
             if hasattr(self, 'play_btn') and self.play_btn.winfo_exists() and self.play_btn.cget('text') != "▶ PLAY":
                            self.play_btn.config(text="▶ PLAY")
                            source_info = self.last_action_source if self.last_action_source != "System" else "user action"
@@ -1036,7 +4379,7 @@ class RecorderApp:
                            self.log_message(stop_message)
                            self.log_to_bug_report(f"ACTION_DETAIL - {stop_message}")
         else:
-            if self.recording or self.auto_clicking:
+            if self.recording or (self.auto_clicking and not self._use_async_engine()):
                 msg = "Cannot play back while other action active."
                 self.log_message(msg)
                 self.log_to_bug_report(f"WARNING - {msg} (Attempted by {self.last_action_source})")
@@ -1048,6 +4391,10 @@ class RecorderApp:
                 return
             self.playing_back = True; self.play_btn.config(text="■ STOP")
             self.log_message("Playback started...")
+            if self._use_async_engine():
+                self.log_to_bug_report(f"ACTION_DETAIL - Playback task starting on async engine... (Source: {self.last_action_source})")
+                self._get_engine().spawn('playback', self.playback_async())
+                return
             self.log_to_bug_report(f"ACTION_DETAIL - Playback thread starting... (Source: {self.last_action_source})")
             self.playback_thread = threading.Thread(target=self.playback, daemon=True)
             self.playback_thread.start()
@@ -1056,16 +4403,21 @@ class RecorderApp:
         if self.is_editing_add_click_mode: self.cancel_add_click_mode()
         if self.auto_clicking:
             self.auto_clicking = False; self.auto_click_btn.config(text="AutoClick")
+            if self.engine is not None: self.engine.cancel('auto_click')
             self.log_message("AutoClick stopped.")
             self.log_to_bug_report(f"ACTION_DETAIL - AutoClick stopped. (Source: {self.last_action_source})")
         else:
-            if self.recording or self.playing_back:
+            if self.recording or (self.playing_back and not self._use_async_engine()):
                 msg = "Cannot auto-click while other action active."
                 self.log_message(msg)
                 self.log_to_bug_report(f"WARNING - {msg} (Attempted by {self.last_action_source})")
                 return
             self.auto_clicking = True; self.auto_click_btn.config(text="STOP Auto")
             self.log_message("AutoClick started.")
+            if self._use_async_engine():
+                self.log_to_bug_report(f"ACTION_DETAIL - AutoClick task starting on async engine... (Source: {self.last_action_source})")
+                self._get_engine().spawn('auto_click', self.auto_click_async())
+                return
             self.log_to_bug_report(f"ACTION_DETAIL - AutoClick thread starting... (Source: {self.last_action_source})")
             self.auto_click_thread = threading.Thread(target=self.auto_click_loop, daemon=True)
             self.auto_click_thread.start()
@@ -1097,6 +4449,246 @@ class RecorderApp:
             self.log_to_bug_report(f"VALIDATION - Inter-playback delay changed from '{old_val}' to '{self.inter_playback_delay_seconds_var.get()}'.")
             self._save_settings()
 
+    def validate_max_gap_and_save(self, event=None):
+        old_val = self.max_gap_seconds_var.get()
+        try:
+            val = float(old_val)
+            if val < 0: self.max_gap_seconds_var.set("0.0")
+        except ValueError: self.max_gap_seconds_var.set("2.0")
+        if old_val != self.max_gap_seconds_var.get():
+            self.log_to_bug_report(f"VALIDATION - Max gap changed from '{old_val}' to '{self.max_gap_seconds_var.get()}'.")
+            self._save_settings()
+
+    def _get_max_gap(self):
+        settings = self.settings_service.current
+        if not settings.cap_gaps:
+            return None
+        return max(0.0, settings.max_gap_seconds)
+
+    def _get_playback_projection_inputs(self):
+        settings = self.settings_service.current
+        loops = max(1, settings.loop_count) if settings.loop else 1
+        delay_s = 0.0
+        if loops > 1 and settings.inter_playback_delay:
+            delay_s = max(0.0, settings.inter_playback_delay_seconds)
+        return loops, delay_s
+
+    def compress_recording_idle_gaps(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if self.recording or self.playing_back:
+            self.log_message("Cannot compress gaps while recording or playing back.")
+            return
+        max_gap = max(0.0, self.settings_service.current.max_gap_seconds)
+        name = self.selected_recording_var.get()
+        if name and name in self.saved_recordings:
+            events = self.saved_recordings[name]
+            target_desc = f"saved recording '{name}'"
+        else:
+            name = None
+            events = self.recorded_events
+            target_desc = "the loaded recording"
+        if not events:
+            self.log_message("No recording selected or loaded to compress.")
+            return
+
+        compressed, idle_gaps = cap_event_gaps(events, max_gap)
+        if idle_gaps == 0:
+            self.log_message(f"No gaps longer than {max_gap}s found in {target_desc}.")
+            return
+        speed = self.settings_service.current.playback_speed
+        loops, delay_s = self._get_playback_projection_inputs()
+        before = estimate_playback_duration(events, speed, None, loops, delay_s)
+        after = estimate_playback_duration(compressed, speed, None, loops, delay_s)
+        summary = (f"{idle_gaps} idle gap(s) longer than {max_gap}s found in {target_desc}.\n"
+                   f"Projected run time: {format_duration(before)} -> {format_duration(after)}.\n\n"
+                   "Shorten them permanently?")
+        if not messagebox.askyesno("Compress Idle Gaps", summary, parent=self.root):
+            self.log_to_bug_report(f"INFO - User cancelled idle gap compression of {target_desc}. (Source: {self.last_action_source})")
+            return
+
+        if name is not None:
+            self.saved_recordings[name] = compressed
+            self._save_recordings(name)
+        else:
+            self.recorded_events = compressed
+        msg = f"Compressed {idle_gaps} idle gap(s) in {target_desc}. Run time {format_duration(before)} -> {format_duration(after)}."
+        self.log_message(msg)
+        self.log_to_bug_report(f"ACTION_DETAIL - {msg} (Max gap: {max_gap}s, Source: {self.last_action_source})")
+
+    def compact_recording_text(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if self.recording or self.playing_back:
+            self.log_message("Cannot compact typing while recording or playing back.")
+            return
+        name = self.selected_recording_var.get()
+        if name and name in self.saved_recordings:
+            events = self.saved_recordings[name]
+            target_desc = f"saved recording '{name}'"
+        else:
+            name = None
+            events = self.recorded_events
+            target_desc = "the loaded recording"
+        if not events:
+            self.log_message("No recording selected or loaded to compact.")
+            return
+
+        before_count = len(events)
+        compacted, runs = compact_text_runs(events)
+        if runs == 0:
+            self.log_message(f"No typed text found to compact in {target_desc}.")
+            return
+        if name is not None:
+            self.saved_recordings[name] = compacted
+            self._save_recordings(name)
+        else:
+            self.recorded_events = compacted
+        msg = f"Compacted {runs} typed text run(s) in {target_desc}: {before_count} -> {len(compacted)} events."
+        self.log_message(msg)
+        self.log_to_bug_report(f"ACTION_DETAIL - {msg} (Source: {self.last_action_source})")
+
+    def collapse_recording_key_repeats(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if self.recording or self.playing_back:
+            self.log_message("Cannot collapse held keys while recording or playing back.")
+            return
+        name = self.selected_recording_var.get()
+        if name and name in self.saved_recordings:
+            events = self.saved_recordings[name]
+            target_desc = f"saved recording '{name}'"
+        else:
+            name = None
+            events = self.recorded_events
+            target_desc = "the loaded recording"
+        if not events:
+            self.log_message("No recording selected or loaded to collapse.")
+            return
+
+        before_count = len(events)
+        collapsed, holds = collapse_key_repeats(events)
+        if holds == 0:
+            self.log_message(f"No held keys with auto-repeat found in {target_desc}.")
+            return
+        if name is not None:
+            self.saved_recordings[name] = collapsed
+            self._save_recordings(name)
+        else:
+            self.recorded_events = collapsed
+        msg = f"Collapsed {holds} held key(s) in {target_desc}: {before_count} -> {len(collapsed)} events."
+        self.log_message(msg)
+        self.log_to_bug_report(f"ACTION_DETAIL - {msg} (Source: {self.last_action_source})")
+
+    def open_transform_dialog(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if getattr(self, 'transform_window', None) is not None and self.transform_window.winfo_exists():
+            self.transform_window.lift()
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Coordinate Transform")
+        win.config(bg=ROOT_BG)
+        win.resizable(False, False)
+        self.transform_window = win
+        current = self.coord_transform
+        screen_w, screen_h = self.screen_bounds[2] + 1, self.screen_bounds[3] + 1
+
+        fields = {}
+        rows = (("Offset X:", 'offset_x', current.offset_x), ("Offset Y:", 'offset_y', current.offset_y),
+                ("Scale X:", 'scale_x', current.scale_x), ("Scale Y:", 'scale_y', current.scale_y))
+        grid = ttk.Frame(win)
+        grid.pack(fill=tk.X, padx=5, pady=(5,1))
+        for idx, (label, field, value) in enumerate(rows):
+            fields[field] = tk.StringVar(value=str(value))
+            ttk.Label(grid, text=label, style='Dim.TLabel').grid(row=idx // 2, column=(idx % 2) * 2, sticky='w', padx=(0,2))
+            ttk.Entry(grid, textvariable=fields[field], width=8, justify='center').grid(row=idx // 2, column=(idx % 2) * 2 + 1, padx=(0,8), pady=1)
+
+        resolution_frame = ttk.Frame(win)
+        resolution_frame.pack(fill=tk.X, padx=5, pady=1)
+        from_res_var = tk.StringVar(value=f"{screen_w}x{screen_h}")
+        ttk.Label(resolution_frame, text="Recorded at:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(resolution_frame, textvariable=from_res_var, width=10, justify='center').pack(side=tk.LEFT, padx=(2,5))
+
+        def scale_from_resolution():
+            try:
+                rec_w, rec_h = (int(v) for v in from_res_var.get().lower().split('x'))
+                fields['scale_x'].set(f"{screen_w / rec_w:.6g}")
+                fields['scale_y'].set(f"{screen_h / rec_h:.6g}")
+            except (ValueError, ZeroDivisionError):
+                messagebox.showerror("Coordinate Transform", "Enter the recorded resolution as WIDTHxHEIGHT, e.g. 1920x1080.", parent=win)
+
+        ttk.Button(resolution_frame, text=f"Scale to {screen_w}x{screen_h}", command=scale_from_resolution).pack(side=tk.LEFT, padx=2)
+
+        clamp_var = tk.IntVar(value=int(current.clamp))
+        ttk.Checkbutton(win, text="Clamp to screen (or to the target monitors below)", variable=clamp_var).pack(anchor='w', padx=5, pady=1)
+        ttk.Label(win, text="Monitor remap (left,top,width,height>left,top,width,height; ...):", style='Dim.TLabel').pack(anchor='w', padx=5)
+        monitor_var = tk.StringVar(value=format_monitor_map(current.monitor_map))
+        ttk.Entry(win, textvariable=monitor_var, width=60).pack(fill=tk.X, padx=5, pady=1)
+
+        def read_transform():
+            try:
+                return CoordinateTransform(offset_x=float(fields['offset_x'].get()), offset_y=float(fields['offset_y'].get()),
+                                           scale_x=float(fields['scale_x'].get()), scale_y=float(fields['scale_y'].get()),
+                                           clamp=bool(clamp_var.get()), monitor_map=parse_monitor_map(monitor_var.get()))
+            except ValueError as e:
+                messagebox.showerror("Coordinate Transform", f"Invalid transform: {e}", parent=win)
+                return None
+
+        def save_for_playback():
+            transform = read_transform()
+            if transform is None: return
+            self.coord_transform = transform
+            self.coord_transform_var.set(1)
+            self._save_settings()
+            self.log_message("Coordinate transform will be applied at playback.")
+            self.log_to_bug_report(f"ACTION_DETAIL - Coordinate transform saved for playback: {transform}")
+
+        def write_into_recording():
+            transform = read_transform()
+            if transform is None: return
+            self.bake_coordinate_transform(transform, parent=win)
+
+        def reset():
+            for field, value in zip(CoordinateTransform._fields, IDENTITY_TRANSFORM):
+                if field in fields: fields[field].set(str(value))
+            clamp_var.set(0)
+            monitor_var.set("")
+
+        button_frame = ttk.Frame(win)
+        button_frame.pack(fill=tk.X, padx=5, pady=(1,5))
+        ttk.Button(button_frame, text="Reset", command=reset, width=6).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Write into Recording", command=write_into_recording).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(button_frame, text="Use at Playback", command=save_for_playback).pack(side=tk.RIGHT, padx=2)
+        self.log_to_bug_report("ACTION - Coordinate transform dialog opened.")
+
+    def bake_coordinate_transform(self, transform, parent=None):
+        if self.recording or self.playing_back:
+            self.log_message("Cannot transform a recording while recording or playing back.")
+            return
+        name = self.selected_recording_var.get()
+        if name and name in self.saved_recordings:
+            events = self.saved_recordings[name]
+            target_desc = f"saved recording '{name}'"
+        else:
+            name = None
+            events = self.recorded_events
+            target_desc = "the loaded recording"
+        if not events:
+            self.log_message("No recording selected or loaded to transform.")
+            return
+        positional = sum(1 for event in events if event[0] in POSITIONAL_EVENTS)
+        if not messagebox.askyesno("Coordinate Transform", f"Rewrite the coordinates of {positional} mouse events in {target_desc}?",
+                                   parent=parent or self.root):
+            return
+        start = time.perf_counter()
+        transformed = apply_coordinate_transform(events, transform, self.screen_bounds)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if name is not None:
+            self.saved_recordings[name] = transformed
+            self._save_recordings(name)
+        else:
+            self.recorded_events = transformed
+        msg = f"Transformed {positional} mouse events in {target_desc}."
+        self.log_message(msg)
+        self.log_to_bug_report(f"ACTION_DETAIL - {msg} ({elapsed_ms:.1f}ms, {transform}, Source: {self.last_action_source})")
+
     def _validate_and_save_loop_count(self, event=None):
         old_val = self.loop_count_var.get()
         try:
@@ -1139,114 +4731,1718 @@ class RecorderApp:
         elif display_val < 0: self.playback_speed_label.config(text=f"{1 + abs(display_val)}x Slower")
         else: self.playback_speed_label.config(text="0x (Paused)")
 
-    def playback(self):
-        loop_enabled = self.loop_var.get() == 1
-        try:
-            loop_count_str = self.loop_count_var.get()
-            loop_count = int(loop_count_str)
-            loop_count = max(1, loop_count)
-        except ValueError:
-            loop_count = 1
-            self.log_to_bug_report(f"PLAYBACK_DETAIL - Loop count invalid ('{loop_count_str}'), defaulting to 1. Loop enabled: {loop_enabled}")
-
-        loop_iterations = loop_count if loop_enabled else 1
+    def _get_inter_loop_delay(self):
+        settings = self.settings_service.current
+        return settings.inter_playback_delay_seconds if settings.inter_playback_delay else 0.0
+
+    def _interruptible_wait(self, seconds):
+        end_time = time.time() + seconds
+        while time.time() < end_time:
+            if not self.playing_back: return False
+            time.sleep(min(0.05, max(0, end_time - time.time())))
+        return self.playing_back
+
+    def _dispatch_event(self, event, event_idx):
+        event_type = event[0]
+        if event_type == 'mouse_click':
+            _, x, y, btn_data, pressed, _ = event
+            btn_play = resolve_button(btn_data)
+            if btn_play is None: self.log_to_bug_report(f"PLAYBACK_WARN - Unknown button data '{btn_data}' for event {event_idx+1}."); return False
+            controller = get_mouse_controller()
+            controller.position = (x,y)
+            if pressed: controller.press(btn_play)
+            else: controller.release(btn_play)
+        elif event_type == 'mouse_move':
+            _, x, y, _ = event; get_mouse_controller().position = (x,y)
+        elif event_type == 'mouse_scroll':
+            _, x, y, dx, dy, _ = event; controller = get_mouse_controller(); controller.position = (x,y); controller.scroll(dx,dy)
+        elif event_type == 'key_press':
+            _, key_data, _ = event
+            key_play = resolve_key(key_data)
+            if key_play is None: self.log_to_bug_report(f"PLAYBACK_WARN - Unknown key press data '{key_data}' for event {event_idx+1}."); return False
+            get_keyboard_controller().press(key_play)
+        elif event_type == 'key_release':
+            _, key_data, _ = event
+            key_play = resolve_key(key_data)
+            if key_play is None: self.log_to_bug_report(f"PLAYBACK_WARN - Unknown key release data '{key_data}' for event {event_idx+1}."); return False
+            get_keyboard_controller().release(key_play)
+        elif event_type == 'type_text':
+            self._type_text(event[1], event[2])
+        elif event_type == 'mouse_tap':
+            _, x, y, btn_data, _ = event
+            btn_play = resolve_button(btn_data)
+            if btn_play is None: self.log_to_bug_report(f"PLAYBACK_WARN - Unknown button data '{btn_data}' for event {event_idx+1}."); return False
+            controller = get_mouse_controller()
+            controller.position = (x, y)
+            controller.press(btn_play)
+            controller.release(btn_play)
+        elif event_type in DATA_SLOT_EVENTS:
+            self.log_to_bug_report(f"PLAYBACK_WARN - Data slot at event {event_idx+1} skipped: slots are only filled by a batch run.")
+            return False
+        return True
+
+    def _type_text_gaps(self, gaps_ms):
+        settings = self.settings_service.current
+        if settings.typing_cps > 0:
+            return [1.0 / settings.typing_cps] * len(gaps_ms)
+        if settings.replay_with_original and settings.playback_speed > 0:
+            return [gap / 1000 / settings.playback_speed for gap in gaps_ms]
+        if settings.replay_with_original and settings.playback_speed < 0:
+            return [gap / 1000 * (1 + abs(settings.playback_speed)) for gap in gaps_ms]
+        return [0.0] * len(gaps_ms)
+
+    def _type_text(self, text, gaps_ms):
+        controller = get_keyboard_controller()
+        gaps = self._type_text_gaps(gaps_ms)
+        for idx, char in enumerate(text):
+            if idx:
+                if not self.playing_back: return
+                if gaps[idx - 1] > 0: precise_wait(gaps[idx - 1])
+            controller.press(char)
+            controller.release(char)
+
+    def _playback_steps(self, events, loop_iterations, max_gap=None, pacer=None, inter_loop_delay=0.0, speed=None):
+        # Chains the playback pipeline; the thread and async engine runners consume the same steps.
+        settings = self.settings_service.current
+        options = settings.pipeline
+        steps = source_stage(events, loop_iterations, inter_loop_delay)
+        steps = key_hold_stage(steps, settings.key_hold_repeat)
+        if max_gap is not None:
+            steps = gap_cap_stage(steps, max_gap)
+        if options.exclude_types:
+            steps = filter_stage(steps, lambda event, excluded=frozenset(options.exclude_types): event[0] not in excluded)
+        steps = filter_stage(steps, lambda event: event[0] != 'mouse_move' or self.move_mouse)
+        if settings.coord_transform and settings.transform != IDENTITY_TRANSFORM:
+            steps = coordinate_stage(steps, settings.transform, self.screen_bounds)
+        if options.key_map:
+            steps = key_map_stage(steps, options.key_map)
+        if options.jitter_px or options.jitter_ms:
+            steps = jitter_stage(steps, options.jitter_px, options.jitter_ms)
+        if pacer is not None and not settings.replay_with_original:
+            steps = coalesce_moves_stage(steps)
+        return timing_stage(steps, lambda: self.settings_service.current, speed, pacer)
+
+    def _dispatch_tracked(self, event, event_idx, pacer):
+        call_start = time.perf_counter()
+        dispatched = self._dispatch_event(event, event_idx)
+        call_latency = time.perf_counter() - call_start
+        if dispatched:
+            metrics.observe('playback.controller_call_ms', call_latency * 1000)
+            metrics.inc(f"playback.{event[0]}")
+            if pacer is not None: pacer.record(event, call_latency)
+        return dispatched
+
+    def _after_dispatch(self, loop_idx, loop_iterations, event_idx, event_count):
+        self.playback_progress = (loop_idx + 1, loop_iterations, event_idx + 1, event_count)
+        if self.flight_recorder is not None:
+            self.flight_recorder.set_position(*self.playback_progress)
+        metrics.set_gauge('playback.remaining_events', event_count - event_idx - 1)
+        if self.pending_command_time is not None:
+            self._report_command_latency(time.perf_counter())
+        if self.control_server is not None and time.perf_counter() - self._last_progress_publish >= 0.2:
+            self._last_progress_publish = time.perf_counter()
+            self._publish_progress('progress')
+
+    def _report_dispatch_error(self, error, event_idx, event_type):
+        err_msg = f"Playback error on event {event_idx+1} ({event_type}): {error}"
+        self.log_message(err_msg)
+        self.log_to_bug_report(f"ERROR - {err_msg}\n{traceback.format_exc()}")
+        if self.playing_back:
+            self.root.after(0, lambda err=error: self.handle_playback_error(err))
 
-        for i in range(loop_iterations):
-            self.log_to_bug_report(f"PLAYBACK_DETAIL - Starting loop iteration {i+1} of {loop_iterations}.")
+    def _play_events(self, events, loop_iterations, max_gap=None, pacer=None, inter_loop_delay=0.0, speed=None):
+        loop_idx = 0
+        skip_rest_of_loop = False
+        for step in self._playback_steps(events, loop_iterations, max_gap, pacer, inter_loop_delay, speed):
+            kind = step[0]
             if not self.playing_back:
-                self.log_to_bug_report("PLAYBACK_DETAIL - Playback flag became false, breaking loop.")
+                self.log_to_bug_report(f"PLAYBACK_DETAIL - Playback flag became false during loop {loop_idx+1}, stopping.")
                 break
-            start_time = prev_time = None
-            for event_idx, event in enumerate(self.recorded_events):
+            if kind == 'loop':
+                loop_idx = step[1]; skip_rest_of_loop = False
+                self.log_to_bug_report(f"PLAYBACK_DETAIL - Starting loop iteration {loop_idx+1} of {loop_iterations}.")
+            elif skip_rest_of_loop and kind != 'loop_delay':
+                continue
+            elif kind == 'wait':
+                sleep_end_time = time.time() + step[1]
+                while time.time() < sleep_end_time:
+                    if not self.playing_back: break
+                    time.sleep(min(0.01, sleep_end_time - time.time()) if sleep_end_time - time.time() > 0 else 0)
+                metrics.observe('playback.lateness_ms', max(0.0, time.time() - sleep_end_time) * 1000)
+            elif kind == 'sleep':
+                time.sleep(step[1])
+            elif kind == 'spin':
+                precise_wait(step[1])
+            elif kind == 'pause':
+                self.log_to_bug_report("PLAYBACK_DETAIL - Playback paused (speed 0x).")
+                while self.playing_back and self.settings_service.current.playback_speed == 0: time.sleep(0.05)
                 if not self.playing_back:
-                    self.log_to_bug_report(f"PLAYBACK_DETAIL - Playback flag became false during event processing (event {event_idx+1}), breaking inner loop.")
+                    self.log_to_bug_report("PLAYBACK_DETAIL - Playback stopped during pause.")
                     break
-                event_type, timestamp = event[0], event[-1]
-                if self.replay_with_original.get() == 1:
-                    if start_time is None: start_time = prev_time = timestamp
-                    else:
-                        time_to_wait = timestamp - prev_time
-                        speed = self.playback_speed_var.get()
-                        eff_wait = 0
-                        if speed > 0: eff_wait = max(0.0001, time_to_wait / speed)
-                        elif speed < 0: eff_wait = time_to_wait * (1 + abs(speed))
-                        else:
-                            self.log_to_bug_report("PLAYBACK_DETAIL - Playback paused (speed 0x).")
-                            while self.playing_back and self.playback_speed_var.get() == 0: time.sleep(0.05)
-                            if not self.playing_back:
-                                self.log_to_bug_report("PLAYBACK_DETAIL - Playback stopped during pause.")
-                                break
-                            self.log_to_bug_report("PLAYBACK_DETAIL - Playback resumed from pause.")
-                            prev_time = timestamp; continue
-                        if eff_wait > 0:
-                            sleep_end_time = time.time() + eff_wait
-                            while time.time() < sleep_end_time:
-                                if not self.playing_back: break
-                                time.sleep(min(0.01, sleep_end_time - time.time()) if sleep_end_time - time.time() > 0 else 0)
-                        prev_time = timestamp
-                else: time.sleep(0.001)
-                if not self.playing_back: break
-
+                self.log_to_bug_report("PLAYBACK_DETAIL - Playback resumed from pause.")
+            elif kind == 'loop_delay':
+                delay_log_msg = f"Inter-loop delay: Waiting {step[1]}s..."
+                self.log_to_bug_report(f"PLAYBACK_DETAIL - {delay_log_msg}")
+                self.log_message(delay_log_msg)
+                if not self._interruptible_wait(step[1]):
+                    self.log_to_bug_report("PLAYBACK_DETAIL - Stopped during inter-loop delay.")
+                    break
+            elif kind == 'checkpoint':
+                _, event_idx, event = step
+                waiter = self._create_checkpoint_waiter(event, event_idx)
+                deadline = time.perf_counter() + self._checkpoint_timeout(event)
+                while waiter is not None and self.playing_back and not waiter.poll():
+                    if time.perf_counter() >= deadline:
+                        waiter = None; break
+                    time.sleep(min(waiter.interval, max(0.0, deadline - time.perf_counter())))
+                if not self._finish_checkpoint(waiter, event, event_idx): break
+                self._after_dispatch(loop_idx, loop_iterations, event_idx, len(events))
+            elif kind == 'event':
+                _, event_idx, event = step
                 try:
-                    if event_type == 'mouse_click':
-                        _, x, y, btn_data, pressed, _ = event
-                        btn_play = None
-                        if isinstance(btn_data, dict) and '__button__' in btn_data: btn_play = getattr(Button,btn_data['__button__'],None)
-                        elif isinstance(btn_data, str): btn_play = getattr(Button, btn_data, None)
-                        if btn_play is None: self.log_to_bug_report(f"PLAYBACK_WARN - Unknown button data '{btn_data}' for event {event_idx+1}."); continue
-                        mouse_controller.position = (x,y)
-                        if pressed: mouse_controller.press(btn_play)
-                        else: mouse_controller.release(btn_play)
-                    elif event_type == 'mouse_move' and self.move_mouse:
-                        _, x, y, _ = event; mouse_controller.position = (x,y)
-                    elif event_type == 'mouse_scroll':
-                        _, x, y, dx, dy, _ = event; mouse_controller.position = (x,y); mouse_controller.scroll(dx,dy)
-                    elif event_type == 'key_press':
-                        _, key_data, _ = event; key_play = None
-                        if hasattr(Key, key_data): key_play = getattr(Key, key_data)
-                        elif isinstance(key_data, str) and len(key_data)>0: key_play = key_data
-                        if key_play is None: self.log_to_bug_report(f"PLAYBACK_WARN - Unknown key press data '{key_data}' for event {event_idx+1}."); continue
-                        keyboard_controller.press(key_play)
-                    elif event_type == 'key_release':
-                        _, key_data, _ = event; key_play = None
-                        if hasattr(Key, key_data): key_play = getattr(Key, key_data)
-                        elif isinstance(key_data, str) and len(key_data)>0: key_play = key_data
-                        if key_play is None: self.log_to_bug_report(f"PLAYBACK_WARN - Unknown key release data '{key_data}' for event {event_idx+1}."); continue
-                        keyboard_controller.release(key_play)
+                    self._dispatch_tracked(event, event_idx, pacer)
+                    self._after_dispatch(loop_idx, loop_iterations, event_idx, len(events))
                 except Exception as e:
-                    err_msg = f"Playback error on event {event_idx+1} ({event_type}): {e}"
-                    self.log_message(err_msg)
-                    self.log_to_bug_report(f"ERROR - {err_msg}\n{traceback.format_exc()}")
-                    if self.playing_back:
-                        self.root.after(0, lambda err=e: self.handle_playback_error(err))
-                    break
-
+                    self._report_dispatch_error(e, event_idx, event[0])
+                    skip_rest_of_loop = True
+
+    async def _play_events_async(self, events, loop_iterations, max_gap=None, pacer=None, inter_loop_delay=0.0, speed=None):
+        engine = self.engine
+        loop_idx = 0
+        skip_rest_of_loop = False
+        for step in self._playback_steps(events, loop_iterations, max_gap, pacer, inter_loop_delay, speed):
+            kind = step[0]
             if not self.playing_back:
-                self.log_to_bug_report("PLAYBACK_DETAIL - Playback stopped, exiting outer loop.")
+                self.log_to_bug_report(f"PLAYBACK_DETAIL - Playback flag became false during loop {loop_idx+1}, stopping.")
                 break
-            if loop_enabled and self.inter_playback_delay_var.get() == 1 and i < loop_iterations - 1:
+            if kind == 'loop':
+                loop_idx = step[1]; skip_rest_of_loop = False
+                self.log_to_bug_report(f"PLAYBACK_DETAIL - Starting loop iteration {loop_idx+1} of {loop_iterations} (async engine).")
+            elif skip_rest_of_loop and kind != 'loop_delay':
+                continue
+            elif kind in ('wait', 'sleep', 'spin'):
+                deadline = engine.loop.time() + step[1]
+                await engine.sleep(step[1])
+                if kind == 'wait':
+                    metrics.observe('playback.lateness_ms', max(0.0, engine.loop.time() - deadline) * 1000)
+            elif kind == 'pause':
+                self.log_to_bug_report("PLAYBACK_DETAIL - Playback paused (speed 0x).")
+                while self.playing_back and self.settings_service.current.playback_speed == 0: await asyncio.sleep(0.05)
+                if not self.playing_back: break
+                self.log_to_bug_report("PLAYBACK_DETAIL - Playback resumed from pause.")
+            elif kind == 'loop_delay':
+                delay_log_msg = f"Inter-loop delay: Waiting {step[1]}s..."
+                self.log_to_bug_report(f"PLAYBACK_DETAIL - {delay_log_msg}")
+                self.log_message(delay_log_msg)
+                await engine.sleep(step[1])
+            elif kind == 'checkpoint':
+                _, event_idx, event = step
+                waiter = self._create_checkpoint_waiter(event, event_idx)
+                deadline = time.perf_counter() + self._checkpoint_timeout(event)
+                # Screen grabs run on the loop's default executor so they never hold up the controller thread.
+                while waiter is not None and self.playing_back and not await engine.loop.run_in_executor(None, waiter.poll):
+                    if time.perf_counter() >= deadline:
+                        waiter = None; break
+                    await engine.sleep(min(waiter.interval, max(0.0, deadline - time.perf_counter())))
+                if not self._finish_checkpoint(waiter, event, event_idx): break
+                self._after_dispatch(loop_idx, loop_iterations, event_idx, len(events))
+            elif kind == 'event':
+                _, event_idx, event = step
                 try:
-                    delay_s = float(self.inter_playback_delay_seconds_var.get())
-                    if delay_s > 0:
-                        delay_log_msg = f"Inter-loop delay: Waiting {delay_s}s..."
-                        self.log_to_bug_report(f"PLAYBACK_DETAIL - {delay_log_msg}")
-                        self.log_message(delay_log_msg)
-                        end_time = time.time() + delay_s
-                        while time.time() < end_time:
-                            if not self.playing_back: self.log_to_bug_report("PLAYBACK_DETAIL - Stopped during inter-loop delay."); break
-                            time.sleep(0.05)
-                        if not self.playing_back: break
-                except ValueError:
-                    self.log_to_bug_report(f"PLAYBACK_WARN - Invalid inter-loop delay value '{self.inter_playback_delay_seconds_var.get()}'. Skipping.")
+                    await engine.call(self._dispatch_tracked, event, event_idx, pacer)
+                    self._after_dispatch(loop_idx, loop_iterations, event_idx, len(events))
+                except Exception as e:
+                    self._report_dispatch_error(e, event_idx, event[0])
+                    skip_rest_of_loop = True
+
+    def _get_screen_source(self):
+        if self.screen_source is None:
+            try:
+                self.screen_source = create_screen_source(self.screen_source_kind, self.screen_file)
+            except Exception as e:
+                self.log_to_bug_report(f"ERROR - Creating screen source '{self.screen_source_kind}': {e}\n{traceback.format_exc()}")
+        return self.screen_source
+
+    def _checkpoint_timeout(self, event):
+        return float(event[3]) if len(event) > 4 and event[3] else self.settings_service.current.checkpoint_timeout
+
+    def _create_checkpoint_waiter(self, event, event_idx):
+        source = self._get_screen_source()
+        if source is None:
+            self.log_to_bug_report(f"PLAYBACK_WARN - Checkpoint {event_idx+1}: no screen source available (install Pillow or set a screen file).")
+            return None
+        self.checkpoint_wait_start = time.perf_counter()
+        return FingerprintWaiter(source, event[1], event[2])
+
+    def _finish_checkpoint(self, waiter, event, event_idx):
+        # Returns False (and stops playback) when the checkpoint could not be satisfied.
+        if not self.playing_back:
+            return False
+        if waiter is None:
+            # No waiter at all means no screen source; a waiter dropped after its deadline is a real timeout.
+            if self.screen_source is None:
+                msg = f"Checkpoint {event_idx+1} cannot be checked: no screen source (install Pillow or set a screen file). Playback stopped."
+            else:
+                msg = f"Checkpoint {event_idx+1} not reached within {self._checkpoint_timeout(event):g}s. Playback stopped."
+            self.log_message(msg)
+            self.log_to_bug_report(f"PLAYBACK_WARN - {msg} Region {list(event[1])}, fingerprint {event[2]}.")
+            self.playing_back = False
+            return False
+        waited_ms = (time.perf_counter() - self.checkpoint_wait_start) * 1000
+        metrics.observe('playback.checkpoint_wait_ms', waited_ms)
+        self.log_to_bug_report(f"PLAYBACK_DETAIL - Checkpoint {event_idx+1} matched after {waited_ms:.0f}ms ({waiter.polls} polls).")
+        return True
+
+    def _report_command_latency(self, first_event_time):
+        latency_ms = (first_event_time - self.pending_command_time) * 1000
+        self.pending_command_time = None
+        self.last_command_latency_ms = latency_ms
+        self.log_to_bug_report(f"PLAYBACK_DETAIL - Command-to-first-event latency: {latency_ms:.2f}ms.")
+        self._publish_progress('first_event', latency_ms=round(latency_ms, 3))
+
+    def _publish_progress(self, kind, **extra):
+        if self.control_server is None or not self.control_server.has_subscribers(): return
+        message = {'event': kind, 'playing_back': self.playing_back}
+        if self.playback_progress is not None:
+            loop_idx, loops, event_idx, events = self.playback_progress
+            message.update(loop=loop_idx, loops=loops, event_index=event_idx, events=events)
+        message.update(extra)
+        self.control_server.publish(message)
+
+    def get_control_status(self):
+        status = {'recording': self.recording, 'playing_back': self.playing_back, 'auto_clicking': self.auto_clicking,
+                  'loaded_recording': self.loaded_recording_name, 'events': len(self.recorded_events),
+                  'last_command_latency_ms': self.last_command_latency_ms}
+        if self.playback_progress is not None:
+            loop_idx, loops, event_idx, events = self.playback_progress
+            status['progress'] = {'loop': loop_idx, 'loops': loops, 'event_index': event_idx, 'events': events}
+        return status
+
+    def toggle_capture_buffer(self):
+        if self.capture_buffer_var.get() == 1:
+            self._start_capture_buffer()
+        else:
+            self.capture_ring = None
+            self.log_message("Background capture stopped.")
+            self.log_to_bug_report(f"ACTION_DETAIL - Background capture stopped. (Source: {self.last_action_source})")
+        self._save_settings()
+
+    def _start_capture_buffer(self):
+        if self.capture_ring is not None: return
+        self.capture_ring = CaptureRingBuffer(self.capture_max_events, self.capture_minutes * 60)
+        combo = '+'.join(sorted(keybinds['snapshot'])).upper()
+        save_hint = f"Press {combo} to save it." if combo else "Set a Snapshot keybind (Options > Change Keybinds) to save it with a key."
+        self.log_message(f"Background capture on: keeping the last {self.capture_minutes:g} min of input. {save_hint}")
+        self.log_to_bug_report(f"ACTION_DETAIL - Background capture started ({self.capture_max_events} event slots, "
+                               f"{self.capture_minutes:g} min window).")
+
+    def _capture_snapshot_events(self, start_ago=None, end_ago=0.0):
+        events = self.capture_ring.snapshot(start_ago, end_ago)
+        # Leave out the snapshot keybind's own key presses at the end.
+        while events and events[-1][0] in ('key_press', 'key_release') and events[-1][1] in keybinds['snapshot']:
+            events.pop()
+        return events
+
+    def snapshot_capture_buffer(self, start_ago=None, end_ago=0.0, name=None):
+        if self.capture_ring is None:
+            self.log_message("Background capture is off (Options > Background Capture).")
+            return
+        events = self._capture_snapshot_events(start_ago, end_ago)
+        if not events:
+            self.log_message("Capture buffer has no events in that time window.")
+            return
+        name = name or f"capture {datetime.now().strftime('%Y-%m-%d %H-%M-%S')}"
+        # Called from the keyboard listener as well; saving and the combobox belong to the Tk thread.
+        self.root.after(0, self._save_capture_snapshot, name, events)
+
+    def _save_capture_snapshot(self, name, events):
+        if self.playing_back and name in self.saved_recordings:
+            self.log_message(f"Cannot overwrite '{name}' during playback.")
+            return
+        self.saved_recordings[name] = events
+        self._save_recordings(name)
+        self._update_recording_combobox()
+        msg = f"Saved the last {format_duration(events[-1][-1] - events[0][-1])} of input as '{name}' ({len(events)} events)."
+        self.log_message(msg)
+        self.log_to_bug_report(f"ACTION_DETAIL - {msg} (Source: {self.last_action_source})")
+
+    def open_capture_snapshot_dialog(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if self.capture_ring is None:
+            messagebox.showinfo("Capture Buffer", "Background capture is off. Enable 'Options > Background Capture' first.", parent=self.root)
+            return
+        if getattr(self, 'capture_window', None) is not None and self.capture_window.winfo_exists():
+            self.capture_window.lift()
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Save From Capture Buffer")
+        win.config(bg=ROOT_BG)
+        win.resizable(False, False)
+        self.capture_window = win
+        count, covered = self.capture_ring.span()
+
+        from_var = tk.StringVar(value=str(int(round(covered))))
+        to_var = tk.StringVar(value="0")
+        name_var = tk.StringVar(value=f"capture {datetime.now().strftime('%Y-%m-%d %H-%M-%S')}")
+
+        ttk.Label(win, text=f"Buffer holds {count} events from the last {format_duration(covered)}.",
+                  style='Dim.TLabel').pack(anchor='w', padx=5, pady=(5,1))
+        grid = ttk.Frame(win)
+        grid.pack(fill=tk.X, padx=5, pady=1)
+        ttk.Label(grid, text="From (seconds ago):", style='Dim.TLabel').grid(row=0, column=0, sticky='w')
+        ttk.Entry(grid, textvariable=from_var, width=8, justify='center').grid(row=0, column=1, padx=5, pady=1)
+        ttk.Label(grid, text="To (seconds ago):", style='Dim.TLabel').grid(row=1, column=0, sticky='w')
+        ttk.Entry(grid, textvariable=to_var, width=8, justify='center').grid(row=1, column=1, padx=5, pady=1)
+        ttk.Label(win, text="New recording name:", style='Dim.TLabel').pack(anchor='w', padx=5)
+
+        def save():
+            try:
+                start_ago = float(from_var.get())
+                end_ago = max(0.0, float(to_var.get()))
+            except ValueError:
+                messagebox.showerror("Capture Buffer", "From and To must be numbers of seconds.", parent=win)
+                return
+            if start_ago <= end_ago:
+                messagebox.showerror("Capture Buffer", "'From' must be further back than 'To'.", parent=win)
+                return
+            name = name_var.get().strip()
+            if not name:
+                messagebox.showerror("Capture Buffer", "Please enter a name for the recording.", parent=win)
+                return
+            self.snapshot_capture_buffer(start_ago, end_ago, name)
+            win.destroy()
+
+        bottom = ttk.Frame(win)
+        bottom.pack(fill=tk.X, padx=5, pady=(1,5))
+        ttk.Entry(bottom, textvariable=name_var, width=28).pack(side=tk.LEFT, padx=(0,5))
+        ttk.Button(bottom, text="Save", style='Green.TButton', command=save, width=8).pack(side=tk.RIGHT, padx=2)
+        self.log_to_bug_report("ACTION - Capture buffer dialog opened.")
+
+    def toggle_control_server(self):
+        if self.control_server_var.get() == 1:
+            self._start_control_server()
+        else:
+            self._stop_control_server()
+        self._save_settings()
+
+    def _start_control_server(self):
+        if self.control_server is not None: return
+        unix_path = self.control_server_socket.strip() or None
+        self.control_server = ControlServer(self, port=self.control_server_port, unix_path=unix_path)
+        self.control_server.start()
+        self.log_message(f"Control server started on {self.control_server.address()}.")
+        self.log_to_bug_report(f"ACTION_DETAIL - Control server starting on {self.control_server.address()}. (Source: {self.last_action_source})")
+
+    def _stop_control_server(self):
+        if self.control_server is None: return
+        self.control_server.stop()
+        self.control_server = None
+        self.log_message("Control server stopped.")
+        self.log_to_bug_report(f"ACTION_DETAIL - Control server stopped. (Source: {self.last_action_source})")
+
+    def collect_metrics(self):
+        metrics.set_gauge('recorded_events', len(self.recorded_events))
+        metrics.set_gauge('saved_recordings', len(self.saved_recordings))
+        cache = self.recording_store.cache.stats()
+        for field in ('bytes', 'pinned_bytes', 'hits', 'misses', 'evictions'):
+            metrics.set_gauge(f"recordings.cache_{field}", cache[field])
+        return metrics.snapshot()
+
+    def _probe_tk_latency(self, scheduled_at=None):
+        if scheduled_at is not None:
+            metrics.observe('tk.after_lateness_ms', max(0.0, (time.perf_counter() - scheduled_at - 1.0) * 1000))
+        if self.metrics_snapshot_var.get() == 1:
+            now = time.perf_counter()
+            if now - self._last_metrics_snapshot >= self.metrics_snapshot_interval:
+                self._last_metrics_snapshot = now
+                threading.Thread(target=self._write_metrics_snapshot, daemon=True).start()
+        self.root.after(1000, self._probe_tk_latency, time.perf_counter())
+
+    def _write_metrics_snapshot(self):
+        try:
+            snapshot = self.collect_metrics()
+            tmp_path = METRICS_FILE + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, indent=2)
+            os.replace(tmp_path, METRICS_FILE)
+        except Exception as e:
+            self.log_to_bug_report(f"ERROR - Writing metrics snapshot: {e}\n{traceback.format_exc()}")
+
+    def export_recordings(self, names, directory, fmt):
+        # Streams each recording from the chunk store straight into its file; several recordings are written at once.
+        start = time.perf_counter()
+        os.makedirs(directory, exist_ok=True)
+
+        def export_one(name):
+            return export_events(self.saved_recordings[name], os.path.join(directory, exchange_file_name(name, fmt)), fmt)
 
+        exported = failed = events = 0
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix="export") as pool:
+            for name, future in [(name, pool.submit(export_one, name)) for name in names]:
+                try:
+                    events += future.result()
+                    exported += 1
+                except Exception as e:
+                    failed += 1
+                    self.log_to_bug_report(f"ERROR - Exporting recording '{name}': {e}\n{traceback.format_exc()}")
+        elapsed = time.perf_counter() - start
+        msg = (f"Exported {exported} recording(s), {events} events, as {fmt} to '{directory}' in {elapsed:.2f}s"
+               + (f"; {failed} failed (see bug report)." if failed else "."))
+        self.log_message(msg)
+        self.log_to_bug_report(f"ACTION_DETAIL - {msg} (Source: {self.last_action_source})")
+
+    def import_recordings(self, paths, replace_existing=False):
+        # Each file streams into the chunk store through the validator, so any size imports in constant memory.
+        # Files with invalid events are rolled back; the others are kept. Runs on a worker thread: the library
+        # and the UI are updated on the Tk thread once every file is done.
+        self._wait_for_recordings()
+        start = time.perf_counter()
+        store = self.recording_store
+        store.codec = self.settings_service.current.recording_compression
+        messages = []
+        jobs = {}
+        for path in paths:
+            name = recording_name_from_path(path)
+            if name in jobs:
+                # Two files with the same name (a.csv, a.jsonl) would be written into one recording at once.
+                messages.append(f"Import: '{os.path.basename(path)}' skipped, '{os.path.basename(jobs[name])}' has the same name.")
+                continue
+            if name in self.saved_recordings and not replace_existing:
+                messages.append(f"Import: '{name}' already exists, skipped.")
+                continue
+            jobs[name] = path
+
+        def import_one(name, path):
+            validator = EventValidator()
+
+            def checked_events():
+                for event in iter_exchange_file(path):
+                    validator.check(event)
+                    if validator.errors: raise ValueError(f"invalid event: {validator.describe(1)}")
+                    yield event
+
+            # put() only swaps in the new manifest once every event is in, so a failed file leaves no trace.
+            store.put(name, checked_events())
+            return validator
+
+        imported = []
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix="import") as pool:
+            for name, path, future in [(name, path, pool.submit(import_one, name, path)) for name, path in jobs.items()]:
+                try:
+                    validator = future.result()
+                except Exception as e:
+                    messages.append(f"Import of '{os.path.basename(path)}' failed: {e}")
+                    self.log_to_bug_report(f"ERROR - Importing '{path}': {e}\n{traceback.format_exc()}")
+                    continue
+                imported.append(name)
+                if validator.warnings:
+                    messages.append(f"Imported '{name}' with {validator.warnings} warning(s): {validator.describe(1)}")
+        messages.append(f"Imported {len(imported)} of {len(paths)} recording file(s) in {time.perf_counter() - start:.2f}s.")
+        self.root.after(0, self._on_recordings_imported, imported, messages)
+
+    def _on_recordings_imported(self, names, messages):
+        for name in names:
+            if name not in self.recording_store.recordings: continue
+            self.saved_recordings[name] = self.recording_store.view(name)
+            self.quarantined_recordings.pop(name, None)
+        self._update_recording_combobox()
+        for msg in messages:
+            self.log_message(msg)
+        self.log_to_bug_report(f"ACTION_DETAIL - {messages[-1]} (Source: {self.last_action_source})")
+
+    def import_recordings_from_files(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        patterns = ' '.join(f"*{extension}" for extension in EXCHANGE_FORMATS.values())
+        paths = filedialog.askopenfilenames(parent=self.root, title="Import Recordings",
+                                            filetypes=[("Recording files", patterns), ("All files", "*.*")])
+        if not paths: return
+        self._wait_for_recordings()
+        existing = [recording_name_from_path(path) for path in paths if recording_name_from_path(path) in self.saved_recordings]
+        replace = bool(existing) and messagebox.askyesno(
+            "Import Recordings", f"{len(existing)} recording(s) already exist ({', '.join(existing[:5])}). Replace them?", parent=self.root)
+        self.log_message(f"Importing {len(paths)} file(s)...")
+        threading.Thread(target=lambda: self.import_recordings(list(paths), replace), daemon=True).start()
+
+    def open_export_dialog(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        self._wait_for_recordings()
+        if not self.saved_recordings:
+            self.log_message("No saved recordings to export.")
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Export Recordings")
+        win.config(bg=ROOT_BG)
+        win.resizable(False, False)
+
+        selected = self.selected_recording_var.get()
+        scope_var = tk.StringVar(value='selected' if selected in self.saved_recordings else 'all')
+        format_var = tk.StringVar(value='jsonl')
+
+        scope_frame = ttk.Frame(win)
+        scope_frame.pack(fill=tk.X, padx=5, pady=(5,1))
+        ttk.Radiobutton(scope_frame, text=f"Selected ({selected or 'none'})", value='selected', variable=scope_var,
+                        state='normal' if selected in self.saved_recordings else 'disabled').pack(side=tk.LEFT, padx=(0,6))
+        ttk.Radiobutton(scope_frame, text=f"All {len(self.saved_recordings)} recordings", value='all', variable=scope_var).pack(side=tk.LEFT)
+        format_frame = ttk.Frame(win)
+        format_frame.pack(fill=tk.X, padx=5, pady=1)
+        ttk.Label(format_frame, text="Format:", style='Dim.TLabel').pack(side=tk.LEFT)
+        for fmt, label in (('jsonl', "JSONL (one event per line)"), ('csv', "CSV"), ('binary', "Binary (compact)")):
+            ttk.Radiobutton(format_frame, text=label, value=fmt, variable=format_var).pack(side=tk.LEFT, padx=(5,0))
+
+        def run_export():
+            directory = filedialog.askdirectory(parent=win, title="Export to folder")
+            if not directory: return
+            names = [selected] if scope_var.get() == 'selected' else sorted(self.saved_recordings)
+            fmt = format_var.get()
+            win.destroy()
+            self.log_message(f"Exporting {len(names)} recording(s)...")
+            threading.Thread(target=self.export_recordings, args=(names, directory, fmt), daemon=True).start()
+
+        ttk.Button(win, text="Export...", style='Green.TButton', command=run_export, width=10).pack(anchor='e', padx=5, pady=(1,5))
+        self.log_to_bug_report("ACTION - Export dialog opened.")
+
+    def show_storage_stats(self):
+        stats = self.recording_store.stats()
+        lines = [f"Recordings: {stats['recordings']}",
+                 f"Unique chunks: {stats['unique_chunks']}",
+                 f"Events: {stats['logical_events']} in recordings, {stats['stored_events']} stored",
+                 f"Size: {stats['logical_bytes'] / 1024:.1f} KB in recordings, {stats['stored_bytes'] / 1024:.1f} KB stored, "
+                 f"{stats['disk_bytes'] / 1024:.1f} KB on disk",
+                 f"Dedup ratio: {stats['dedup_ratio']}x",
+                 f"Compression ratio: {stats['compression_ratio']}x"]
+        cache = stats['cache']
+        lines.append(f"Decoded cache: {cache['bytes'] / (1024 * 1024):.1f} of {cache['budget_bytes'] / (1024 * 1024):.0f} MB "
+                     f"({cache['chunks']} chunks), pinned {cache['pinned_bytes'] / (1024 * 1024):.1f} MB; "
+                     f"{cache['hits']} hits, {cache['misses']} misses, {cache['evictions']} evictions")
+        messagebox.showinfo("Recording Storage", "\n".join(lines), parent=self.root)
+        self.log_to_bug_report(f"ACTION - Storage stats shown: {stats}")
+
+    def show_metrics(self):
+        snapshot = self.collect_metrics()
+        lines = [f"Uptime: {format_duration(snapshot['uptime_s'])}"]
+        rss = snapshot['gauges'].get('rss_bytes')
+        if rss: lines.append(f"RSS: {rss / (1024 * 1024):.1f} MB")
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"{name}: {value}")
+        for name, summary in sorted(snapshot['histograms'].items()):
+            lines.append(f"{name}: n={summary['count']} mean={summary['mean_ms']} p99<={summary['p99_ms']} max={summary['max_ms']}")
+        messagebox.showinfo("Metrics", "\n".join(lines), parent=self.root)
+        self._write_metrics_snapshot()
+        self.log_to_bug_report(f"ACTION - Metrics shown and written to '{METRICS_FILE}'.")
+
+    def _profiled_threads(self):
+        targets = {}
+        for label, thread in (('capture_mouse', self.listener_mouse), ('capture_keyboard', self.listener_keyboard),
+                              ('playback', self.playback_thread)):
+            if thread is not None and thread.is_alive() and thread.ident is not None:
+                targets[thread.ident] = label
+        return targets
+
+    def toggle_profiler(self):
+        if self.profiler_var.get() == 1:
+            if self.profiler is None:
+                self.profiler = SamplingProfiler(self._profiled_threads)
+                self.profiler.start()
+                self.log_message("Sampling profiler started.")
+                self.log_to_bug_report(f"ACTION_DETAIL - Sampling profiler started. (Source: {self.last_action_source})")
+        elif self.profiler is not None:
+            self.profiler.stop()
+            try:
+                self.profiler.dump(PROFILE_FILE)
+                msg = f"Sampling profiler stopped. {self.profiler.samples} samples written to '{os.path.basename(PROFILE_FILE)}'."
+            except Exception as e:
+                msg = f"Sampling profiler stopped but the stacks could not be written: {e}"
+            self.profiler = None
+            self.log_message(msg)
+            self.log_to_bug_report(f"ACTION_DETAIL - {msg} (Source: {self.last_action_source})")
+
+    def _create_pacer(self):
+        settings = self.settings_service.current
+        if not settings.replay_with_original and settings.max_throughput:
+            self.log_to_bug_report("PLAYBACK_DETAIL - Max throughput mode enabled.")
+            return ThroughputPacer()
+        return None
+
+    def _report_pacer(self, pacer):
+        if pacer is not None and pacer.dispatched:
+            rate_msg = f"Max throughput: {pacer.dispatched} events at {pacer.events_per_second():.0f} events/s."
+            self.last_playback_events_per_second = pacer.events_per_second()
+            self.log_message(rate_msg)
+            self.log_to_bug_report(f"PLAYBACK_DETAIL - {rate_msg} Controller latency ~{(pacer.latency_ewma or 0) * 1000:.2f}ms, backoff {pacer.backoff * 1000:.2f}ms.")
+
+    def _finish_playback(self, finished_msg="Playback finished."):
+        self.pending_command_time = None
+        self._publish_progress('finished')
+        self.playback_progress = None
         if self.playing_back:
             self.playing_back = False
             if hasattr(self, 'play_btn') and self.play_btn.winfo_exists(): self.play_btn.config(text="▶ PLAY")
-            self.log_message("Playback finished.")
-            self.log_to_bug_report("ACTION_DETAIL - Playback finished naturally.")
+            self.log_message(finished_msg)
+            self.log_to_bug_report(f"ACTION_DETAIL - {finished_msg.rstrip('.')} naturally.")
         elif hasattr(self, 'play_btn') and self.play_btn.winfo_exists() and self.play_btn.cget('text') != "▶ PLAY":
                self.play_btn.config(text="▶ PLAY")
+        if self.job_queue: self.root.after(0, self._drain_job_queue)
+
+    def _prepare_playback(self):
+        settings = self.settings_service.current
+        loop_enabled = settings.loop
+        loop_iterations = max(1, settings.loop_count) if loop_enabled else 1
+        max_gap = self._get_max_gap() if settings.replay_with_original else None
+        if max_gap is not None:
+            loops, delay_s = self._get_playback_projection_inputs()
+            speed = settings.playback_speed
+            before = estimate_playback_duration(self.recorded_events, speed, None, loops, delay_s)
+            after = estimate_playback_duration(self.recorded_events, speed, max_gap, loops, delay_s)
+            projection_msg = f"Gaps capped at {max_gap}s. Projected run time: {format_duration(before)} -> {format_duration(after)}."
+            self.log_message(projection_msg)
+            self.log_to_bug_report(f"PLAYBACK_DETAIL - {projection_msg}")
+        pacer = self._create_pacer()
+        inter_loop_delay = self._get_inter_loop_delay() if loop_enabled else 0.0
+        self._mark_played(self.loaded_recording_name)
+        self._publish_progress('started', recording=self.loaded_recording_name, events=len(self.recorded_events), loops=loop_iterations)
+        return dict(loop_iterations=loop_iterations, max_gap=max_gap, pacer=pacer, inter_loop_delay=inter_loop_delay)
+
+    def dry_run_playback(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if not self.recorded_events:
+            self.log_message("No recorded events to preview.")
+            return
+        settings = self.settings_service.current
+        loop_iterations = max(1, settings.loop_count) if settings.loop else 1
+        max_gap = self._get_max_gap() if settings.replay_with_original else None
+        inter_loop_delay = self._get_inter_loop_delay() if settings.loop else 0.0
+        events = self.recorded_events
+        self.log_message("Dry run started...")
+        self.log_to_bug_report(f"ACTION_DETAIL - Dry run of {len(events)} events x{loop_iterations} loops. (Source: {self.last_action_source})")
+
+        def run():
+            try:
+                start = time.perf_counter()
+                clock = VirtualClock()
+                pacer = ThroughputPacer(clock) if not settings.replay_with_original and settings.max_throughput else None
+                steps = self._playback_steps(events, loop_iterations, max_gap, pacer, inter_loop_delay)
+                report = simulate_playback(steps, clock, lambda gaps_ms: sum(self._type_text_gaps(gaps_ms)), pacer)
+                elapsed = time.perf_counter() - start
+                self.root.after(0, lambda: self._show_dry_run_report(report, elapsed, settings))
+            except Exception as e:
+                self.log_message(f"Dry run failed: {e}")
+                self.log_to_bug_report(f"ERROR - Dry run failed: {e}\n{traceback.format_exc()}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _format_dry_run_report(self, report, elapsed, settings):
+        mode = f"recorded timing at speed {settings.playback_speed}" if settings.replay_with_original else \
+               ("max throughput" if settings.max_throughput else "1 ms per event")
+        lines = [f"Mode: {mode}", f"Total: {report.total:.3f}s ({format_duration(report.total)})" +
+                 (" - stopped at a 0x speed pause, which would wait until the speed changes" if report.paused else "")]
+        if elapsed > 0 and report.total > 0:
+            lines.append(f"Simulated in {elapsed * 1000:.1f} ms ({report.total / elapsed:,.0f}x real time)")
+        if report.checkpoints:
+            lines.append(f"{report.checkpoints} checkpoint(s) counted as matching at once; each may wait up to its timeout.")
+        lines.append("")
+        lines.append("Events by type: " + ', '.join(f"{event_type} {count}" for event_type, count in sorted(report.counts.items())))
+        lines.append("")
+        lines.append(f"{'Loop':>6} {'Start (s)':>12} {'End (s)':>12} {'Length (s)':>11} {'Delay (s)':>10}")
+        for idx, (loop_start, loop_end) in enumerate(report.loops[:200]):
+            delay = report.loops[idx + 1][0] - loop_end if idx + 1 < len(report.loops) else 0.0
+            lines.append(f"{idx + 1:>6} {loop_start:>12.3f} {loop_end:>12.3f} {loop_end - loop_start:>11.3f} {delay:>10.3f}")
+        if len(report.loops) > 200: lines.append(f"  ... {len(report.loops) - 200} more loops")
+        lines.append("")
+        lines.append(f"{'Time (s)':>12} {'Loop':>6} {'Event':>7}  Type")
+        for offset, loop_idx, event_idx, event_type in report.trace[:500]:
+            lines.append(f"{offset:>12.4f} {loop_idx + 1:>6} {event_idx + 1:>7}  {event_type}")
+        if len(report.trace) > 500: lines.append(f"  ... {len(report.trace) - 500} more trace rows (use Save Trace)")
+        return '\n'.join(lines)
+
+    def _show_dry_run_report(self, report, elapsed, settings):
+        summary = f"Dry run: {format_duration(report.total)} for {sum(report.counts.values())} events in {len(report.loops)} loop(s)."
+        self.log_message(summary)
+        self.log_to_bug_report(f"PLAYBACK_DETAIL - {summary} Simulated in {elapsed * 1000:.1f}ms, paused={report.paused}.")
+        win = tk.Toplevel(self.root)
+        win.title("Dry Run")
+        win.config(bg=ROOT_BG)
+        text = tk.Text(win, height=30, width=70, font=('Consolas', 9), wrap=tk.NONE,
+                       bg=TEXT_INPUT_BG, fg=FOREGROUND_TEXT, insertbackground=FOREGROUND_TEXT,
+                       highlightthickness=1, highlightbackground=BORDER_COLOR, highlightcolor=BORDER_COLOR, borderwidth=0, relief='flat')
+        text.insert('1.0', self._format_dry_run_report(report, elapsed, settings))
+        text.config(state=tk.DISABLED)
+        text.pack(fill=tk.BOTH, expand=True, padx=5, pady=(5,1))
+
+        def save_trace():
+            path = filedialog.asksaveasfilename(parent=win, defaultextension='.csv', filetypes=[("CSV files", "*.csv")])
+            if not path: return
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['seconds', 'loop', 'event', 'type'])
+                writer.writerows((f"{offset:.6f}", loop_idx + 1, event_idx + 1, event_type)
+                                 for offset, loop_idx, event_idx, event_type in report.trace)
+            self.log_message(f"Dry run trace saved ({len(report.trace)} rows).")
+
+        ttk.Button(win, text="Save Trace...", command=save_trace, width=12).pack(anchor='e', padx=5, pady=(1,5))
+
+    def _preflight_check(self, events):
+        # Validates the whole recording before any input is sent, so a broken event cannot stop a macro halfway.
+        validator = EventValidator(self.screen_bounds)
+        try:
+            validator.check_all(events)
+        except Exception as e:
+            self.log_message(f"Pre-flight check: recording could not be read: {e}")
+            self.log_to_bug_report(f"ERROR - Pre-flight check could not read the recording: {e}\n{traceback.format_exc()}")
+            return False
+        if validator.errors:
+            self.log_message(f"Pre-flight check failed: {validator.describe()}")
+            self.log_to_bug_report(f"PLAYBACK_WARN - Pre-flight: {validator.errors} errors, {validator.warnings} warnings: {validator.problems}")
+            return False
+        if validator.warnings:
+            self.log_message(f"Pre-flight check: {validator.warnings} warning(s), e.g. {validator.describe(1)}")
+            self.log_to_bug_report(f"PLAYBACK_WARN - Pre-flight: {validator.warnings} warnings: {validator.problems}")
+        return True
+
+    def playback(self):
+        if not self._preflight_check(self.recorded_events):
+            self._finish_playback("Playback cancelled: the recording failed its pre-flight check.")
+            return
+        options = self._prepare_playback()
+        self._play_events(self.recorded_events, **options)
+        self._report_pacer(options['pacer'])
+        self._finish_playback()
+
+    async def playback_async(self):
+        if not self._preflight_check(self.recorded_events):
+            self._finish_playback("Playback cancelled: the recording failed its pre-flight check.")
+            return
+        options = self._prepare_playback()
+        try:
+            await self._play_events_async(self.recorded_events, **options)
+        except asyncio.CancelledError:
+            self.log_to_bug_report("PLAYBACK_DETAIL - Async playback task cancelled.")
+        finally:
+            self._report_pacer(options['pacer'])
+            self._finish_playback()
+
+    def _load_playlists(self):
+        self.playlists = {}
+        if not os.path.exists(PLAYLISTS_FILE):
+            return
+        try:
+            with open(PLAYLISTS_FILE, 'r') as f:
+                self.playlists = json.load(f)
+            self.log_to_bug_report(f"INFO - Loaded {len(self.playlists)} playlists.")
+        except Exception as e:
+            self.log_message(f"Error loading playlists: {e}")
+            self.log_to_bug_report(f"ERROR - Loading playlists: {e}.\n{traceback.format_exc()}")
+            self.playlists = {}
 
+    def _save_playlists(self):
+        try:
+            with open(PLAYLISTS_FILE, 'w') as f:
+                json.dump(self.playlists, f, indent=4)
+            self.log_to_bug_report(f"INFO - Saved {len(self.playlists)} playlists successfully.")
+        except Exception as e:
+            self.log_message(f"Error saving playlists: {e}")
+            self.log_to_bug_report(f"ERROR - Saving playlists: {e}.\n{traceback.format_exc()}")
+
+    def _load_jobs(self):
+        self.jobs = []
+        if not os.path.exists(SCHEDULE_FILE):
+            return
+        try:
+            with open(SCHEDULE_FILE, 'r') as f:
+                self.jobs = json.load(f)
+            self.log_to_bug_report(f"INFO - Loaded {len(self.jobs)} scheduled jobs.")
+        except Exception as e:
+            self.log_message(f"Error loading scheduled jobs: {e}")
+            self.log_to_bug_report(f"ERROR - Loading scheduled jobs: {e}.\n{traceback.format_exc()}")
+            self.jobs = []
+
+    def _save_jobs(self):
+        try:
+            tmp_path = SCHEDULE_FILE + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.jobs, f, indent=4)
+            os.replace(tmp_path, SCHEDULE_FILE)
+            self.log_to_bug_report(f"INFO - Saved {len(self.jobs)} scheduled jobs successfully.")
+        except Exception as e:
+            self.log_message(f"Error saving scheduled jobs: {e}")
+            self.log_to_bug_report(f"ERROR - Saving scheduled jobs: {e}.\n{traceback.format_exc()}")
+
+    def _reschedule_jobs(self):
+        triggers = {}
+        for job in self.jobs:
+            if not job.get('enabled', True): continue
+            try:
+                triggers[job['name']] = parse_trigger(job['trigger'])
+            except (ValueError, KeyError) as e:
+                self.log_message(f"Scheduled job '{job.get('name')}' has an invalid trigger and will not run: {e}")
+                self.log_to_bug_report(f"ERROR - Invalid trigger for job '{job.get('name')}': {job.get('trigger')!r} ({e}).")
+        self.job_scheduler.set_jobs(triggers)
+
+    def _find_job(self, name):
+        return next((job for job in self.jobs if job['name'] == name), None)
+
+    def run_scheduled_job(self, name):
+        job = self._find_job(name)
+        if job is None or not job.get('enabled', True): return
+        if job['recording'] not in self.saved_recordings:
+            self.log_message(f"Scheduled job '{name}': recording '{job['recording']}' not found, skipped.")
+            self.log_to_bug_report(f"PLAYBACK_WARN - Scheduled job '{name}' skipped, recording '{job['recording']}' missing.")
+            return
+        busy = self.recording or self.playing_back or self.auto_clicking
+        if not busy:
+            self._start_job_playback(job)
+            return
+        policy = job.get('policy', 'skip')
+        if policy == 'skip' or (name in self.job_queue):
+            msg = f"Scheduled job '{name}' skipped: another action is running."
+            self.log_message(msg)
+            self.log_to_bug_report(f"INFO - {msg} (Policy: {policy})")
+            return
+        if policy == 'preempt' and self.playing_back and not self.recording:
+            self.job_queue.insert(0, name)
+            self.last_action_source = f"Scheduled job '{name}' (preempt)"
+            self.log_to_bug_report(f"INFO - Scheduled job '{name}' is stopping the current playback.")
+            self.toggle_playback()
+            return
+        self.job_queue.append(name)
+        self.log_message(f"Scheduled job '{name}' queued until the current action finishes.")
+        self.log_to_bug_report(f"INFO - Scheduled job '{name}' queued (Policy: {policy}, queue length {len(self.job_queue)}).")
+        if not self.playing_back: self._drain_job_queue()
+
+    def _drain_job_queue(self, from_poll=False):
+        # Playback ending drains the queue directly; recording and AutoClick are polled for until they stop.
+        if from_poll: self.job_queue_polling = False
+        if not self.job_queue: return
+        if self.recording or self.auto_clicking:
+            if not self.job_queue_polling:
+                self.job_queue_polling = True
+                self.root.after(1000, self._drain_job_queue, True)
+            return
+        if self.playing_back: return
+        job = self._find_job(self.job_queue.pop(0))
+        if job is not None and job['recording'] in self.saved_recordings:
+            self._start_job_playback(job)
+        elif self.job_queue:
+            self._drain_job_queue()
+
+    def _start_job_playback(self, job):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        item = {'recording': job['recording'], 'loops': max(1, int(job.get('loops', 1))), 'speed': job.get('speed'), 'delay_after': 0}
+        self.last_action_source = f"Scheduled job '{job['name']}'"
+        self.playing_back = True; self.play_btn.config(text="■ STOP")
+        self.log_message(f"Scheduled job '{job['name']}' started.")
+        self.log_to_bug_report(f"ACTION_DETAIL - Scheduled job '{job['name']}' starting: {item}.")
+        self.playback_thread = threading.Thread(target=self.playlist_playback, args=(f"{job['name']} (scheduled)", [item]), daemon=True)
+        self.playback_thread.start()
+
+    def open_job_scheduler(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if getattr(self, 'job_window', None) is not None and self.job_window.winfo_exists():
+            self.job_window.lift()
+            return
+        self._wait_for_recordings()
+        win = tk.Toplevel(self.root)
+        win.title("Scheduled Jobs")
+        win.config(bg=ROOT_BG)
+        win.resizable(False, False)
+        self.job_window = win
+
+        name_var = tk.StringVar()
+        recording_var = tk.StringVar()
+        trigger_var = tk.StringVar(value="every 15m")
+        loops_var = tk.StringVar(value="1")
+        speed_var = tk.StringVar(value="")
+        policy_var = tk.StringVar(value='skip')
+
+        jobs_list = tk.Listbox(win, height=8, width=80, font=('Consolas', 9), bg=TEXT_INPUT_BG, fg=FOREGROUND_TEXT,
+                               selectbackground=HIGHLIGHT_BG, selectforeground=HIGHLIGHT_FG,
+                               highlightthickness=1, highlightbackground=BORDER_COLOR, borderwidth=0, relief='flat')
+        jobs_list.pack(fill=tk.X, padx=5, pady=(5,1))
+
+        def refresh_jobs():
+            jobs_list.delete(0, tk.END)
+            for job in self.jobs:
+                next_run = self.job_scheduler.next_run(job['name']) if job.get('enabled', True) else None
+                next_text = datetime.fromtimestamp(next_run).strftime('%m-%d %H:%M:%S') if next_run else "-"
+                speed_text = "slider" if job.get('speed') is None else f"{job['speed']}x"
+                jobs_list.insert(tk.END, f"{'on ' if job.get('enabled', True) else 'off'} {job['name']}: '{job['recording']}' x{job['loops']} "
+                                         f"speed:{speed_text}  {job['trigger']}  [{job['policy']}]  next {next_text}")
+
+        def on_job_selected(event=None):
+            selection = jobs_list.curselection()
+            if not selection: return
+            job = self.jobs[selection[0]]
+            name_var.set(job['name']); recording_var.set(job['recording']); trigger_var.set(job['trigger'])
+            loops_var.set(str(job['loops'])); speed_var.set("" if job.get('speed') is None else str(job['speed']))
+            policy_var.set(job['policy'])
+
+        jobs_list.bind("<<ListboxSelect>>", on_job_selected)
+
+        row1 = ttk.Frame(win)
+        row1.pack(fill=tk.X, padx=5, pady=1)
+        ttk.Label(row1, text="Name:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(row1, textvariable=name_var, width=16).pack(side=tk.LEFT, padx=(2,5))
+        ttk.Label(row1, text="Recording:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Combobox(row1, textvariable=recording_var, state="readonly", width=18,
+                     values=self.library_search.names()).pack(side=tk.LEFT, padx=(2,5))
+        ttk.Label(row1, text="Policy:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Combobox(row1, textvariable=policy_var, state="readonly", width=8, values=JOB_POLICIES).pack(side=tk.LEFT, padx=2)
+
+        row2 = ttk.Frame(win)
+        row2.pack(fill=tk.X, padx=5, pady=1)
+        ttk.Label(row2, text="When:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(row2, textvariable=trigger_var, width=20).pack(side=tk.LEFT, padx=(2,5))
+        ttk.Label(row2, text="Loops:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(row2, textvariable=loops_var, width=4, justify='center').pack(side=tk.LEFT, padx=(2,5))
+        ttk.Label(row2, text="Speed:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(row2, textvariable=speed_var, width=4, justify='center').pack(side=tk.LEFT, padx=2)
+        ttk.Label(win, text="When: 'every 15m', 'every 30s', 'daily 02:00' or a cron expression like '*/10 8-18 * * 1-5'.",
+                  style='Dim.TLabel').pack(anchor='w', padx=5)
+
+        def commit_jobs():
+            self._save_jobs()
+            self._reschedule_jobs()
+            refresh_jobs()
+
+        def save_job():
+            name = name_var.get().strip()
+            if not name or not recording_var.get():
+                messagebox.showerror("Scheduled Jobs", "Enter a job name and pick a recording.", parent=win)
+                return
+            try:
+                parse_trigger(trigger_var.get())
+                loops = max(1, int(loops_var.get()))
+                speed = float(speed_var.get()) if speed_var.get().strip() else None
+            except ValueError as e:
+                messagebox.showerror("Scheduled Jobs", f"Invalid value: {e}", parent=win)
+                return
+            job = {'name': name, 'recording': recording_var.get(), 'loops': loops, 'speed': speed,
+                   'trigger': trigger_var.get().strip(), 'policy': policy_var.get(), 'enabled': True}
+            existing = self._find_job(name)
+            if existing is not None:
+                job['enabled'] = existing.get('enabled', True)
+                self.jobs[self.jobs.index(existing)] = job
+            else:
+                self.jobs.append(job)
+            commit_jobs()
+            self.log_message(f"Scheduled job '{name}' saved.")
+            self.log_to_bug_report(f"ACTION_DETAIL - Scheduled job saved: {job}.")
+
+        def selected_job():
+            selection = jobs_list.curselection()
+            return self.jobs[selection[0]] if selection else None
+
+        def remove_job():
+            job = selected_job()
+            if job is None: return
+            self.jobs.remove(job)
+            commit_jobs()
+            self.log_message(f"Scheduled job '{job['name']}' removed.")
+            self.log_to_bug_report(f"ACTION_DETAIL - Scheduled job '{job['name']}' removed.")
+
+        def toggle_job():
+            job = selected_job()
+            if job is None: return
+            job['enabled'] = not job.get('enabled', True)
+            commit_jobs()
+            self.log_message(f"Scheduled job '{job['name']}' {'enabled' if job['enabled'] else 'disabled'}.")
+
+        def run_now():
+            job = selected_job()
+            if job is not None: self.handle_action("run_scheduled_job", "UI Button 'Run Now' in scheduled jobs", job['name'])
+
+        button_frame = ttk.Frame(win)
+        button_frame.pack(fill=tk.X, padx=5, pady=(1,5))
+        ttk.Button(button_frame, text="Save Job", command=save_job, width=9).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Remove", command=remove_job, width=8).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="On/Off", command=toggle_job, width=7).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="▶ Run Now", style='Green.TButton', command=run_now, width=10).pack(side=tk.RIGHT, padx=2)
+        refresh_jobs()
+        self.log_to_bug_report("ACTION - Scheduled jobs editor opened.")
+
+    def _prefetch_playlist_item(self, item):
+        name = item.get('recording')
+        events = self.saved_recordings.get(name)
+        if events is None:
+            return None
+        warnings = []
+        compiled = compile_events(events, warnings)
+        for warning in warnings:
+            self.log_to_bug_report(f"PLAYBACK_WARN - Playlist item '{name}': {warning}")
+        return compiled
+
+    def start_playlist_playback(self, playlist_name):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if self.recording or self.auto_clicking or self.playing_back:
+            msg = "Cannot start playlist while other action active."
+            self.log_message(msg)
+            self.log_to_bug_report(f"WARNING - {msg} (Attempted by {self.last_action_source})")
+            return
+        items = self.playlists.get(playlist_name)
+        if not items:
+            self.log_message(f"Playlist '{playlist_name}' is empty or not found.")
+            return
+        self.playing_back = True; self.play_btn.config(text="■ STOP")
+        self.log_message(f"Playlist '{playlist_name}' started ({len(items)} items)...")
+        self.log_to_bug_report(f"ACTION_DETAIL - Playlist thread starting for '{playlist_name}'... (Source: {self.last_action_source})")
+        self.playback_thread = threading.Thread(target=self.playlist_playback, args=(playlist_name, list(items)), daemon=True)
+        self.playback_thread.start()
+
+    def playlist_playback(self, playlist_name, items):
+        prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playlist-prefetch")
+        pacer = self._create_pacer()
+        max_gap = self._get_max_gap() if self.settings_service.current.replay_with_original else None
+        inter_loop_delay = self._get_inter_loop_delay()
+        try:
+            next_future = prefetcher.submit(self._prefetch_playlist_item, items[0])
+            for idx, item in enumerate(items):
+                if not self.playing_back: break
+                compiled = next_future.result()
+                # Decode and compile the following item while this one plays.
+                next_future = prefetcher.submit(self._prefetch_playlist_item, items[idx + 1]) if idx + 1 < len(items) else None
+                if compiled is None:
+                    msg = f"Playlist '{playlist_name}': recording '{item.get('recording')}' not found, skipped."
+                    self.log_message(msg)
+                    self.log_to_bug_report(f"PLAYBACK_WARN - {msg}")
+                    continue
+                self._mark_played(item.get('recording'))
+                loops = max(1, int(item.get('loops', 1)))
+                speed = item.get('speed')
+                item_msg = f"Playlist '{playlist_name}': item {idx+1}/{len(items)} '{item.get('recording')}' x{loops}" + (f" at speed {speed}" if speed is not None else "")
+                self.log_message(item_msg)
+                self.log_to_bug_report(f"PLAYBACK_DETAIL - {item_msg} ({len(compiled)} events).")
+                self._play_events(compiled, loops, max_gap=max_gap, pacer=pacer,
+                                  inter_loop_delay=inter_loop_delay if loops > 1 else 0.0, speed=speed)
+                compiled = None
+                delay_after = float(item.get('delay_after', 0) or 0)
+                if delay_after > 0 and idx < len(items) - 1 and self.playing_back:
+                    self.log_to_bug_report(f"PLAYBACK_DETAIL - Playlist delay: waiting {delay_after}s before next item.")
+                    if not self._interruptible_wait(delay_after): break
+        except Exception as e:
+            err_msg = f"Playlist '{playlist_name}' error: {e}"
+            self.log_message(err_msg)
+            self.log_to_bug_report(f"ERROR - {err_msg}\n{traceback.format_exc()}")
+        finally:
+            prefetcher.shutdown(wait=False)
+        self._report_pacer(pacer)
+        self._finish_playback(f"Playlist '{playlist_name}' finished.")
+
+    def insert_data_slot(self, kind, columns, button='left', replace_text=''):
+        if not isinstance(self.recorded_events, list): self.recorded_events = list(self.recorded_events)
+        if kind == 'text' and replace_text:
+            # Turns typed text (after 'Compact Typed Text') equal to replace_text into a slot, keeping its timing.
+            replaced = 0
+            for idx, event in enumerate(self.recorded_events):
+                if event[0] == 'type_text' and event[1] == replace_text:
+                    self.recorded_events[idx] = ('text_slot', columns[0], event[-1])
+                    replaced += 1
+            msg = f"Replaced {replaced} typed '{replace_text}' with slot {{{columns[0]}}}." if replaced else \
+                  f"No compacted typed text equal to '{replace_text}' found (run 'Tools > Compact Typed Text' first)."
+        else:
+            timestamp = self.recorded_events[-1][-1] + 0.1 if self.recorded_events else time.time()
+            if kind == 'text':
+                self.recorded_events.append(('text_slot', columns[0], timestamp))
+                msg = f"Text slot {{{columns[0]}}} added at the end of the recording."
+            else:
+                self.recorded_events.append(('click_slot', columns[0], columns[1], button, timestamp))
+                msg = f"Click slot at ({{{columns[0]}}}, {{{columns[1]}}}) added at the end of the recording."
+        self.log_message(msg)
+        self.log_to_bug_report(f"ACTION_DETAIL - {msg} (Source: {self.last_action_source})")
+
+    def open_data_slot_dialog(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if not self.recorded_events or self.recording or self.playing_back:
+            messagebox.showwarning("Data Slots", "Load a recording (and stop recording/playback) before adding data slots.", parent=self.root)
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Insert Data Slot")
+        win.config(bg=ROOT_BG)
+        win.resizable(False, False)
+
+        kind_var = tk.StringVar(value='text')
+        column_var = tk.StringVar()
+        y_column_var = tk.StringVar()
+        button_var = tk.StringVar(value='left')
+        replace_var = tk.StringVar()
+
+        kind_frame = ttk.Frame(win)
+        kind_frame.pack(fill=tk.X, padx=5, pady=(5,1))
+        ttk.Radiobutton(kind_frame, text="Type column value", value='text', variable=kind_var).pack(side=tk.LEFT, padx=(0,6))
+        ttk.Radiobutton(kind_frame, text="Click at column coordinates", value='click', variable=kind_var).pack(side=tk.LEFT)
+        grid = ttk.Frame(win)
+        grid.pack(fill=tk.X, padx=5, pady=1)
+        rows = (("Column (text / X):", column_var), ("Y column (click):", y_column_var),
+                ("Replace typed text (optional):", replace_var))
+        for idx, (label, var) in enumerate(rows):
+            ttk.Label(grid, text=label, style='Dim.TLabel').grid(row=idx, column=0, sticky='w')
+            ttk.Entry(grid, textvariable=var, width=20).grid(row=idx, column=1, padx=5, pady=1)
+        ttk.Label(grid, text="Button (click):", style='Dim.TLabel').grid(row=len(rows), column=0, sticky='w')
+        ttk.Combobox(grid, textvariable=button_var, state="readonly", width=8,
+                     values=('left', 'right', 'middle')).grid(row=len(rows), column=1, sticky='w', padx=5, pady=1)
+
+        def add():
+            columns = [column_var.get().strip()] + ([y_column_var.get().strip()] if kind_var.get() == 'click' else [])
+            if not all(columns):
+                messagebox.showerror("Data Slots", "Enter the column name(s) to read from.", parent=win)
+                return
+            self.insert_data_slot(kind_var.get(), columns, button_var.get(), replace_var.get() if kind_var.get() == 'text' else '')
+            win.destroy()
+
+        ttk.Button(win, text="Add Slot", style='Green.TButton', command=add, width=10).pack(anchor='e', padx=5, pady=(1,5))
+        self.log_to_bug_report("ACTION - Data slot dialog opened.")
+
+    def start_batch_run(self, path, start_row=1, max_rows=None):
+        if self.recording or self.auto_clicking or self.playing_back:
+            self.log_message("Cannot start a batch run while other action active.")
+            return
+        if not self.recorded_events:
+            self.log_message("Load a recording with data slots before starting a batch run.")
+            return
+        self.playing_back = True; self.play_btn.config(text="■ STOP")
+        self.log_message(f"Batch run started from '{os.path.basename(path)}'...")
+        self.log_to_bug_report(f"ACTION_DETAIL - Batch run starting: {path}, start row {start_row}, max rows {max_rows}. (Source: {self.last_action_source})")
+        self.playback_thread = threading.Thread(target=self.batch_playback, args=(self.recorded_events, path, start_row, max_rows), daemon=True)
+        self.playback_thread.start()
+
+    def batch_playback(self, events, path, start_row=1, max_rows=None):
+        # One pass over the recording per data row. The recording is compiled once and each row only fills in
+        # the slots; rows are streamed and per-row results go to <data file>.results.csv as they finish.
+        warnings = []
+        compiled = compile_events(events, warnings)
+        for warning in warnings:
+            self.log_to_bug_report(f"PLAYBACK_WARN - Batch run: {warning}")
+        slot_positions = [idx for idx, event in enumerate(compiled) if event[0] in DATA_SLOT_EVENTS]
+        pacer = self._create_pacer()
+        max_gap = self._get_max_gap() if self.settings_service.current.replay_with_original else None
+        row_delay = self._get_inter_loop_delay()
+        results_path = os.path.splitext(path)[0] + '.results.csv'
+        done = failed = 0
+        finished_msg = "Batch run finished."
+        try:
+            with open(results_path, 'w', encoding='utf-8', newline='', buffering=1) as out:
+                writer = csv.writer(out)
+                writer.writerow(['row', 'status', 'seconds', 'error'])
+                stop = None if max_rows is None else start_row - 1 + max_rows
+                rows = itertools.islice(iter_data_rows(path), start_row - 1, stop)
+                for row_number, row in enumerate(rows, start=start_row):
+                    if not self.playing_back: break
+                    if done + failed and row_delay > 0 and not self._interruptible_wait(row_delay): break
+                    row_start = time.perf_counter()
+                    error = ''
+                    try:
+                        bound = bind_data_row(compiled, slot_positions, row)
+                    except (KeyError, ValueError, TypeError) as e:
+                        status, error = 'skipped', f"{type(e).__name__}: {e}"
+                    else:
+                        self._play_events(bound, 1, max_gap=max_gap, pacer=pacer)
+                        status = 'ok' if self.playing_back else 'stopped'
+                    seconds = time.perf_counter() - row_start
+                    metrics.observe('batch.row_ms', seconds * 1000)
+                    writer.writerow([row_number, status, f"{seconds:.3f}", error])
+                    if status == 'ok': done += 1
+                    else: failed += 1
+                    if error:
+                        self.log_to_bug_report(f"PLAYBACK_WARN - Batch row {row_number} skipped: {error}")
+                    if (done + failed) % 100 == 0:
+                        self.log_message(f"Batch run: {done + failed} rows processed ({failed} not completed).")
+            finished_msg = f"Batch run finished: {done} rows completed, {failed} skipped or stopped. Results in '{os.path.basename(results_path)}'."
+        except Exception as e:
+            finished_msg = f"Batch run stopped by an error after {done + failed} rows: {e}"
+            self.log_to_bug_report(f"ERROR - {finished_msg}\n{traceback.format_exc()}")
+        stopped_by_user = not self.playing_back
+        self._report_pacer(pacer)
+        self._finish_playback(finished_msg)
+        if stopped_by_user: self.log_message(finished_msg)
+
+    def open_batch_run_dialog(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if getattr(self, 'batch_window', None) is not None and self.batch_window.winfo_exists():
+            self.batch_window.lift()
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Batch Run From Data File")
+        win.config(bg=ROOT_BG)
+        win.resizable(False, False)
+        self.batch_window = win
+
+        path_var = tk.StringVar()
+        start_var = tk.StringVar(value="1")
+        rows_var = tk.StringVar(value="")
+        info_var = tk.StringVar()
+        needed = slot_columns(self.recorded_events) if self.recorded_events else []
+
+        def describe():
+            text = f"Slots in loaded recording: {', '.join(needed) or 'none (each row replays it unchanged)'}"
+            if path_var.get() and os.path.exists(path_var.get()):
+                try:
+                    first = next(iter_data_rows(path_var.get()), {})
+                    missing = [column for column in needed if column not in first]
+                    text += f"\nColumns in file: {', '.join(first.keys()) or 'none'}"
+                    if missing: text += f"\nMissing columns: {', '.join(missing)}"
+                except Exception as e:
+                    text += f"\nCould not read file: {e}"
+            info_var.set(text)
+
+        def browse():
+            path = filedialog.askopenfilename(parent=win, filetypes=[("Data files", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")])
+            if path:
+                path_var.set(path)
+                describe()
+
+        path_frame = ttk.Frame(win)
+        path_frame.pack(fill=tk.X, padx=5, pady=(5,1))
+        ttk.Label(path_frame, text="Data file:", style='Dim.TLabel').pack(side=tk.LEFT)
+        path_entry = ttk.Entry(path_frame, textvariable=path_var, width=40)
+        path_entry.pack(side=tk.LEFT, padx=5)
+        path_entry.bind("<FocusOut>", lambda e: describe())
+        ttk.Button(path_frame, text="Browse...", command=browse, width=9).pack(side=tk.LEFT)
+        ttk.Label(win, textvariable=info_var, style='Dim.TLabel', justify='left').pack(anchor='w', padx=5, pady=1)
+
+        bottom = ttk.Frame(win)
+        bottom.pack(fill=tk.X, padx=5, pady=(1,5))
+        ttk.Label(bottom, text="Start row:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(bottom, textvariable=start_var, width=7, justify='center').pack(side=tk.LEFT, padx=(2,5))
+        ttk.Label(bottom, text="Rows (empty = all):", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(bottom, textvariable=rows_var, width=7, justify='center').pack(side=tk.LEFT, padx=2)
+
+        def run():
+            path = path_var.get().strip()
+            if not os.path.exists(path):
+                messagebox.showerror("Batch Run", "Choose an existing CSV or JSONL file.", parent=win)
+                return
+            try:
+                start_row = max(1, int(start_var.get()))
+                max_rows = max(1, int(rows_var.get())) if rows_var.get().strip() else None
+            except ValueError:
+                messagebox.showerror("Batch Run", "Start row and rows must be whole numbers.", parent=win)
+                return
+            self.handle_action("start_batch_run", "UI Button 'Run' in batch run", path, start_row, max_rows)
+
+        ttk.Button(bottom, text="▶ Run", style='Green.TButton', command=run, width=8).pack(side=tk.RIGHT, padx=2)
+        describe()
+        self.log_to_bug_report("ACTION - Batch run dialog opened.")
+
+    def combine_recordings(self, operation, names, new_name, gap=0.5, at_seconds=0.0):
+        # Streams the sources from the chunk store into a new recording; runs on a worker thread.
+        sources = [self.saved_recordings[name] for name in names]
+        if operation == 'concat':
+            events = concat_recordings(sources, gap)
+        elif operation == 'splice':
+            events = splice_recording(sources[0], sources[1], at_seconds, gap)
+        else:
+            events = interleave_recordings(sources)
+        start = time.perf_counter()
+        store = self.recording_store
+        store.codec = self.settings_service.current.recording_compression
+        new_chunks, new_bytes = store.put(new_name, events)
+        view = store.view(new_name)
+        stats = store.stats()
+        msg = (f"'{new_name}' created from {' + '.join(names)} ({operation}): {len(view)} events, {new_chunks} new chunks, "
+               f"dedup ratio {stats['dedup_ratio']}x.")
+        self.log_to_bug_report(f"ACTION_DETAIL - {msg} ({(time.perf_counter() - start) * 1000:.0f}ms, {new_bytes} bytes written)")
+        return view, msg
+
+    def verify_library(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if getattr(self, 'verify_running', False):
+            self.log_message("Library verify already running.")
+            return
+        self._wait_for_recordings()
+        store = self.recording_store
+        with store.lock:
+            tasks = [(store.root_dir, name, [tuple(entry) for entry in manifest],
+                      {digest: store.chunk_sizes[digest] for digest, _ in manifest if digest in store.chunk_sizes}, self.screen_bounds)
+                     for name, manifest in store.recordings.items()]
+        if not tasks:
+            self.log_message("No recordings to verify.")
+            return
+        self.verify_running = True
+        self.log_message(f"Verifying {len(tasks)} recordings...")
+        self.log_to_bug_report(f"ACTION_DETAIL - Library verify of {len(tasks)} recordings started. (Source: {self.last_action_source})")
+
+        def run():
+            start = time.perf_counter()
+            results = []
+            try:
+                # Decoding and checking is CPU-bound, so larger libraries are spread over worker processes.
+                # A frozen executable would start the whole app in each worker, so it verifies in this thread.
+                if len(tasks) >= 4 and not getattr(sys, 'frozen', False):
+                    try:
+                        with ProcessPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+                            results = list(pool.map(verify_stored_recording, *zip(*tasks), chunksize=max(1, len(tasks) // 32)))
+                    except Exception as e:
+                        self.log_to_bug_report(f"WARNING - Process pool unavailable for library verify, verifying in one thread: {e}")
+                        results = []
+                if not results:
+                    results = [verify_stored_recording(*task) for task in tasks]
+                elapsed = time.perf_counter() - start
+                self.root.after(0, lambda: self._apply_verify_results(results, elapsed))
+            except Exception as e:
+                self.verify_running = False
+                self.log_message(f"Library verify failed: {e}")
+                self.log_to_bug_report(f"ERROR - Library verify failed: {e}\n{traceback.format_exc()}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _apply_verify_results(self, results, elapsed):
+        self.verify_running = False
+        store = self.recording_store
+        lines = []
+        quarantined = released = 0
+        for result in sorted(results, key=lambda r: (r['corrupt'] is None, r['warnings'] == 0, r['name'].lower())):
+            name = result['name']
+            if name not in store.recordings: continue
+            if result['corrupt']:
+                if name not in self.quarantined_recordings: quarantined += 1
+                store.update_metadata(name, corrupt=result['corrupt'])
+                self._quarantine_recording(name, result['corrupt'])
+                lines.append(f"QUARANTINED {name}: {result['corrupt']}")
+                continue
+            if name in self.quarantined_recordings:
+                released += 1
+                del self.quarantined_recordings[name]
+                self.saved_recordings[name] = store.view(name)
+                store.update_metadata(name, corrupt=None, **result['metadata'])
+            status = f"{result['warnings']} warning(s): " + '; '.join(
+                f"event {idx + 1}: {message}" for _, idx, message in result['problems'][:3]) if result['warnings'] else "ok"
+            lines.append(f"{'WARN' if result['warnings'] else 'OK'} {name} ({result['events']} events) {status}")
+        self._update_recording_combobox()
+        summary = (f"Verified {len(results)} recordings in {elapsed:.2f}s: {len(self.quarantined_recordings)} quarantined "
+                   f"({quarantined} new, {released} released), {sum(1 for r in results if r['warnings'] and not r['corrupt'])} with warnings.")
+        self.log_message(summary)
+        self.log_to_bug_report(f"INFO - {summary}")
+        metrics.observe('recordings.verify_ms', elapsed * 1000)
+
+        win = tk.Toplevel(self.root)
+        win.title("Verify Library")
+        win.config(bg=ROOT_BG)
+        ttk.Label(win, text=summary, style='Dim.TLabel').pack(anchor='w', padx=5, pady=(5,1))
+        text = tk.Text(win, height=20, width=90, font=('Consolas', 9), wrap=tk.NONE,
+                       bg=TEXT_INPUT_BG, fg=FOREGROUND_TEXT, insertbackground=FOREGROUND_TEXT,
+                       highlightthickness=1, highlightbackground=BORDER_COLOR, highlightcolor=BORDER_COLOR, borderwidth=0, relief='flat')
+        text.insert('1.0', '\n'.join(lines))
+        text.config(state=tk.DISABLED)
+        text.pack(fill=tk.BOTH, expand=True, padx=5, pady=1)
+
+        def delete_quarantined():
+            names = sorted(self.quarantined_recordings)
+            if not names or not messagebox.askyesno("Verify Library", f"Delete {len(names)} quarantined recording(s) from disk?", parent=win):
+                return
+            self.quarantined_recordings.clear()
+            self._save_recordings()
+            self.log_message(f"Deleted {len(names)} quarantined recording(s).")
+            self.log_to_bug_report(f"ACTION_DETAIL - Quarantined recordings deleted: {names}")
+
+        if self.quarantined_recordings:
+            ttk.Button(win, text="Delete Quarantined", style='Red.TButton', command=delete_quarantined, width=18).pack(anchor='e', padx=5, pady=(1,5))
+
+    def open_library_browser(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if getattr(self, 'library_window', None) is not None and self.library_window.winfo_exists():
+            self.library_window.lift()
+            return
+        self._wait_for_recordings()
+        win = tk.Toplevel(self.root)
+        win.title("Recording Library")
+        win.config(bg=ROOT_BG)
+        self.library_window = win
+        self.library_names = []
+
+        search_var = tk.StringVar()
+        tags_var = tk.StringVar()
+        count_var = tk.StringVar()
+
+        search_frame = ttk.Frame(win)
+        search_frame.pack(fill=tk.X, padx=5, pady=(5,1))
+        ttk.Label(search_frame, text="Search:", style='Dim.TLabel').pack(side=tk.LEFT)
+        search_entry = ttk.Entry(search_frame, textvariable=search_var, width=40)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Label(search_frame, textvariable=count_var, style='Dim.TLabel').pack(side=tk.RIGHT)
+
+        def format_row(idx):
+            name = self.library_names[idx]
+            info = self.recording_store.metadata.get(name, {})
+            last_played = info.get('last_played')
+            last_text = datetime.fromtimestamp(last_played).strftime('%Y-%m-%d %H:%M') if last_played else "never"
+            tags = ','.join(info.get('tags', ()))
+            return (f"{name[:28]:<28} {info.get('events', len(self.saved_recordings.get(name, ()))):>8} "
+                    f"{format_duration(info.get('duration', 0.0)):>11}  {last_text:<16}  {tags[:16]:<16}  {format_type_counts(info.get('types', {}))}")
+
+        def selected_name():
+            idx = listing.selected
+            return self.library_names[idx] if idx is not None and idx < len(self.library_names) else None
+
+        def on_select(idx):
+            name = self.library_names[idx]
+            self.selected_recording_var.set(name)
+            tags_var.set(', '.join(self.recording_store.metadata.get(name, {}).get('tags', ())))
+
+        def on_activate(idx):
+            on_select(idx)
+            self.handle_action("load_selected_recording", "Library double-click")
+
+        ttk.Label(win, text=f"{'Name':<28} {'Events':>8} {'Duration':>11}  {'Last played':<16}  {'Tags':<16}  Event types",
+                  style='Dim.TLabel', font=('Consolas', 9)).pack(anchor='w', padx=5)
+        listing = VirtualListView(win, format_row, on_select=on_select, on_activate=on_activate)
+        listing.pack(fill=tk.BOTH, expand=True, padx=5, pady=1)
+
+        def refresh(*_):
+            self.library_names = self.library_search.search(search_var.get())
+            listing.set_count(len(self.library_names))
+            count_var.set(f"{len(self.library_names)} of {len(self.library_search.entries)}")
+
+        def save_tags():
+            name = selected_name()
+            if name is None: return
+            tags = [tag.strip() for tag in tags_var.get().split(',') if tag.strip()]
+            self.recording_store.update_metadata(name, tags=tags)
+            self._update_recording_combobox()
+            self.log_message(f"Tags for '{name}' set to: {', '.join(tags) or '(none)'}.")
+            self.log_to_bug_report(f"ACTION_DETAIL - Tags for recording '{name}' set to {tags}.")
+
+        self.library_refresh = refresh
+        search_var.trace_add('write', refresh)
+
+        bottom = ttk.Frame(win)
+        bottom.pack(fill=tk.X, padx=5, pady=(1,5))
+        ttk.Label(bottom, text="Tags:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(bottom, textvariable=tags_var, width=24).pack(side=tk.LEFT, padx=(2,2))
+        ttk.Button(bottom, text="Set Tags", command=save_tags, width=9).pack(side=tk.LEFT, padx=2)
+        ttk.Button(bottom, text="Load", style='Green.TButton', width=7,
+                   command=lambda: self.handle_action("load_selected_recording", "UI Button 'Load' in library")).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(bottom, text="Delete", width=7,
+                   command=lambda: self.handle_action("delete_selected_recording", "UI Button 'Delete' in library")).pack(side=tk.RIGHT, padx=2)
+        refresh()
+        search_entry.focus_set()
+        self.log_to_bug_report(f"ACTION - Recording library opened ({len(self.library_names)} recordings).")
+
+    def open_combine_dialog(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if getattr(self, 'combine_window', None) is not None and self.combine_window.winfo_exists():
+            self.combine_window.lift()
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Combine Recordings")
+        win.config(bg=ROOT_BG)
+        win.resizable(False, False)
+        self.combine_window = win
+        source_names = []
+
+        operation_var = tk.StringVar(value='concat')
+        source_var = tk.StringVar()
+        gap_var = tk.StringVar(value="0.5")
+        at_var = tk.StringVar(value="0.0")
+        name_var = tk.StringVar()
+
+        op_frame = ttk.Frame(win)
+        op_frame.pack(fill=tk.X, padx=5, pady=(5,1))
+        for value, label in (('concat', "Concatenate"), ('splice', "Splice 2nd into 1st"), ('interleave', "Interleave")):
+            ttk.Radiobutton(op_frame, text=label, value=value, variable=operation_var).pack(side=tk.LEFT, padx=(0,6))
+
+        sources_list = tk.Listbox(win, height=5, width=50, font=('Consolas', 9), bg=TEXT_INPUT_BG, fg=FOREGROUND_TEXT,
+                                  selectbackground=HIGHLIGHT_BG, selectforeground=HIGHLIGHT_FG,
+                                  highlightthickness=1, highlightbackground=BORDER_COLOR, borderwidth=0, relief='flat')
+        sources_list.pack(fill=tk.X, padx=5, pady=1)
+
+        def refresh_sources():
+            sources_list.delete(0, tk.END)
+            for idx, name in enumerate(source_names):
+                sources_list.insert(tk.END, f"{idx+1:>2}. {name}  ({len(self.saved_recordings.get(name, ()))} events)")
+
+        def add_source():
+            if source_var.get() in self.saved_recordings:
+                source_names.append(source_var.get())
+                refresh_sources()
+
+        def remove_source():
+            selection = sources_list.curselection()
+            if selection:
+                del source_names[selection[0]]
+                refresh_sources()
+
+        pick_frame = ttk.Frame(win)
+        pick_frame.pack(fill=tk.X, padx=5, pady=1)
+        ttk.Combobox(pick_frame, textvariable=source_var, state="readonly", width=22,
+                     values=sorted(self.saved_recordings.keys())).pack(side=tk.LEFT, padx=(0,5))
+        ttk.Button(pick_frame, text="Add", command=add_source, width=6).pack(side=tk.LEFT, padx=2)
+        ttk.Button(pick_frame, text="Remove", command=remove_source, width=8).pack(side=tk.LEFT, padx=2)
+
+        option_frame = ttk.Frame(win)
+        option_frame.pack(fill=tk.X, padx=5, pady=1)
+        ttk.Label(option_frame, text="Gap (s):", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(option_frame, textvariable=gap_var, width=5, justify='center').pack(side=tk.LEFT, padx=(2,8))
+        ttk.Label(option_frame, text="Splice at (s):", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(option_frame, textvariable=at_var, width=6, justify='center').pack(side=tk.LEFT, padx=2)
+
+        def run_combine():
+            new_name = name_var.get().strip()
+            operation = operation_var.get()
+            try:
+                gap = max(0.0, float(gap_var.get()))
+                at_seconds = max(0.0, float(at_var.get()))
+            except ValueError:
+                messagebox.showerror("Combine Recordings", "Gap and splice position must be numbers.", parent=win)
+                return
+            if not new_name:
+                self.log_message("Please enter a name for the combined recording.")
+                return
+            if operation == 'splice' and len(source_names) != 2:
+                messagebox.showerror("Combine Recordings", "Splice needs exactly two recordings: the base and the one to insert.", parent=win)
+                return
+            if not source_names:
+                messagebox.showerror("Combine Recordings", "Add at least one recording.", parent=win)
+                return
+            if new_name in self.saved_recordings and not messagebox.askyesno("Combine Recordings", f"Overwrite '{new_name}'?", parent=win):
+                return
+            if self.playing_back:
+                self.log_message("Cannot combine recordings during playback.")
+                return
+            if isinstance(self.recorded_events, StoredRecording) and self.recorded_events.name == new_name:
+                self.recorded_events = list(self.recorded_events)
+            names = list(source_names)
+            self.log_message(f"Combining {len(names)} recordings into '{new_name}'...")
+
+            def worker():
+                try:
+                    view, msg = self.combine_recordings(operation, names, new_name, gap, at_seconds)
+                except Exception as e:
+                    err_msg = f"Combining recordings failed: {e}"
+                    self.log_message(err_msg)
+                    self.log_to_bug_report(f"ERROR - {err_msg}\n{traceback.format_exc()}")
+                    return
+                self.root.after(0, self._on_recording_combined, new_name, view, msg)
+
+            threading.Thread(target=worker, name="combine-recordings", daemon=True).start()
+
+        ttk.Label(win, text="New recording name:", style='Dim.TLabel').pack(anchor='w', padx=5)
+        bottom = ttk.Frame(win)
+        bottom.pack(fill=tk.X, padx=5, pady=(1,5))
+        ttk.Entry(bottom, textvariable=name_var, width=28).pack(side=tk.LEFT, padx=(0,5))
+        ttk.Button(bottom, text="Create", style='Green.TButton', command=run_combine, width=8).pack(side=tk.RIGHT, padx=2)
+        self.log_to_bug_report("ACTION - Combine recordings dialog opened.")
+
+    def _on_recording_combined(self, name, view, msg):
+        self.saved_recordings[name] = view
+        self._update_recording_combobox()
+        self.log_message(msg)
+
+    def open_playlist_editor(self):
+        if self.is_editing_add_click_mode: self.cancel_add_click_mode()
+        if getattr(self, 'playlist_window', None) is not None and self.playlist_window.winfo_exists():
+            self.playlist_window.lift()
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Playlists")
+        win.config(bg=ROOT_BG)
+        win.resizable(False, False)
+        self.playlist_window = win
+        self._playlist_edit_items = []
+
+        name_var = tk.StringVar()
+        recording_var = tk.StringVar()
+        loops_var = tk.StringVar(value="1")
+        speed_var = tk.StringVar(value="")
+        delay_var = tk.StringVar(value="0.0")
+
+        top = ttk.Frame(win)
+        top.pack(fill=tk.X, padx=5, pady=(5,1))
+        ttk.Label(top, text="Playlist:", style='Dim.TLabel').pack(side=tk.LEFT)
+        name_combo = ttk.Combobox(top, textvariable=name_var, width=20, values=sorted(self.playlists.keys()))
+        name_combo.pack(side=tk.LEFT, padx=5)
+
+        items_list = tk.Listbox(win, height=8, width=60, font=('Consolas', 9), bg=TEXT_INPUT_BG, fg=FOREGROUND_TEXT,
+                                selectbackground=HIGHLIGHT_BG, selectforeground=HIGHLIGHT_FG,
+                                highlightthickness=1, highlightbackground=BORDER_COLOR, borderwidth=0, relief='flat')
+        items_list.pack(fill=tk.X, padx=5, pady=1)
+
+        def refresh_items():
+            items_list.delete(0, tk.END)
+            for idx, item in enumerate(self._playlist_edit_items):
+                speed_text = "slider" if item.get('speed') is None else f"{item['speed']}x"
+                items_list.insert(tk.END, f"{idx+1:>2}. {item['recording']}  loops:{item['loops']}  speed:{speed_text}  then wait {item['delay_after']}s")
+
+        def on_playlist_selected(event=None):
+            self._playlist_edit_items = [dict(item) for item in self.playlists.get(name_var.get(), [])]
+            refresh_items()
+
+        name_combo.bind("<<ComboboxSelected>>", on_playlist_selected)
+
+        item_frame = ttk.Frame(win)
+        item_frame.pack(fill=tk.X, padx=5, pady=1)
+        ttk.Label(item_frame, text="Recording:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Combobox(item_frame, textvariable=recording_var, state="readonly", width=16,
+                     values=sorted(self.saved_recordings.keys())).pack(side=tk.LEFT, padx=(2,5))
+        ttk.Label(item_frame, text="Loops:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(item_frame, textvariable=loops_var, width=4, justify='center').pack(side=tk.LEFT, padx=(2,5))
+        ttk.Label(item_frame, text="Speed:", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(item_frame, textvariable=speed_var, width=4, justify='center').pack(side=tk.LEFT, padx=(2,5))
+        ttk.Label(item_frame, text="Wait (s):", style='Dim.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(item_frame, textvariable=delay_var, width=5, justify='center').pack(side=tk.LEFT, padx=2)
+
+        def add_item():
+            if not recording_var.get():
+                self.log_message("Select a recording to add to the playlist.")
+                return
+            try:
+                loops = max(1, int(loops_var.get()))
+                speed = float(speed_var.get()) if speed_var.get().strip() else None
+                delay_after = max(0.0, float(delay_var.get()))
+            except ValueError:
+                messagebox.showerror("Playlists", "Loops must be an integer, speed and wait must be numbers (leave speed empty to use the slider).", parent=win)
+                return
+            self._playlist_edit_items.append({'recording': recording_var.get(), 'loops': loops, 'speed': speed, 'delay_after': delay_after})
+            refresh_items()
+
+        def remove_item():
+            selection = items_list.curselection()
+            if selection:
+                del self._playlist_edit_items[selection[0]]
+                refresh_items()
+
+        def move_item(offset):
+            selection = items_list.curselection()
+            if not selection: return
+            idx = selection[0]; new_idx = idx + offset
+            if 0 <= new_idx < len(self._playlist_edit_items):
+                items = self._playlist_edit_items
+                items[idx], items[new_idx] = items[new_idx], items[idx]
+                refresh_items()
+                items_list.selection_set(new_idx)
+
+        def save_playlist():
+            name = name_var.get().strip()
+            if not name:
+                self.log_message("Please enter a name for the playlist.")
+                return
+            self.playlists[name] = [dict(item) for item in self._playlist_edit_items]
+            self._save_playlists()
+            name_combo['values'] = sorted(self.playlists.keys())
+            self.log_message(f"Playlist '{name}' saved ({len(self._playlist_edit_items)} items).")
+            self.log_to_bug_report(f"ACTION_DETAIL - Playlist '{name}' saved with {len(self._playlist_edit_items)} items.")
+
+        def delete_playlist():
+            name = name_var.get().strip()
+            if name not in self.playlists: return
+            if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete playlist '{name}'?", parent=win):
+                del self.playlists[name]
+                self._save_playlists()
+                name_combo['values'] = sorted(self.playlists.keys())
+                name_var.set("")
+                self._playlist_edit_items = []
+                refresh_items()
+                self.log_message(f"Playlist '{name}' deleted.")
+                self.log_to_bug_report(f"ACTION_DETAIL - Playlist '{name}' deleted.")
+
+        button_frame = ttk.Frame(win)
+        button_frame.pack(fill=tk.X, padx=5, pady=(1,5))
+        ttk.Button(button_frame, text="Add", command=add_item, width=6).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Remove", command=remove_item, width=8).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Up", command=lambda: move_item(-1), width=4).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Down", command=lambda: move_item(1), width=6).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="▶ Play", style='Green.TButton', width=8,
+                   command=lambda: self.handle_action("start_playlist_playback", "UI Button 'Play Playlist'", name_var.get().strip())).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(button_frame, text="Delete", command=delete_playlist, width=7).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(button_frame, text="Save", command=save_playlist, width=6).pack(side=tk.RIGHT, padx=2)
+        self.log_to_bug_report("ACTION - Playlist editor opened.")
 
     def handle_playback_error(self, error_exception):
         self.log_to_bug_report(f"PLAYBACK_ERROR_HANDLER - Error reported: {error_exception}")
@@ -1260,37 +6456,62 @@ class RecorderApp:
             self.log_to_bug_report("PLAYBACK_ERROR_HANDLER - User chose to continue (or ignore) after error. Playback likely already stopped.")
 
 
+    def _get_auto_click_interval(self):
+        # Validation in validate_auto_click_interval_and_save keeps the published interval >= 0.0
+        return max(0.0, self.settings_service.current.auto_click_interval)
+
+    def _auto_click_once(self):
+        controller = get_mouse_controller()
+        controller.press(Button.left)
+        controller.release(Button.left)
+
+    def _stop_auto_click_after_error(self, e):
+        self.log_to_bug_report(f"AUTOCLICK_ERROR - Error during click: {e}\n{traceback.format_exc()}")
+        self.auto_clicking = False
+        if hasattr(self, 'auto_click_btn') and self.auto_click_btn.winfo_exists():
+            self.root.after(0, lambda: self.auto_click_btn.config(text="AutoClick"))
+        self.log_message("AutoClick stopped due to error.")
+        self.log_to_bug_report("ACTION_DETAIL - AutoClick stopped due to error during click.")
+
     def auto_click_loop(self):
         while self.auto_clicking:
+            interval = self._get_auto_click_interval()
             try:
-                interval_str = self.auto_click_interval_var.get()
-                interval = float(interval_str)
-                # Validation in validate_auto_click_interval_and_save ensures interval >= 0.0
-            except ValueError:
-                # This case should ideally not be hit if validation on input works correctly
-                interval = 1.0 # Default fallback
-                self.log_to_bug_report(f"AUTOCLICK_WARN - Invalid interval string '{interval_str}' in loop (should be pre-validated), defaulting to {interval}s.")
+                self._auto_click_once()
+            except Exception as e:
+                self._stop_auto_click_after_error(e)
+                break
 
+            time.sleep(interval) # If interval is 0.0, time.sleep(0.0) will be called.
+
+    async def auto_click_async(self):
+        while self.auto_clicking:
+            interval = self._get_auto_click_interval()
             try:
-                mouse_controller.press(Button.left)
-                mouse_controller.release(Button.left)
+                await self.engine.call(self._auto_click_once)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                self.log_to_bug_report(f"AUTOCLICK_ERROR - Error during click: {e}\n{traceback.format_exc()}")
-                self.auto_clicking = False
-                if hasattr(self, 'auto_click_btn') and self.auto_click_btn.winfo_exists():
-                    self.root.after(0, lambda: self.auto_click_btn.config(text="AutoClick"))
-                self.log_message("AutoClick stopped due to error.")
-                self.log_to_bug_report("ACTION_DETAIL - AutoClick stopped due to error during click.")
+                self._stop_auto_click_after_error(e)
                 break
+            await self.engine.sleep(interval)
 
-            time.sleep(interval) # If interval is 0.0, time.sleep(0.0) will be called.
+    def _use_async_engine(self):
+        return self.settings_service.current.async_engine
+
+    def _get_engine(self):
+        if self.engine is None:
+            self.engine = AsyncEngine()
+            self.log_to_bug_report("INFO - Async engine started.")
+        return self.engine
 
     def exit_app(self):
         if self.is_editing_add_click_mode: self.cancel_add_click_mode()
 
         self.log_to_bug_report("INFO - Normal application exit process started.")
         self._save_settings()
-        self._save_recordings()
+        self.settings_service.flush()
+        self._save_recordings(*[name for name in self.saved_recordings if name not in self.recording_store.recordings])
         self.log_message("Settings saved. Exiting.")
 
         if self.listener_mouse and self.listener_mouse.running:
@@ -1300,22 +6521,130 @@ class RecorderApp:
             self.listener_keyboard.stop()
             self.log_to_bug_report("INFO - Main keyboard listener stopped.")
 
+        self._stop_control_server()
+        if self.profiler is not None:
+            self.profiler_var.set(0)
+            self.toggle_profiler()
+        if self.engine is not None:
+            self.engine.shutdown()
+            self.log_to_bug_report("INFO - Async engine stopped.")
         self.log_to_bug_report("INFO - Application shutting down gracefully.")
         self.root.quit()
 
 
+def run_startup_benchmark(runs=5):
+    # Launches the app several times in --startup-probe mode and reports phase timings and the slowest imports.
+    import statistics
+    import subprocess
+    phases = {}
+    import_totals = {}
+    for run in range(runs):
+        if getattr(sys, 'frozen', False):
+            cmd = [sys.executable, '--startup-probe']
+        else:
+            cmd = [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--startup-probe']
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        marks_line = [line for line in result.stdout.splitlines() if line.startswith('{')]
+        if not marks_line:
+            print(f"Run {run+1}: probe failed.\n{result.stderr[-2000:]}")
+            continue
+        marks = json.loads(marks_line[-1])
+        for phase, seconds in marks.get('marks', {}).items():
+            phases.setdefault(phase, []).append(seconds * 1000)
+        for module_name, seconds in marks.get('lazy_imports', {}).items():
+            phases.setdefault(f"lazy import {module_name}", []).append(seconds * 1000)
+        for line in result.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"; top-level imports have no indentation.
+            if not line.startswith('import time:') or 'cumulative' in line: continue
+            parts = line[len('import time:'):].split('|')
+            if len(parts) != 3 or parts[2].startswith('  '): continue
+            module_name = parts[2].strip()
+            import_totals.setdefault(module_name, []).append(int(parts[1]) / 1000)
+    print(f"Startup benchmark ({runs} runs, median ms since interpreter reached the script):")
+    for phase, values in sorted(phases.items(), key=lambda item: statistics.median(item[1])):
+        print(f"  {phase:<32} {statistics.median(values):8.1f}")
+    if import_totals:
+        print("Slowest top-level imports (median cumulative ms):")
+        ranked = sorted(import_totals.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+        for module_name, values in ranked[:15]:
+            print(f"  {module_name:<32} {statistics.median(values):8.1f}")
+
+
+def run_storage_benchmark():
+    # Compares the chunk encodings on the saved recordings (or a synthetic one) for size, encode time and decode throughput.
+    import tempfile
+    import shutil
+    recordings = {}
+    store = ChunkStore(RECORDINGS_STORE_DIR)
+    if store.exists():
+        store.load_index()
+        recordings = {name: store.get(name) for name in store.names()}
+    if not recordings:
+        rng = random.Random(7)
+        events, ts, x, y = [], 0.0, 500, 500
+        for _ in range(100000):
+            ts += rng.expovariate(60)
+            x += rng.randint(-6, 6); y += rng.randint(-6, 6)
+            roll = rng.random()
+            if roll < 0.8: events.append(('mouse_move', x, y, ts))
+            elif roll < 0.9: events.append(('mouse_click', x, y, 'left', roll < 0.85, ts))
+            else: events.append(('key_press' if roll < 0.95 else 'key_release', rng.choice('abcdefgh'), ts))
+        recordings = {'synthetic': events}
+    total_events = sum(len(events) for events in recordings.values())
+    legacy_size = len(json.dumps({name: [list(map(encode_event_value, event)) for event in events]
+                                  for name, events in recordings.items()}, indent=4))
+    print(f"Storage benchmark: {len(recordings)} recordings, {total_events} events. Pretty-printed JSON: {legacy_size / 1024:.1f} KB")
+    print(f"  {'codec':<6} {'size KB':>10} {'ratio':>7} {'encode ms':>10} {'decode ev/s':>12} {'cached ev/s':>12}")
+    for codec in CHUNK_CODECS:
+        tmp_dir = tempfile.mkdtemp(prefix='mkr-bench-')
+        try:
+            bench_store = ChunkStore(tmp_dir, codec)
+            start = time.perf_counter()
+            for name, events in recordings.items():
+                bench_store.put(name, events)
+            encode_ms = (time.perf_counter() - start) * 1000
+            disk_bytes = bench_store.stats()['disk_bytes']
+            start = time.perf_counter()
+            decoded = sum(1 for name in recordings for _ in bench_store.view(name))
+            decode_rate = decoded / max(1e-9, time.perf_counter() - start)
+            start = time.perf_counter()
+            decoded = sum(1 for name in recordings for _ in bench_store.view(name))
+            cached_rate = decoded / max(1e-9, time.perf_counter() - start)
+            print(f"  {codec:<6} {disk_bytes / 1024:>10.1f} {legacy_size / max(1, disk_bytes):>6.1f}x {encode_ms:>10.1f} {decode_rate:>12.0f} {cached_rate:>12.0f}")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _finish_startup_probe(app):
+    if not app.recordings_loaded.is_set():
+        app.root.after(10, _finish_startup_probe, app)
+        return
+    print(json.dumps({'marks': app.startup_marks, 'lazy_imports': IMPORT_TIMES}))
+    sys.stdout.flush()
+    app.root.after(0, app.root.destroy)
+
+
 if __name__ == "__main__":
+    if '--startup-benchmark' in sys.argv:
+        run_startup_benchmark()
+        sys.exit(0)
+    if '--storage-benchmark' in sys.argv:
+        run_storage_benchmark()
+        sys.exit(0)
     try:
         root = tk.Tk()
         app = RecorderApp(root)
         app.log_to_bug_report("INFO - Main Tkinter loop starting.")
-        root.after(150, app.start_listeners)
+        root.after_idle(app.on_window_shown)
+        if '--startup-probe' in sys.argv: root.after_idle(_finish_startup_probe, app)
         root.mainloop()
         if hasattr(app, 'log_to_bug_report'):
             app.log_to_bug_report("INFO - Main Tkinter loop finished.")
+            app.close_flight_recorder()
     except SystemExit:
         if 'app' in locals() and hasattr(app, 'log_to_bug_report'):
             app.log_to_bug_report("INFO - Application exited via SystemExit.")
+            app.close_flight_recorder()
         else:
             try:
                 # Check if BUGREPORT_FILE is defined, if not, use a default name or skip
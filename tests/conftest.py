@@ -0,0 +1,15 @@
+import importlib.util
+import os
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Mourse&KeyboardRecorder.py')
+
+
+def load_recorder():
+    spec = importlib.util.spec_from_file_location('recorder', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Loaded once for the whole session; the script is a single file, not an importable package.
+RECORDER = load_recorder()
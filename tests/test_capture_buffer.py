@@ -0,0 +1,21 @@
+from conftest import RECORDER as recorder
+
+
+def test_capture_ring_keeps_newest_events():
+    ring = recorder.CaptureRingBuffer(max_events=5, window_seconds=60)
+    for idx in range(12):
+        ring.append(('mouse_move', idx, idx, 100.0 + idx))
+    assert [event[1] for event in ring.snapshot(now=112.0)] == [7, 8, 9, 10, 11]
+    assert ring.span(now=112.0) == (5, 5.0)
+
+
+def test_capture_ring_snapshot_window():
+    ring = recorder.CaptureRingBuffer(max_events=100, window_seconds=10)
+    # Listener threads append out of order; snapshots come back sorted.
+    for ts in (105.0, 101.0, 95.0, 108.0, 103.0):
+        ring.append(('key_press', 'a', ts))
+    assert [event[-1] for event in ring.snapshot(now=110.0)] == [101.0, 103.0, 105.0, 108.0]
+    assert [event[-1] for event in ring.snapshot(start_ago=8, end_ago=3, now=110.0)] == [103.0, 105.0]
+    assert [event[-1] for event in ring.snapshot(start_ago=30, now=110.0)][0] == 101.0
+    assert recorder.CaptureRingBuffer(0, 10).capacity == 1
+    assert recorder.CaptureRingBuffer(10, 10).span(now=0.0) == (0, 0.0)
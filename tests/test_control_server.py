@@ -0,0 +1,118 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from conftest import RECORDER as recorder
+
+
+class FakeRoot:
+    # Runs after() callbacks on their own thread, standing in for the Tk main loop.
+    def after(self, ms, func, *args):
+        threading.Thread(target=func, args=args, daemon=True).start()
+
+
+class FakeVar:
+    def __init__(self, value=''):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class FakeApp:
+    def __init__(self):
+        self.root = FakeRoot()
+        self.saved_recordings = {'b': [], 'a': []}
+        self.selected_recording_var = FakeVar()
+        self.loaded_recording_name = None
+        self.playing_back = False
+        self.actions = []
+        self.log = []
+
+    def log_to_bug_report(self, message):
+        self.log.append(message)
+
+    def log_message(self, message):
+        self.log.append(message)
+
+    def handle_action(self, action_name, source, *args):
+        self.actions.append(action_name)
+        if action_name == 'load_selected_recording':
+            if self.selected_recording_var.get() == 'a':
+                raise ValueError("chunk file missing")
+            self.loaded_recording_name = self.selected_recording_var.get()
+
+    def get_control_status(self):
+        return {'playing_back': self.playing_back, 'loaded_recording': self.loaded_recording_name}
+
+
+@pytest.fixture
+def server():
+    app = FakeApp()
+    control = recorder.ControlServer(app, port=0)
+    control.start()
+    deadline = time.time() + 5
+    while control.server is None or not control.server.sockets:
+        assert time.time() < deadline, "control server did not start"
+        time.sleep(0.01)
+    yield control
+    control.stop()
+    control.thread.join(5)
+
+
+def connect(control):
+    client = socket.create_connection(control.server.sockets[0].getsockname()[:2], timeout=5)
+    return client, client.makefile('r', encoding='utf-8')
+
+
+def request(client, lines, **message):
+    client.sendall((json.dumps(message) + "\n").encode('utf-8'))
+    return json.loads(lines.readline())
+
+
+def test_commands_are_answered_in_order(server):
+    client, lines = connect(server)
+    assert request(client, lines, cmd='list', id=1) == {'id': 1, 'cmd': 'list', 'ok': True, 'recordings': ['a', 'b']}
+    assert request(client, lines, cmd='load', name='b')['ok'] is True
+    assert request(client, lines, cmd='status')['loaded_recording'] == 'b'
+    assert request(client, lines, cmd='load', name='missing') == {'id': None, 'cmd': 'load', 'ok': False,
+                                                                 'error': "recording 'missing' not found"}
+    assert request(client, lines, cmd='nope')['error'] == "unknown command 'nope'"
+    client.sendall(b"[1, 2]\n")
+    assert json.loads(lines.readline())['ok'] is False
+    client.close()
+
+
+def test_failing_ui_action_gets_an_error_reply(server):
+    client, lines = connect(server)
+    reply = request(client, lines, cmd='load', name='a', id=7)
+    assert reply == {'id': 7, 'cmd': 'load', 'ok': False, 'error': "chunk file missing"}
+    # The connection is still usable afterwards.
+    assert request(client, lines, cmd='status')['ok'] is True
+    client.close()
+
+
+def test_unresponsive_ui_times_out(server, monkeypatch):
+    monkeypatch.setattr(server, 'UI_TIMEOUT', 0.2)
+    server.app.root.after = lambda ms, func, *args: None
+    client, lines = connect(server)
+    reply = request(client, lines, cmd='list')
+    assert reply['ok'] is False and 'did not respond' in reply['error']
+    client.close()
+
+
+def test_stop_disconnects_clients(server):
+    idle, idle_lines = connect(server)
+    subscribed, subscribed_lines = connect(server)
+    assert request(subscribed, subscribed_lines, cmd='subscribe')['ok'] is True
+    server.stop()
+    server.thread.join(5)
+    assert not server.thread.is_alive()
+    assert idle_lines.readline() == ''
+    assert subscribed_lines.readline() == ''
@@ -0,0 +1,68 @@
+import pytest
+
+from conftest import RECORDER as recorder
+
+
+def typed(text, start=1.0, gap=0.1):
+    events = []
+    for idx, char in enumerate(text):
+        ts = start + idx * gap
+        events += [('key_press', char, ts), ('key_release', char, ts + 0.05)]
+    return events
+
+
+def test_compact_text_runs_folds_typing():
+    events = [('mouse_click', 5, 5, 'left', True, 0.0)] + typed("hi there") + [('key_press', 'enter', 2.0)]
+    compacted, folded = recorder.compact_text_runs(events)
+    assert folded == 1
+    assert compacted[0] == events[0] and compacted[-1] == events[-1]
+    assert compacted[1] == ('type_text', "hi there", [100] * 7, 1.0)
+
+
+def test_compact_text_runs_applies_shift_and_space_names():
+    events = [('key_press', 'shift', 0.9)] + typed("ab") + [('key_release', 'shift', 1.2)] + typed("c", 1.3)
+    events += [('key_press', 'space', 1.4), ('key_release', 'space', 1.45)]
+    compacted, folded = recorder.compact_text_runs(events)
+    assert folded == 1
+    assert [event[:2] for event in compacted] == [('type_text', "ABc ")]
+
+
+def test_compact_text_runs_leaves_short_and_unfinished_runs():
+    events = typed("ok")
+    assert recorder.compact_text_runs(events) == (events, 0)
+    # 'x' was pressed before the run and 'd' is still held at the end: both stay plain events.
+    events = [('key_release', 'x', 0.5)] + typed("abc") + [('key_press', 'd', 2.0)]
+    compacted, folded = recorder.compact_text_runs(events)
+    assert folded == 1
+    assert compacted == [events[0], ('type_text', "abc", [100, 100], 1.0), events[-1]]
+
+
+def test_collapse_key_repeats_into_holds():
+    events = [('key_press', 'a', 1.0)] + [('key_press', 'a', 1.5 + idx * 0.03) for idx in range(10)]
+    events += [('mouse_move', 1, 1, 1.6), ('key_release', 'a', 2.0), ('key_press', 'b', 2.1)]
+    collapsed, holds = recorder.collapse_key_repeats(events)
+    assert holds == 1
+    assert collapsed == [('key_hold', 'a', 1.0, 0.5, 10, 1.0), ('mouse_move', 1, 1, 1.6), ('key_press', 'b', 2.1)]
+
+
+def test_collapse_key_repeats_pairs_and_short_presses():
+    # Some systems report auto-repeat as release+press pairs a moment apart.
+    events = [('key_press', 'a', 1.0)]
+    for idx in range(4):
+        ts = 1.5 + idx * 0.03
+        events += [('key_release', 'a', ts - 0.001), ('key_press', 'a', ts)]
+    events.append(('key_release', 'a', 1.8))
+    assert recorder.collapse_key_repeats(events) == ([('key_hold', 'a', 0.8, 0.5, 4, 1.0)], 1)
+    plain = [('key_press', 'a', 1.0), ('key_release', 'a', 1.1), ('key_press', 'a', 1.2), ('key_release', 'a', 1.3)]
+    assert recorder.collapse_key_repeats(plain) == (plain, 0)
+
+
+@pytest.mark.parametrize('mode, presses', [('os', 1), ('recorded', 5), ('4', 3)])
+def test_key_hold_stage_expands_holds(mode, presses):
+    events = [('key_hold', 'a', 1.0, 0.5, 4, 1.0), ('mouse_move', 1, 1, 1.7), ('key_press', 'b', 2.5)]
+    steps = list(recorder.key_hold_stage(recorder.source_stage(events, 1), mode))
+    expanded = [step[2] for step in steps if step[0] == 'event']
+    assert sum(1 for event in expanded if event[:2] == ('key_press', 'a')) == presses
+    assert ('key_release', 'a', 2.0) in expanded
+    assert [event[-1] for event in expanded] == sorted(event[-1] for event in expanded)
+    assert expanded[-1] == ('key_press', 'b', 2.5)
@@ -0,0 +1,43 @@
+import os
+
+from conftest import RECORDER as recorder
+
+
+def test_flight_recorder_round_trip(tmp_path):
+    path = os.path.join(str(tmp_path), 'flight_recorder.bin')
+    flight = recorder.FlightRecorder(path, slots=8, slot_size=64)
+    flight.open()
+    flight.record(recorder.FlightRecorder.kind_of("ACTION - play"), "ACTION - play")
+    flight.record(recorder.FlightRecorder.kind_of("ERROR - boom"), "ERROR - boom")
+    flight.set_position(1, 3, 40, 100)
+    flight.close(clean=False)
+
+    session = recorder.FlightRecorder.read(path)
+    assert not session['clean']
+    assert [(entry[0], entry[2], entry[3]) for entry in session['entries']] == [(0, 'action', "ACTION - play"),
+                                                                                  (1, 'error', "ERROR - boom")]
+    assert session['position'][:4] == (1, 3, 40, 100)
+    report = recorder.format_flight_report(session)
+    assert "did NOT exit normally" in report and "loop 1/3, event 40/100" in report
+
+
+def test_flight_recorder_ring_wraps_and_truncates(tmp_path):
+    path = os.path.join(str(tmp_path), 'flight_recorder.bin')
+    flight = recorder.FlightRecorder(path, slots=4, slot_size=32)
+    flight.open()
+    for idx in range(10):
+        flight.record(0, f"line {idx} " + "x" * 40)
+    flight.close()
+
+    session = recorder.FlightRecorder.read(path)
+    assert session['clean'] and session['position'] is None
+    assert [entry[0] for entry in session['entries']] == [6, 7, 8, 9]
+    assert all(len(entry[3].encode()) == flight.max_text for entry in session['entries'])
+    assert session['entries'][0][3].startswith("line 6 ")
+
+
+def test_flight_recorder_ignores_foreign_files(tmp_path):
+    path = os.path.join(str(tmp_path), 'flight_recorder.bin')
+    with open(path, 'wb') as f:
+        f.write(b'not a ring file' * 10)
+    assert recorder.FlightRecorder.read(path) is None
@@ -0,0 +1,83 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import RECORDER as recorder
+
+EVENTS = [('mouse_move', 10, 20, 0.0), ('key_press', 'a', 0.5), ('mouse_click', 10, 20, 'left', True, 3.5),
+          ('mouse_move', 30, 40, 4.0), ('key_release', 'a', 4.5)]
+
+
+def events_of(steps):
+    return [step[2] for step in steps if step[0] == 'event']
+
+
+def test_source_stage_loops_with_delay():
+    steps = list(recorder.source_stage(EVENTS[:2], 2, inter_loop_delay=1.5))
+    assert steps == [('loop', 0), ('event', 0, EVENTS[0]), ('event', 1, EVENTS[1]), ('loop_delay', 1.5),
+                     ('loop', 1), ('event', 0, EVENTS[0]), ('event', 1, EVENTS[1])]
+
+
+def test_source_stage_is_lazy():
+    steps = recorder.source_stage(iter(EVENTS), 1)
+    assert next(steps) == ('loop', 0)
+    assert next(steps) == ('event', 0, EVENTS[0])
+
+
+def test_gap_cap_stage_restarts_each_loop():
+    steps = recorder.gap_cap_stage(recorder.source_stage(EVENTS, 2), 1.0)
+    timestamps = [event[-1] for event in events_of(steps)]
+    assert timestamps == [0.0, 0.5, 1.5, 2.0, 2.5] * 2
+
+
+def test_filter_stage_drops_events_only():
+    steps = list(recorder.filter_stage(recorder.source_stage(EVENTS, 1), lambda event: event[0] != 'mouse_move'))
+    assert steps[0] == ('loop', 0)
+    assert events_of(steps) == [EVENTS[1], EVENTS[2], EVENTS[4]]
+
+
+def test_key_map_stage():
+    # Mapped key names are resolved through pynput's Key.
+    pytest.importorskip('pynput')
+    steps = recorder.key_map_stage(recorder.source_stage(EVENTS, 1), recorder.parse_key_map("a=b"))
+    assert events_of(steps) == [EVENTS[0], ('key_press', 'b', 0.5), EVENTS[2], EVENTS[3], ('key_release', 'b', 4.5)]
+
+
+@pytest.mark.parametrize('text', ["a", "a=", "=b"])
+def test_parse_key_map_rejects_bad_pairs(text):
+    with pytest.raises(ValueError):
+        recorder.parse_key_map(text)
+
+
+def test_coordinate_stage_transforms_in_chunks():
+    transform = recorder.IDENTITY_TRANSFORM._replace(offset_x=5, offset_y=-5)
+    steps = list(recorder.coordinate_stage(recorder.source_stage(EVENTS, 2), transform, chunk_size=3))
+    assert [step[0] for step in steps] == [step[0] for step in recorder.source_stage(EVENTS, 2)]
+    assert events_of(steps)[:3] == [('mouse_move', 15, 15, 0.0), ('key_press', 'a', 0.5),
+                                    ('mouse_click', 15, 15, 'left', True, 3.5)]
+
+
+def test_jitter_stage_keeps_time_order():
+    steps = recorder.jitter_stage(recorder.source_stage(EVENTS, 1), jitter_px=3, jitter_ms=400, rng=random.Random(1))
+    jittered = events_of(steps)
+    timestamps = [event[-1] for event in jittered]
+    assert timestamps == sorted(timestamps)
+    for before, after in zip(EVENTS, jittered):
+        if before[0] in recorder.POSITIONAL_EVENTS:
+            assert abs(after[1] - before[1]) <= 3 and abs(after[2] - before[2]) <= 3
+
+
+def test_coalesce_moves_stage_keeps_last_move():
+    events = [('mouse_move', idx, idx, idx / 10) for idx in range(5)] + [('key_press', 'a', 1.0)]
+    assert events_of(recorder.coalesce_moves_stage(recorder.source_stage(events, 1))) == [events[4], events[5]]
+
+
+def test_timing_stage_waits_by_live_speed():
+    settings = SimpleNamespace(replay_with_original=True, playback_speed=2.0)
+    steps = list(recorder.timing_stage(recorder.source_stage(EVENTS[:3], 1), lambda: settings))
+    waits = [step[1] for step in steps if step[0] == 'wait']
+    assert waits == pytest.approx([0.25, 1.5])
+    settings.playback_speed = 0
+    steps = list(recorder.timing_stage(recorder.source_stage(EVENTS[:3], 1), lambda: settings))
+    assert ('pause',) in steps
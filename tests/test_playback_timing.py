@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import RECORDER as recorder
+
+
+def moves(*timestamps):
+    return [('mouse_move', idx, idx, ts) for idx, ts in enumerate(timestamps)]
+
+
+def test_cap_event_gaps_shifts_only_long_gaps():
+    capped, idle_gaps = recorder.cap_event_gaps(moves(0.0, 0.5, 10.5, 11.0, 31.0), 2.0)
+    assert idle_gaps == 2
+    assert [event[-1] for event in capped] == [0.0, 0.5, 2.5, 3.0, 5.0]
+    assert [event[:-1] for event in capped] == [event[:-1] for event in moves(0.0, 0.5, 10.5, 11.0, 31.0)]
+
+
+def test_cap_event_gaps_keeps_short_recordings():
+    events = moves(1.0, 1.5, 2.0)
+    assert recorder.cap_event_gaps(events, 2.0) == (events, 0)
+    assert recorder.cap_event_gaps([], 2.0) == ([], 0)
+
+
+def test_estimate_playback_duration():
+    events = moves(0.0, 1.0, 11.0)
+    assert recorder.estimate_playback_duration(events) == pytest.approx(11.0)
+    assert recorder.estimate_playback_duration(events, speed=2.0) == pytest.approx(5.5)
+    assert recorder.estimate_playback_duration(events, max_gap=2.0) == pytest.approx(3.0)
+    assert recorder.estimate_playback_duration(events, max_gap=2.0, loops=3, inter_loop_delay=1.0) == pytest.approx(11.0)
+    assert recorder.estimate_playback_duration(events, speed=0) is None
+
+
+@pytest.mark.parametrize('seconds, text', [(None, "n/a (paused)"), (4.4, "4s"), (65, "1m 05s"), (3723, "1h 02m 03s")])
+def test_format_duration(seconds, text):
+    assert recorder.format_duration(seconds) == text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_pacer_spaces_clicks_and_key_pairs():
+    clock = FakeClock()
+    pacer = recorder.ThroughputPacer(clock)
+    assert pacer.delay_before(('key_press', 'a', 0.0)) == 0.0
+    pacer.record(('key_press', 'a', 0.0), 0.0001)
+    assert pacer.delay_before(('key_release', 'a', 0.0)) == pytest.approx(pacer.KEY_PAIR_GAP)
+    clock.now = 0.01
+    pacer.record(('key_release', 'a', 0.0), 0.0001)
+    assert pacer.delay_before(('mouse_click', 0, 0, 'left', True, 0.0)) == pytest.approx(0.001)
+    clock.now = 0.02
+    assert pacer.delay_before(('mouse_move', 0, 0, 0.0)) == 0.0
+
+
+def test_pacer_backs_off_while_calls_are_slow_and_recovers():
+    clock = FakeClock()
+    pacer = recorder.ThroughputPacer(clock)
+    for _ in range(5):
+        pacer.record(('mouse_move', 0, 0, 0.0), 0.0001)
+    assert pacer.backoff == 0.0
+    for _ in range(30):
+        pacer.record(('mouse_move', 0, 0, 0.0), 0.01)
+    assert pacer.backoff == pacer.MAX_BACKOFF
+    for _ in range(200):
+        pacer.record(('mouse_move', 0, 0, 0.0), 0.0001)
+    assert pacer.backoff < 0.001
+
+
+def test_pacer_events_per_second():
+    clock = FakeClock()
+    pacer = recorder.ThroughputPacer(clock)
+    assert pacer.events_per_second() == 0.0
+    for idx in range(11):
+        clock.now = idx * 0.1
+        pacer.delay_before(('mouse_move', 0, 0, 0.0))
+        pacer.record(('mouse_move', 0, 0, 0.0), 0.0001)
+    assert pacer.events_per_second() == pytest.approx(11.0)
+
+
+def test_simulate_playback_on_virtual_clock():
+    settings = SimpleNamespace(replay_with_original=True, playback_speed=2.0)
+    events = moves(0.0, 1.0, 3.0) + [('type_text', "abc", [100, 200], 4.0)]
+    steps = recorder.timing_stage(recorder.source_stage(events, 2, inter_loop_delay=5.0), lambda: settings)
+    clock = recorder.VirtualClock()
+    report = recorder.simulate_playback(steps, clock, typing_seconds=lambda gaps: sum(gaps) / 1000, trace_limit=3)
+    assert not report.paused
+    assert report.total == pytest.approx(2 * (2.0 + 0.3) + 5.0)
+    assert report.loops == [[0.0, pytest.approx(2.3)], [pytest.approx(7.3), pytest.approx(9.6)]]
+    assert report.counts == {'mouse_move': 6, 'type_text': 2}
+    assert report.trace == [(0.0, 0, 0, 'mouse_move'), (0.5, 0, 1, 'mouse_move'), (1.5, 0, 2, 'mouse_move')]
+
+
+def test_simulate_playback_stops_at_pause():
+    settings = SimpleNamespace(replay_with_original=True, playback_speed=0)
+    steps = recorder.timing_stage(recorder.source_stage(moves(0.0, 1.0), 1), lambda: settings)
+    report = recorder.simulate_playback(steps, recorder.VirtualClock())
+    assert report.paused and report.total == 0.0 and report.counts == {'mouse_move': 1}
+
+
+def test_simulate_playback_matches_estimate():
+    settings = SimpleNamespace(replay_with_original=True, playback_speed=1.5)
+    events = moves(0.0, 0.2, 9.0, 9.5)
+    steps = recorder.timing_stage(recorder.gap_cap_stage(recorder.source_stage(events, 3, 1.0), 2.0), lambda: settings)
+    report = recorder.simulate_playback(steps, recorder.VirtualClock())
+    expected = recorder.estimate_playback_duration(events, speed=1.5, max_gap=2.0, loops=3, inter_loop_delay=1.0)
+    assert report.total == pytest.approx(expected)
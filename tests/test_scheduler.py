@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import RECORDER as recorder
+
+
+def test_parse_trigger_interval():
+    trigger = recorder.parse_trigger("every 15m")
+    assert isinstance(trigger, recorder.IntervalTrigger)
+    assert trigger.seconds == 900
+    assert trigger.next_after(1000.0) == 1800
+    assert recorder.parse_trigger("every 30s").seconds == 30
+    assert recorder.parse_trigger("Every 2H").seconds == 7200
+    assert recorder.parse_trigger("every 5").seconds == 300
+
+
+def test_parse_trigger_daily_and_cron():
+    base = datetime(2026, 3, 4, 10, 30).timestamp()  # a Wednesday
+    daily = recorder.parse_trigger("daily 02:00")
+    assert datetime.fromtimestamp(daily.next_after(base)) == datetime(2026, 3, 5, 2, 0)
+
+    workdays = recorder.parse_trigger("*/15 9-17 * * 1-5")
+    assert datetime.fromtimestamp(workdays.next_after(base)) == datetime(2026, 3, 4, 10, 45)
+    friday_evening = datetime(2026, 3, 6, 17, 50).timestamp()
+    assert datetime.fromtimestamp(workdays.next_after(friday_evening)) == datetime(2026, 3, 9, 9, 0)
+
+    sunday = recorder.parse_trigger("0 12 * * 7")
+    assert datetime.fromtimestamp(sunday.next_after(base)) == datetime(2026, 3, 8, 12, 0)
+
+
+@pytest.mark.parametrize('text', ["every 0m", "every", "daily 2", "* * * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *"])
+def test_parse_trigger_rejects_bad_input(text):
+    with pytest.raises(ValueError):
+        recorder.parse_trigger(text)
+
+
+def test_scheduler_pops_due_jobs_without_replaying_missed_runs():
+    scheduler = recorder.JobScheduler(on_due=None)
+    scheduler.set_jobs({'often': recorder.parse_trigger("every 10s"), 'rare': recorder.parse_trigger("every 1h")}, now=0.0)
+    assert scheduler.pop_due(5.0) == []
+    assert scheduler.pop_due(35.0) == ['often']
+    assert scheduler.next_run('often') == 40.0
+    assert sorted(scheduler.pop_due(3600.0)) == ['often', 'rare']
+    scheduler.set_jobs({'rare': recorder.parse_trigger("every 1h")}, now=3600.0)
+    assert scheduler.pop_due(7200.0) == ['rare'] and scheduler.next_run('often') is None
@@ -0,0 +1,208 @@
+import os
+
+import pytest
+
+from conftest import RECORDER as recorder
+
+
+def make_events(count=600, start=100.0):
+    # Timestamps on a 1/64 s grid survive the relative offsets in chunks exactly.
+    events = []
+    for idx in range(count):
+        ts = start + idx / 64
+        if idx % 50 == 10:
+            events.append(('mouse_click', idx, idx * 2, 'left', idx % 100 == 10, ts))
+        elif idx % 50 == 20:
+            events.append(('key_press', 'a', ts))
+        elif idx % 50 == 21:
+            events.append(('type_text', 'héllo', [10.0, 12.5, 8.0, 9.0], ts))
+        elif idx % 50 == 30:
+            events.append(('mouse_scroll', idx, idx, 0, -1, ts))
+        else:
+            events.append(('mouse_move', idx, 1080 - idx % 1080, ts))
+    return events
+
+
+def chunk_files(root):
+    return sorted(name for _, _, files in os.walk(os.path.join(root, 'chunks')) for name in files)
+
+
+@pytest.mark.parametrize('codec', ['none', 'zlib', 'lzma'])
+def test_chunk_store_round_trip(tmp_path, codec):
+    store = recorder.ChunkStore(str(tmp_path), codec=codec)
+    events = make_events()
+    store.put('a', events)
+    assert len(store.view('a')) == len(events)
+    assert store.get('a') == events
+
+    reloaded = recorder.ChunkStore(str(tmp_path))
+    reloaded.load_index()
+    assert reloaded.get('a') == events
+    assert reloaded.metadata['a']['events'] == len(events)
+
+
+def test_chunk_store_shares_and_releases_chunks(tmp_path):
+    store = recorder.ChunkStore(str(tmp_path))
+    events = make_events()
+    store.put('a', events)
+    alone = chunk_files(str(tmp_path))
+    new_chunks, _ = store.put('b', events + [('key_press', 'z', 200.0)])
+    # Only the last chunk, which holds the appended event, differs.
+    assert new_chunks == 1
+    shared = {digest for digest, _ in store.recordings['a']} & {digest for digest, _ in store.recordings['b']}
+    assert len(shared) == len(store.recordings['a']) - 1
+    assert all(store.refcounts[digest] == 2 for digest in shared)
+
+    assert store.delete('a') == 1
+    assert store.get('b')[:-1] == events
+    store.delete('b')
+    assert chunk_files(str(tmp_path)) == []
+    assert store.refcounts == {} and store.chunk_sizes == {}
+    assert len(alone) > 1
+
+
+def test_held_recording_survives_delete_and_overwrite(tmp_path):
+    store = recorder.ChunkStore(str(tmp_path))
+    events = make_events()
+    store.put('a', events)
+    view = store.view('a')
+    store.hold('loaded', view.manifest)
+    assert list(view) == events
+    store.delete('a')
+    store.put('a', [('key_press', 'x', 0.0)])
+    store.cache.discard(view.manifest[0][0])
+    assert store.cache.stats()['pinned_chunks'] > 0
+    store.cache.set_budget(0)
+    assert list(view) == events
+
+    store.unhold('loaded')
+    assert len(chunk_files(str(tmp_path))) == 1
+
+
+def test_chunks_held_at_exit_are_removed_next_start(tmp_path):
+    store = recorder.ChunkStore(str(tmp_path))
+    store.put('a', make_events())
+    store.hold('loaded', store.view('a').manifest)
+    store.delete('a')
+    assert chunk_files(str(tmp_path))
+
+    restarted = recorder.ChunkStore(str(tmp_path))
+    restarted.load_index()
+    assert restarted.remove_unreferenced_chunks() > 0
+    assert chunk_files(str(tmp_path)) == []
+
+
+def test_link_shares_chunks_of_a_view(tmp_path):
+    store = recorder.ChunkStore(str(tmp_path))
+    events = make_events()
+    store.put('a', events)
+    stored = chunk_files(str(tmp_path))
+    view = store.view('a')
+    store.hold('loaded', view.manifest)
+    store.put('a', events[:100])
+    store.link('copy', view)
+    assert chunk_files(str(tmp_path)) != stored
+    assert store.get('copy') == events
+    assert store.metadata['copy']['events'] == len(events)
+
+    store.unhold('loaded')
+    store.delete('a')
+    assert store.get('copy') == events
+    store.delete('copy')
+    assert chunk_files(str(tmp_path)) == []
+    with pytest.raises(KeyError):
+        store.link('gone', view)
+
+
+def test_damaged_index_is_kept_and_store_turns_read_only(tmp_path):
+    store = recorder.ChunkStore(str(tmp_path))
+    store.put('a', make_events())
+    stored = chunk_files(str(tmp_path))
+    with open(store.index_path, 'w') as f:
+        f.write('{"recordings": ')
+    damaged = recorder.ChunkStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        damaged.load_index()
+    with open(store.index_path + '.corrupt') as f:
+        assert f.read() == '{"recordings": '
+    with pytest.raises(RuntimeError):
+        damaged.put('b', make_events(20))
+    assert damaged.remove_unreferenced_chunks() == 0
+    assert chunk_files(str(tmp_path)) == stored
+
+
+def test_coordinate_transform_of_stored_recording(tmp_path):
+    store = recorder.ChunkStore(str(tmp_path))
+    events = make_events()
+    store.put('a', events)
+    moved = recorder.apply_coordinate_transform(store.view('a'), recorder.IDENTITY_TRANSFORM._replace(offset_x=5))
+    assert len(moved) == len(events)
+    for before, after in zip(events, moved):
+        if before[0] in recorder.POSITIONAL_EVENTS:
+            assert after == (before[0], before[1] + 5) + before[2:]
+        else:
+            assert after == before
+
+
+@pytest.mark.parametrize('fmt', sorted(recorder.EXCHANGE_CODECS))
+def test_exchange_round_trip(tmp_path, fmt):
+    events = make_events() + [('mouse_move', -5, -7, 123.456789012345), ('key_release', 'a', 0.1)]
+    path = os.path.join(str(tmp_path), recorder.exchange_file_name('Mix: a/b?', fmt))
+    assert recorder.export_events(iter(events), path, fmt) == len(events)
+    assert recorder.exchange_format_of(path) == fmt
+    assert recorder.recording_name_from_path(path) == 'Mix: a/b?'
+    assert list(recorder.iter_exchange_file(path)) == events
+
+
+def test_exchange_round_trip_from_store(tmp_path):
+    store = recorder.ChunkStore(str(tmp_path / 'store'), codec='zlib')
+    events = make_events()
+    store.put('a', events)
+    for fmt in recorder.EXCHANGE_CODECS:
+        path = os.path.join(str(tmp_path), recorder.exchange_file_name('a', fmt))
+        recorder.export_events(store.view('a'), path, fmt)
+        assert list(recorder.iter_exchange_file(path)) == events
+
+
+def rows(count):
+    return [([idx, idx], idx / 64) for idx in range(count)]
+
+
+def test_decoded_cache_evicts_least_recently_used():
+    size = recorder.DecodedChunkCache.estimate_size(rows(100))
+    cache = recorder.DecodedChunkCache(size * 2)
+    cache.put('a', rows(100))
+    cache.put('b', rows(100))
+    assert cache.get('a') is not None
+    cache.put('c', rows(100))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['bytes'] <= stats['budget_bytes']
+    assert stats['hits'] == 3 and stats['misses'] == 1
+
+
+def test_decoded_cache_pins_outside_the_budget():
+    cache = recorder.DecodedChunkCache(0)
+    cache.pin('loaded', ['a'])
+    cache.put('a', rows(100))
+    cache.put('b', rows(100))
+    assert cache.get('a') is not None and cache.get('b') is None
+    cache.discard('a')
+    assert cache.get('a') is not None
+    cache.set_budget(10 ** 9)
+    cache.unpin('loaded')
+    assert cache.stats()['pinned_chunks'] == 0
+    assert cache.get('a') is not None
+    cache.set_budget(0)
+    assert cache.get('a') is None
+
+
+def test_store_reads_repeat_from_the_cache(tmp_path):
+    store = recorder.ChunkStore(str(tmp_path), cache_bytes=10 ** 8)
+    store.put('a', make_events())
+    store.cache = recorder.DecodedChunkCache(10 ** 8)
+    list(store.view('a'))
+    misses = store.cache.stats()['misses']
+    assert list(store.view('a')) == make_events()
+    assert store.cache.stats()['misses'] == misses
@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import RECORDER as recorder
+
+
+def test_validator_accepts_a_valid_recording():
+    events = [('mouse_move', 10, 10, 0.0), ('mouse_click', 10, 10, 'left', True, 0.1), ('key_press', 'a', 0.2),
+              ('type_text', "abc", [10, 20], 0.3), ('key_hold', 'a', 1.0, 0.5, 4, 0.5), ('mouse_scroll', 10, 10, 0, -1, 1.6)]
+    validator = recorder.EventValidator((0, 0, 1919, 1079)).check_all(events)
+    assert (validator.count, validator.errors, validator.warnings) == (6, 0, 0)
+    assert validator.describe() == ""
+
+
+@pytest.mark.parametrize('event', [('teleport', 0.0), ('mouse_move', 1, 0.0), ('key_press', 'a', 'now'),
+                                   ('mouse_move', 'x', 1, 0.0), ('type_text', "abc", [10], 0.0),
+                                   ('key_hold', 'a', -1.0, 0.5, 4, 0.0), ('mouse_scroll', 1, 1, None, 1, 0.0), 42])
+def test_validator_errors(event):
+    validator = recorder.EventValidator().check_all([event])
+    assert validator.errors == 1 and validator.warnings == 0
+
+
+def test_validator_warnings():
+    events = [('mouse_move', 10, 10, 1.0), ('mouse_move', 5000, 10, 0.5), ('mouse_click', 1, 1, 'left', True, 2.0)]
+    validator = recorder.EventValidator((0, 0, 1919, 1079)).check_all(events)
+    assert (validator.errors, validator.warnings) == (0, 2)
+    assert validator.describe(limit=1) == "event 2: timestamp goes back 0.500s; and 1 more"
+
+
+def test_validator_checks_key_names_with_pynput():
+    pytest.importorskip('pynput')
+    events = [('key_press', 'no_such_key', 0.0), ('mouse_click', 1, 1, 'thumb', True, 0.1), ('key_press', 'shift', 0.2)]
+    validator = recorder.EventValidator().check_all(events)
+    assert (validator.errors, validator.warnings) == (0, 2)
+
+
+def test_validator_keeps_a_bounded_problem_list():
+    validator = recorder.EventValidator().check_all([('bad', idx) for idx in range(120)])
+    assert validator.errors == 120 and len(validator.problems) == validator.MAX_PROBLEMS
+
+
+def test_verify_stored_recording_reports_corrupt_chunks(tmp_path):
+    store = recorder.ChunkStore(str(tmp_path))
+    events = [('mouse_move', idx, idx, idx / 64) for idx in range(300)]
+    store.put('a', events)
+    manifest = store.recordings['a']
+    result = recorder.verify_stored_recording(str(tmp_path), 'a', manifest, store.chunk_sizes)
+    assert result['corrupt'] is None and result['events'] == 300
+    assert result['metadata']['types'] == {'mouse_move': 300}
+
+    with open(store._chunk_path(manifest[-1][0]), 'r+b') as f:
+        f.seek(3)
+        f.write(b'#')
+    result = recorder.verify_stored_recording(str(tmp_path), 'a', manifest, store.chunk_sizes)
+    assert result['corrupt'].startswith(f"chunk {len(manifest)} unreadable")